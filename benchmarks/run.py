@@ -0,0 +1,456 @@
+"""
+Benchmarks of the hot paths of the app, on synthetic ledgers of growing size.
+
+    python -m benchmarks.run --sizes 1000 100000 1000000 --output results.json
+    python -m benchmarks.run --baseline results.json      # compare against an earlier run
+
+Every benchmark runs `--repeat` times per ledger size, and the min, median and max
+wall times are written as JSON, along with the machine, Python and commit they ran on.
+The synthetic ledgers are kept in `--workdir`, so bigger sizes are only generated once.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable
+
+from accountant.database.db import CSVDataBase
+
+from benchmarks.synthetic_ledger import generate_entries, write_synthetic_ledger
+from flet_accountant.components.new_entry_tab.entry_data import (
+    EntryRow,
+    EntryRowPool,
+    PaginatedEntryTable,
+)
+from flet_accountant.config import DB_FILE_PATH
+from flet_accountant.database.async_db import AsyncLedgerDataBase
+from flet_accountant.database.db import LedgerDataBase
+from flet_accountant.database.filters import EntryFilter
+from flet_accountant.database.journal import LedgerJournal
+from flet_accountant.database.parallel_loader import load_ledger_columns
+from flet_accountant.database.partitioned_db import PartitionedDataBase
+
+DEFAULT_SIZES: tuple[int, ...] = (1_000, 100_000)
+DEFAULT_WORKDIR = Path(tempfile.gettempdir()) / "flet_accountant_benchmarks"
+
+# Entries written per `CSVDataBase.write` call, in the write benchmark
+WRITE_BATCH_SIZE = 10_000
+# Single-entry appends timed on top of the ledger, like entries added from the form
+APPENDS = 200
+ROWS_PER_PAGE = 25
+
+
+@dataclass
+class Result:
+    """
+    The timings of one benchmark, on one ledger size
+
+    Attributes:
+        benchmark (str): Name of the benchmark
+        size (int): Number of entries in the ledger
+        runs (list[float]): Wall time of every run, in seconds
+        unit_count (int): Number of operations (rows, pages, ...) a run performs
+        unit (str): What the operations are
+        extra (dict): Anything else the benchmark measured
+    """
+
+    benchmark: str
+    size: int
+    runs: list[float]
+    unit_count: int = 1
+    unit: str = "run"
+    extra: dict = field(default_factory=dict)
+
+    def summary(self) -> dict:
+        median = statistics.median(self.runs)
+        return {
+            **asdict(self),
+            "min_seconds": min(self.runs),
+            "median_seconds": median,
+            "max_seconds": max(self.runs),
+            f"{self.unit}s_per_second": self.unit_count / median if median > 0 else None,
+        }
+
+
+def _timed(function: Callable[[], object]) -> float:
+    started = time.perf_counter()
+    function()
+    return time.perf_counter() - started
+
+
+def _fresh_ledger(ledger: Path, workdir: Path) -> LedgerDataBase:
+    """
+    Returns the ledger with no sidecar files, so indexes and caches are built from scratch
+    """
+    for sidecar in workdir.glob(f"{ledger.stem}.*"):
+        if sidecar != ledger:
+            sidecar.unlink()
+    return LedgerDataBase(ledger)
+
+
+#
+# The benchmarks
+#
+def bench_csv_write(size: int, ledger: Path, workdir: Path, repeat: int, seed: int) -> Result:
+    """
+    Throughput of `CSVDataBase.write`, writing the whole ledger in batches (generating the entries isn't timed)
+    """
+    runs = []
+    target = workdir / "write-target.csv"
+    for _ in range(repeat):
+        target.unlink(missing_ok=True)
+        target.touch()
+        db = CSVDataBase(target)
+        elapsed = 0.0
+        entries = generate_entries(size, seed)
+        while batch := [entry for _, entry in zip(range(WRITE_BATCH_SIZE), entries)]:
+            elapsed += _timed(lambda: db.write(batch))
+        runs.append(elapsed)
+    target.unlink(missing_ok=True)
+    return Result("csv_write", size, runs, size, "row")
+
+
+def bench_append(size: int, ledger: Path, workdir: Path, repeat: int, seed: int) -> Result:
+    """
+    Latency of single-entry `LedgerDataBase.write`s on top of the ledger, indexes included
+    """
+    runs = []
+    target = workdir / "append-target.csv"
+    for _ in range(repeat):
+        for sidecar in workdir.glob("append-target.*"):
+            sidecar.unlink()
+        target.write_bytes(ledger.read_bytes())
+        db = LedgerDataBase(target)
+        db.count()  # build the indexes up front, only the appends are timed
+        appended = list(generate_entries(APPENDS, seed + 1))
+        runs.append(sum(_timed(lambda: db.write([entry])) for entry in appended))
+    for sidecar in workdir.glob("append-target.*"):
+        sidecar.unlink()
+    return Result("ledger_append", size, runs, APPENDS, "append")
+
+
+def bench_journaled_append(
+    size: int, ledger: Path, workdir: Path, repeat: int, seed: int
+) -> Result:
+    """
+    Latency of single-entry `LedgerDataBase.write`s through the write-ahead journal, one
+    fsync each; compare with `ledger_append` for the cost of the durability
+    """
+    runs, syncs = [], 0
+    target = workdir / "journal-target.csv"
+    for _ in range(repeat):
+        for sidecar in workdir.glob("journal-target.*"):
+            sidecar.unlink()
+        target.write_bytes(ledger.read_bytes())
+        journal = LedgerJournal(target.with_suffix(".journal"))
+        db = LedgerDataBase(target, journal=journal)
+        db.count()  # build the indexes up front, only the appends are timed
+        appended = list(generate_entries(APPENDS, seed + 1))
+        runs.append(sum(_timed(lambda: db.write([entry])) for entry in appended))
+        syncs = journal.syncs
+        journal.close()
+    for sidecar in workdir.glob("journal-target.*"):
+        sidecar.unlink()
+    return Result(
+        "journaled_append", size, runs, APPENDS, "append", extra={"fsyncs": syncs}
+    )
+
+
+def bench_full_load(size: int, ledger: Path, workdir: Path, repeat: int, seed: int) -> Result:
+    """
+    Time to parse every entry of the ledger, cold (no sidecar files)
+    """
+    runs = []
+    for _ in range(repeat):
+        db = _fresh_ledger(ledger, workdir)
+        runs.append(_timed(lambda: sum(1 for _ in db.iter_entries())))
+    return Result("full_load", size, runs, size, "row")
+
+
+def bench_parallel_load(
+    size: int, ledger: Path, workdir: Path, repeat: int, seed: int
+) -> Result:
+    """
+    Time to load the ledger into `LedgerColumns` on every core, and on a single one
+    """
+    workers = os.cpu_count() or 1
+    runs, single = [], []
+    for _ in range(repeat):
+        runs.append(
+            _timed(lambda: load_ledger_columns(ledger, workers, min_parallel_bytes=0))
+        )
+        single.append(_timed(lambda: load_ledger_columns(ledger, workers=1)))
+    return Result(
+        "parallel_load",
+        size,
+        runs,
+        size,
+        "row",
+        extra={
+            "workers": workers,
+            "single_process_median_seconds": statistics.median(single),
+            "speedup": statistics.median(single) / statistics.median(runs),
+        },
+    )
+
+
+def bench_partitioned_range(
+    size: int, ledger: Path, workdir: Path, repeat: int, seed: int
+) -> Result:
+    """
+    Time to read the last year of the ledger out of the year partitions (the older years
+    archived), and out of the single CSV file
+    """
+    folder = workdir / f"{ledger.stem}.partitions"
+    shutil.rmtree(folder, ignore_errors=True)
+    source = _fresh_ledger(ledger, workdir)
+    partitioned = PartitionedDataBase(folder)
+    partitioned.migrate_from(source)
+    last_year = partitioned.partitions[-1].key
+    partitioned.archive_closed_years(datetime.date(int(last_year), 12, 31))
+    last_year_filter = EntryFilter.from_text(
+        start=f"{last_year}-01-01", end=f"{last_year}-12-31"
+    )
+    matching = partitioned.count(last_year_filter)
+
+    runs, single_file = [], []
+    for _ in range(repeat):
+        runs.append(
+            _timed(lambda: partitioned.read_entries(0, matching, last_year_filter))
+        )
+        single_file.append(
+            _timed(lambda: source.read_entries(0, matching, last_year_filter))
+        )
+    shutil.rmtree(folder, ignore_errors=True)
+    return Result(
+        "partitioned_range",
+        size,
+        runs,
+        matching,
+        "row",
+        extra={
+            "partitions": len(partitioned.partitions),
+            "single_file_median_seconds": statistics.median(single_file),
+        },
+    )
+
+
+def bench_cold_open(size: int, ledger: Path, workdir: Path, repeat: int, seed: int) -> Result:
+    """
+    Time to open the ledger and answer its first count and balance, cold and then warm
+    """
+    runs, warm = [], []
+    for _ in range(repeat):
+        db = _fresh_ledger(ledger, workdir)
+        runs.append(_timed(lambda: (db.count(), db.balance())))
+        db = LedgerDataBase(ledger)
+        warm.append(_timed(lambda: (db.count(), db.balance())))
+    return Result(
+        "cold_open", size, runs, extra={"warm_median_seconds": statistics.median(warm)}
+    )
+
+
+def bench_page(size: int, ledger: Path, workdir: Path, repeat: int, seed: int) -> Result:
+    """
+    Time per page of `PaginatedDataTable.build_rows` and `refresh_data`, on the first, middle and last page
+    """
+    db = AsyncLedgerDataBase(LedgerDataBase(ledger))
+    table = PaginatedEntryTable(db, rows_per_page=ROWS_PER_PAGE)
+    table.refresh_data()
+    pages = sorted({1, max(table.num_pages // 2, 1), max(table.num_pages, 1)})
+
+    runs, refresh = [], []
+    for _ in range(repeat):
+        build = 0.0
+        for page in pages:
+            table.current_page = page
+            build += _timed(table.build_rows)
+            refresh.append(_timed(table.refresh_data))
+        runs.append(build)
+    db.close()
+    return Result(
+        "page_build_rows",
+        size,
+        runs,
+        len(pages),
+        "page",
+        extra={
+            "pages": pages,
+            "rows_per_page": ROWS_PER_PAGE,
+            "refresh_data_median_seconds": statistics.median(refresh),
+        },
+    )
+
+
+def bench_entry_row(size: int, ledger: Path, workdir: Path, repeat: int, seed: int) -> Result:
+    """
+    Cost of constructing `EntryRow`s (independent of the ledger size, at most 10,000 rows)
+    """
+    entries = list(generate_entries(min(size, 10_000), seed))
+    runs = [_timed(lambda: [EntryRow(entry) for entry in entries]) for _ in range(repeat)]
+    return Result("entry_row", size, runs, len(entries), "row")
+
+
+def bench_row_pool(size: int, ledger: Path, workdir: Path, repeat: int, seed: int) -> Result:
+    """
+    Cost of showing pages of entries in recycled `EntryRow`s (at most 10,000 rows), to compare with `entry_row`
+    """
+    entries = list(generate_entries(min(size, 10_000), seed))
+    pool = EntryRowPool()
+
+    def show_pages():
+        for offset in range(0, len(entries), ROWS_PER_PAGE):
+            pool.rows_for(entries[offset : offset + ROWS_PER_PAGE], offset + 1, ROWS_PER_PAGE)
+
+    runs = [_timed(show_pages) for _ in range(repeat)]
+    return Result("row_pool", size, runs, len(entries), "row")
+
+
+def bench_startup(size: int, ledger: Path, workdir: Path, repeat: int, seed: int) -> Result:
+    """
+    Cold startup of `main.main` up to the first frame, in a fresh process, on a ledger of this size
+    """
+    data_home = workdir / f"startup-{size}"
+    runs, probes = [], []
+    for _ in range(repeat):
+        # `_setup_app_dir` and the config find the ledger under XDG_DATA_HOME
+        for stale in data_home.rglob("*_DB.*"):
+            stale.unlink()
+        db_file = data_home / DB_FILE_PATH.relative_to(DB_FILE_PATH.parents[2])
+        db_file.parent.mkdir(parents=True, exist_ok=True)
+        db_file.write_bytes(ledger.read_bytes())
+
+        result_file = workdir / "startup-probe.json"
+        started = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.startup_probe", str(result_file)],
+            env={**os.environ, "XDG_DATA_HOME": str(data_home)},
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        runs.append(time.perf_counter() - started)
+        probes.append(json.loads(result_file.read_text()))
+
+    return Result(
+        "startup",
+        size,
+        runs,
+        extra={
+            key: statistics.median(probe[key] for probe in probes) for key in probes[0]
+        },
+    )
+
+
+BENCHMARKS: dict[str, Callable[..., Result]] = {
+    "csv_write": bench_csv_write,
+    "ledger_append": bench_append,
+    "journaled_append": bench_journaled_append,
+    "full_load": bench_full_load,
+    "parallel_load": bench_parallel_load,
+    "partitioned_range": bench_partitioned_range,
+    "cold_open": bench_cold_open,
+    "page_build_rows": bench_page,
+    "entry_row": bench_entry_row,
+    "row_pool": bench_row_pool,
+    "startup": bench_startup,
+}
+
+
+#
+# Running and comparing
+#
+def _metadata(seed: int, repeat: int) -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "seed": seed,
+        "repeat": repeat,
+    }
+
+
+def compare(results: list[dict], baseline: list[dict]) -> None:
+    """
+    Prints how the median times changed against a baseline run (negative is faster)
+    """
+    before = {(each["benchmark"], each["size"]): each for each in baseline}
+    print(f"{'benchmark':<18}{'size':>12}{'baseline':>12}{'now':>12}{'change':>10}")
+    for each in results:
+        old = before.get((each["benchmark"], each["size"]))
+        if old is None:
+            continue
+        change = each["median_seconds"] / old["median_seconds"] - 1
+        print(
+            f"{each['benchmark']:<18}{each['size']:>12,}"
+            f"{old['median_seconds']:>12.4f}{each['median_seconds']:>12.4f}{change:>+10.1%}"
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="benchmarks.run", description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument(
+        "--benchmarks", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS)
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", type=Path, default=DEFAULT_WORKDIR)
+    parser.add_argument("--output", type=Path, help="Defaults to the workdir, named after the time")
+    parser.add_argument("--baseline", type=Path, help="An earlier results file to compare with")
+    args = parser.parse_args(argv)
+
+    args.workdir.mkdir(parents=True, exist_ok=True)
+    output = args.output or args.workdir / (
+        "results-" + datetime.datetime.now().strftime("%Y%m%d-%H%M%S") + ".json"
+    )
+
+    results: list[dict] = []
+    for size in args.sizes:
+        ledger = args.workdir / f"ledger-{size}-{args.seed}.csv"
+        if not ledger.exists():
+            print(f"Generating a ledger of {size:,} entries ...", file=sys.stderr)
+            write_synthetic_ledger(ledger, size, args.seed)
+        for name in args.benchmarks:
+            result = BENCHMARKS[name](size, ledger, args.workdir, args.repeat, args.seed)
+            summary = result.summary()
+            results.append(summary)
+            print(
+                f"{name:<18}{size:>12,}  median {summary['median_seconds']:.4f}s",
+                file=sys.stderr,
+            )
+
+    output.write_text(
+        json.dumps({"meta": _metadata(args.seed, args.repeat), "results": results}, indent=2)
+    )
+    print(f"Results written to {output}", file=sys.stderr)
+
+    if args.baseline is not None:
+        compare(results, json.loads(args.baseline.read_text())["results"])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""
+Measures the cold startup of the app, up to its first frame, in a fresh process.
+
+Run by `benchmarks.run` (with `XDG_DATA_HOME` pointing at a scratch directory), it
+imports `flet_accountant.main`, and runs `main.main` against a page whose connection
+records the commands instead of sending them to a Flet client. The first frame is
+the first batch of commands that adds the app's controls to the page.
+
+    python -m benchmarks.startup_probe result.json
+"""
+
+import time
+
+_PROCESS_STARTED = time.perf_counter()
+
+import asyncio  # noqa: E402
+import json  # noqa: E402
+import sys  # noqa: E402
+from typing import Any  # noqa: E402
+
+from flet_core.connection import Connection  # noqa: E402
+from flet_core.page import Page  # noqa: E402
+from flet_core.protocol import (  # noqa: E402
+    Command,
+    CommandEncoder,
+    PageCommandResponsePayload,
+    PageCommandsBatchResponsePayload,
+)
+
+
+class RecordingConnection(Connection):
+    """
+    A connection that answers the page like a Flet client would, and records what it was sent
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._next_id: int = 0
+        self.batches: int = 0
+        self.bytes_sent: int = 0
+        self.first_frame_at: float | None = None
+
+    def _new_ids(self, command: Command) -> str:
+        ids = []
+        for _ in command.commands:
+            self._next_id += 1
+            ids.append(f"_{self._next_id}")
+        return " ".join(ids)
+
+    def send_command(self, session_id: str, command: Command) -> Any:
+        self.bytes_sent += len(json.dumps(command, cls=CommandEncoder))
+        return PageCommandResponsePayload(result="", error="")
+
+    def send_commands(self, session_id: str, commands: list[Command]) -> Any:
+        self.batches += 1
+        self.bytes_sent += len(json.dumps(commands, cls=CommandEncoder))
+        results = [self._new_ids(each) for each in commands if each.name == "add"]
+        if self.first_frame_at is None and results:
+            self.first_frame_at = time.perf_counter()
+        return PageCommandsBatchResponsePayload(results=results, error="")
+
+
+def probe() -> dict[str, float | int]:
+    """
+    Imports the app and runs `main.main` against a recording page
+
+    Returns:
+        dict[str, float | int]: The timings (in seconds, since the process started) and message stats
+    """
+    imported_started = time.perf_counter()
+    from flet_accountant import main as app
+
+    imported_at = time.perf_counter()
+
+    connection = RecordingConnection()
+    page = Page(connection, "benchmark", asyncio.new_event_loop())
+    # the first frame is the app's own `page.add`, not what the page sends on its own
+    connection.first_frame_at = None
+    app.main(page)
+    main_returned_at = time.perf_counter()
+
+    first_frame_at = connection.first_frame_at or main_returned_at
+    return {
+        "import_seconds": imported_at - imported_started,
+        "main_seconds": main_returned_at - imported_at,
+        "first_frame_seconds": first_frame_at - _PROCESS_STARTED,
+        "command_batches": connection.batches,
+        "bytes_sent": connection.bytes_sent,
+    }
+
+
+if __name__ == "__main__":
+    result = probe()
+    with open(sys.argv[1], "w", encoding="utf-8") as file:
+        json.dump(result, file)
+    # the write queue and the executors of the app are daemon threads, don't wait on them
+    sys.stdout.flush()
+    sys.exit(0)
@@ -0,0 +1,148 @@
+"""
+A deterministic generator of realistic-looking ledgers, for the benchmarks.
+
+The same `seed` and `count` always give the same entries. Most entries are small
+daily debits (groceries, milk, snacks, ...), a few are monthly credits and savings,
+amounts follow a log-normal spread per tag, and the dates move forward a few hours
+at a time, so the ledger is in chronological order like a real one.
+"""
+
+import datetime
+import math
+import random
+from decimal import Decimal
+from pathlib import Path
+from typing import Iterator
+
+from accountant.database.db import CSVDataBase
+from accountant.database.entry import Entry, FlowType
+
+# (flow type, share of the entries)
+FLOW_TYPE_WEIGHTS: tuple[tuple[FlowType, float], ...] = (
+    (FlowType.DEBIT, 0.82),
+    (FlowType.CREDIT, 0.11),
+    (FlowType.SAVINGS, 0.07),
+)
+
+# per flow type: (tag, share of the flow type's entries, median amount in rupees)
+TAG_WEIGHTS: dict[FlowType, tuple[tuple[str | None, float, float], ...]] = {
+    FlowType.DEBIT: (
+        ("grocery", 0.28, 650.0),
+        ("milk", 0.16, 60.0),
+        ("snacks", 0.15, 120.0),
+        ("bill", 0.12, 1_400.0),
+        ("fuel", 0.10, 900.0),
+        ("rent", 0.02, 15_000.0),
+        ("medical", 0.05, 450.0),
+        (None, 0.12, 300.0),
+    ),
+    FlowType.CREDIT: (
+        ("salary", 0.55, 55_000.0),
+        ("refund", 0.20, 700.0),
+        ("interest", 0.15, 350.0),
+        (None, 0.10, 2_000.0),
+    ),
+    FlowType.SAVINGS: (
+        ("sip", 0.45, 5_000.0),
+        ("fd", 0.25, 25_000.0),
+        ("rd", 0.30, 2_000.0),
+    ),
+}
+
+NAMES: tuple[str, ...] = (
+    "Harish",
+    "Priya",
+    "Karthik",
+    "Anitha",
+    "Suresh",
+    "Lakshmi",
+)
+
+REASONS: dict[str | None, tuple[str, ...]] = {
+    "grocery": ("Weekly vegetables", "Rice and dal", "Big Basket order", "Fruits"),
+    "milk": ("Milk packet", "Curd", "Aavin milk card"),
+    "snacks": ("Tea and biscuits", "Evening snacks", "Bakery"),
+    "bill": ("Electricity bill", "Mobile recharge", "Broadband", "Water bill"),
+    "fuel": ("Petrol", "Bike service"),
+    "rent": ("House rent",),
+    "medical": ("Pharmacy", "Doctor visit"),
+    "salary": ("Monthly salary",),
+    "refund": ("Order refund", "Cashback"),
+    "interest": ("Savings interest",),
+    "sip": ("Index fund SIP",),
+    "fd": ("Fixed deposit",),
+    "rd": ("Recurring deposit",),
+    None: ("Misc", "Auto fare", "Gift", "Stationery"),
+}
+
+START = datetime.datetime(2015, 1, 1, 9, 0, 0)
+
+# Spread of the amounts around each tag's median
+_AMOUNT_SIGMA = 0.6
+
+
+def generate_entries(count: int, seed: int = 0) -> Iterator[Entry]:
+    """
+    Lazily yields `count` synthetic entries, always the same ones for the same `seed`
+
+    Args:
+        count (int): Number of entries
+        seed (int, optional): Seed of the generator. Defaults to `0`.
+
+    Yields:
+        Entry: Each entry, in chronological order
+    """
+    rng = random.Random(seed)
+    flow_types = [each for each, _ in FLOW_TYPE_WEIGHTS]
+    flow_type_weights = [weight for _, weight in FLOW_TYPE_WEIGHTS]
+    date_time = START
+
+    for _ in range(count):
+        flow_type = rng.choices(flow_types, flow_type_weights)[0]
+        tags = TAG_WEIGHTS[flow_type]
+        tag, _, median = rng.choices(tags, [weight for _, weight, _ in tags])[0]
+        amount = median * math.exp(rng.gauss(0.0, _AMOUNT_SIGMA))
+        # a few entries a day, at daytime hours
+        date_time += datetime.timedelta(minutes=rng.randint(20, 600))
+
+        entry = Entry(
+            name=rng.choice(NAMES),
+            amount=Decimal(f"{amount:.2f}"),
+            reason=rng.choice(REASONS[tag]),
+        )
+        entry.tag = tag
+        entry.flow_type = flow_type
+        entry.date_time = str(date_time)
+        yield entry
+
+
+def write_synthetic_ledger(
+    file_path: Path, count: int, seed: int = 0, batch_size: int = 10_000
+) -> Path:
+    """
+    Writes a synthetic ledger CSV, the way `CSVDataBase` writes it, in batches
+
+    Args:
+        file_path (Path): Path of the ledger, it's replaced if it exists
+        count (int): Number of entries
+        seed (int, optional): Seed of the generator. Defaults to `0`.
+        batch_size (int, optional): Number of entries written at a time. Defaults to `10_000`.
+
+    Returns:
+        Path: Path of the ledger
+    """
+    file_path = Path(file_path)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    file_path.unlink(missing_ok=True)
+    file_path.touch()
+
+    db = CSVDataBase(file_path)
+    batch: list[Entry] = []
+    for entry in generate_entries(count, seed):
+        batch.append(entry)
+        if len(batch) >= batch_size:
+            db.write(batch)
+            batch = []
+    if batch:
+        db.write(batch)
+    return file_path
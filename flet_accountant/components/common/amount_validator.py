@@ -0,0 +1,126 @@
+"""
+Parsing and debounced validation of the amounts typed into the entry form.
+
+Amounts may carry a rupee sign, Indian (`1,23,456.78`) or international
+(`123,456.78`) digit grouping, and up to two decimal places (paise). Validation
+waits for the user to stop typing, and reports a result only when the validity
+actually changed, so the field is pushed to the client as rarely as possible.
+"""
+
+import asyncio
+import re
+from dataclasses import dataclass
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+
+_CURRENCY_PREFIX = re.compile(r"^(?:₹|rs\.?|inr)\s*", re.IGNORECASE)
+_AMOUNT = re.compile(
+    r"""^(
+        \d+                                # 1234567
+        | \d{1,2}(?:,\d{2})*,\d{3}         # 12,34,567 (Indian grouping)
+        | \d{1,3}(?:,\d{3})+               # 1,234,567 (international grouping)
+    )(\.\d{1,2})?$                         # paise
+    """,
+    re.VERBOSE,
+)
+
+INVALID_AMOUNT_TEXT = "Not a Valid Amount, Please Enter a Number like 1,250.50"
+
+
+@lru_cache(maxsize=256)
+def parse_amount_text(text: str) -> Decimal | None:
+    """
+    Parses an amount typed by the user
+
+    Args:
+        text (str): The typed text, for example `"₹ 1,23,456.50"`
+
+    Returns:
+        Decimal | None: The amount, or `None` if the text isn't a valid amount
+    """
+    text = _CURRENCY_PREFIX.sub("", text.strip())
+    if not _AMOUNT.match(text):
+        return None
+    try:
+        return Decimal(text.replace(",", ""))
+    except InvalidOperation:
+        return None
+
+
+@dataclass(frozen=True)
+class AmountCheck:
+    """
+    The outcome of validating the amount field
+
+    Attributes:
+        valid (bool): Whether the field holds a valid amount (a blank field counts as valid)
+        error_text (str | None): What to show under the field, `None` when it's valid
+    """
+
+    valid: bool
+    error_text: str | None = None
+
+
+def check_amount_text(text: str) -> AmountCheck:
+    """
+    Validates the text of the amount field
+
+    Args:
+        text (str): The typed text
+
+    Returns:
+        AmountCheck: The outcome, blank text counts as valid (nothing typed yet)
+    """
+    if not text.strip() or parse_amount_text(text) is not None:
+        return AmountCheck(valid=True)
+    return AmountCheck(valid=False, error_text=INVALID_AMOUNT_TEXT)
+
+
+class DebouncedAmountValidator:
+    """
+    Validates the amount field once the user stops typing for `delay` seconds
+
+    Args:
+        delay (float, optional): Seconds of quiet before a check runs. Defaults to `DEFAULT_DELAY`.
+    """
+
+    DEFAULT_DELAY = 0.3
+
+    def __init__(self, delay: float = DEFAULT_DELAY):
+        self.delay = delay
+        self._generation: int = 0
+        self._last_check = AmountCheck(valid=True)
+
+    @property
+    def last_check(self) -> AmountCheck:
+        return self._last_check
+
+    async def check(self, text: str) -> AmountCheck | None:
+        """
+        Validates the text after the debounce delay
+
+        Args:
+            text (str): The typed text
+
+        Returns:
+            AmountCheck | None: The new outcome, or `None` when a newer keystroke superseded
+            this one, or the outcome is the same as last time (nothing to update)
+        """
+        self._generation += 1
+        generation = self._generation
+        await asyncio.sleep(self.delay)
+        if generation != self._generation:
+            return None
+
+        result = check_amount_text(text)
+        if result == self._last_check:
+            return None
+        self._last_check = result
+        return result
+
+    def reset(self) -> None:
+        """
+        Forgets the last outcome, for example after the form was cleared
+        """
+        self._generation += 1
+        self._last_check = AmountCheck(valid=True)
@@ -0,0 +1,48 @@
+"""
+Throttling of the progress updates a long running job (an import, an export, ...) sends
+the client, so a fast job doesn't flood it with a message per chunk.
+"""
+
+
+class ProgressThrottle:
+    """
+    Lets the progress updates of a job through at most every `interval` seconds, and its
+    last update always
+
+    Args:
+        interval (float): Seconds between two updates
+    """
+
+    def __init__(self, interval: float):
+        """
+        Lets the progress updates of a job through at most every `interval` seconds, and its
+        last update always
+
+        Args:
+            interval (float): Seconds between two updates
+        """
+        self.interval = interval
+        # elapsed time of the job at the last update let through
+        self._last_at: float = 0.0
+
+    def reset(self) -> None:
+        """
+        Starts over for the next job, whose elapsed time starts from `0` again
+        """
+        self._last_at = 0.0
+
+    def due(self, elapsed: float, finished: bool = False) -> bool:
+        """
+        Checks whether an update should be sent, and if so, counts it as sent
+
+        Args:
+            elapsed (float): Seconds since the job started
+            finished (bool, optional): Whether the job is done. Defaults to `False`.
+
+        Returns:
+            bool: Returns `True` if the update should be sent, otherwise `False`.
+        """
+        if not finished and elapsed - self._last_at < self.interval:
+            return False
+        self._last_at = elapsed
+        return True
@@ -0,0 +1,113 @@
+"""
+Batches the updates of a component's controls into one message to the client.
+
+Instead of `self.update()`, which re-sends the whole component, handlers mark just the
+controls they changed. The marked controls are sent together, in one
+`page.update(*controls)`, once the handler is done; a control marked several times
+is sent once. Flet runs sync handlers on worker threads, so every thread batches its
+own marks.
+"""
+
+import functools
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+import flet as ft
+
+
+class UpdateBatcher:
+    """
+    Collects the changed (dirty) controls of a component, and updates them in one go
+
+    Args:
+        owner (ft.Control): The component the controls belong to, its page is the one updated
+    """
+
+    def __init__(self, owner: ft.Control):
+        """
+        Collects the changed (dirty) controls of a component, and updates them in one go
+
+        Args:
+            owner (ft.Control): The component the controls belong to, its page is the one updated
+        """
+        self.owner = owner
+        self._local = threading.local()
+
+    def _state(self) -> tuple[dict[int, ft.Control], list[int]]:
+        """
+        Returns the dirty controls and batch depth of the current thread. The controls are
+        keyed by id, so every control is sent once, in the order it was first marked.
+        """
+        local = self._local
+        if not hasattr(local, "dirty"):
+            local.dirty = {}
+            local.depth = [0]
+        return local.dirty, local.depth
+
+    def mark(self, *controls: ft.Control) -> None:
+        """
+        Marks controls as changed, they are updated on the next flush (right away, outside of a batch)
+
+        Args:
+            *controls (ft.Control): The changed controls
+        """
+        dirty, depth = self._state()
+        for control in controls:
+            dirty.setdefault(id(control), control)
+        if depth[0] == 0:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Sends the changed controls to the client, in a single `page.update`
+        """
+        dirty, _ = self._state()
+        if not dirty:
+            return
+        controls = list(dirty.values())
+        dirty.clear()
+        page = self.owner.page
+        if page is None:
+            # not mounted yet, the controls are sent along with the owner
+            return
+        page.update(*controls)
+
+    @contextmanager
+    def batch(self) -> Iterator["UpdateBatcher"]:
+        """
+        Holds back the updates of the marked controls until the (outermost) batch ends
+
+        Yields:
+            UpdateBatcher: The batcher itself
+        """
+        _, depth = self._state()
+        depth[0] += 1
+        try:
+            yield self
+        finally:
+            depth[0] -= 1
+            if depth[0] == 0:
+                self.flush()
+
+
+def batched_updates(handler: Callable) -> Callable:
+    """
+    Decorates a sync event handler of a component (that has an `updates` batcher), so every
+    control it marks is sent in one `page.update`, once it returns. Async handlers use
+    `with self.updates.batch():` around their sync parts instead, so a batch is never held
+    open across an `await`.
+
+    Args:
+        handler (Callable): The event handler method
+
+    Returns:
+        Callable: The decorated handler
+    """
+
+    @functools.wraps(handler)
+    def wrapper(self, *args, **kwargs):
+        with self.updates.batch():
+            return handler(self, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,88 @@
+"""
+Shape-preserving downsampling of `(x, y)` series, so a chart is never sent more points
+than it has pixels to draw them on.
+
+    - `lttb`: Largest-Triangle-Three-Buckets, keeps the points that matter most to the
+      shape of the line (peaks, dips and turns), the default for line charts
+    - `min_max_buckets`: keeps the lowest and highest point of every bucket, so no extreme
+      is ever lost, at twice the points
+"""
+
+Point = tuple[float, float]
+
+
+def lttb(points: list[Point], threshold: int) -> list[Point]:
+    """
+    Downsamples a series to `threshold` points with Largest-Triangle-Three-Buckets.
+    The first and last points are always kept.
+
+    Args:
+        points (list[Point]): The series, sorted by `x`
+        threshold (int): Number of points to keep
+
+    Returns:
+        list[Point]: The kept points, in order; the series itself if it's short enough
+    """
+    length = len(points)
+    if threshold >= length or threshold < 3:
+        return list(points)
+
+    sampled: list[Point] = [points[0]]
+    # the points between the first and the last are split into `threshold - 2` buckets
+    bucket_size = (length - 2) / (threshold - 2)
+    previous = points[0]
+
+    for bucket in range(threshold - 2):
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+
+        # the average point of the next bucket (or the last point), the third corner of the triangles
+        next_start, next_end = end, min(int((bucket + 2) * bucket_size) + 1, length)
+        if next_start >= next_end:
+            next_start, next_end = length - 1, length
+        next_count = next_end - next_start
+        average_x = sum(each[0] for each in points[next_start:next_end]) / next_count
+        average_y = sum(each[1] for each in points[next_start:next_end]) / next_count
+
+        # keep the point of this bucket making the largest triangle
+        previous_x, previous_y = previous
+        largest_area, chosen = -1.0, points[start]
+        for point in points[start:end]:
+            area = abs(
+                (previous_x - average_x) * (point[1] - previous_y)
+                - (previous_x - point[0]) * (average_y - previous_y)
+            )
+            if area > largest_area:
+                largest_area, chosen = area, point
+        sampled.append(chosen)
+        previous = chosen
+
+    sampled.append(points[-1])
+    return sampled
+
+
+def min_max_buckets(points: list[Point], buckets: int) -> list[Point]:
+    """
+    Downsamples a series to the lowest and highest point of each of `buckets` buckets
+
+    Args:
+        points (list[Point]): The series, sorted by `x`
+        buckets (int): Number of buckets, at most twice as many points are kept
+
+    Returns:
+        list[Point]: The kept points, in order; the series itself if it's short enough
+    """
+    length = len(points)
+    if buckets <= 0 or 2 * buckets >= length:
+        return list(points)
+
+    sampled: list[Point] = []
+    bucket_size = length / buckets
+    for bucket in range(buckets):
+        window = points[int(bucket * bucket_size) : int((bucket + 1) * bucket_size)]
+        if not window:
+            continue
+        lowest = min(window, key=lambda each: each[1])
+        highest = max(window, key=lambda each: each[1])
+        sampled.extend(sorted({lowest, highest}))
+    return sampled
@@ -9,10 +9,24 @@ using the following attributes:
     - `datatable`
     - `datarows`
     - `datacolumns`
+
+Rows can also be served lazily through a `RowProvider`, in which case only the rows
+of the current page are ever built. Page changes made from the UI await the provider,
+so a slow data source never blocks the event loop.
 """
 
 import flet as ft
 
+from flet_accountant.components.common.update_batcher import (
+    UpdateBatcher,
+    batched_updates,
+)
+from flet_accountant.components.data_visualizer.row_provider import (
+    ListRowProvider,
+    RowProvider,
+)
+from flet_accountant.instrumentation import timed
+
 
 class PaginatedDataTable(ft.UserControl):
     # a default number of rows per page to be used in the data table
@@ -23,6 +37,7 @@ class PaginatedDataTable(ft.UserControl):
         datatable: ft.DataTable,
         table_title: str = "Default Title",
         rows_per_page: int = DEFAULT_ROW_PER_PAGE,
+        row_provider: RowProvider | None = None,
     ):
         """
         A customized user control which returns a paginated data table. It offers the possibility to organize data
@@ -31,20 +46,29 @@ class PaginatedDataTable(ft.UserControl):
         :parameter datatable: a DataTable object to be used
         :parameter table_title: the title of the table
         :parameter rows_per_page: the number of rows to be shown per page
+        :parameter row_provider: serves the rows page by page, defaults to the rows of `datatable`
         """
         super().__init__()
 
+        # only the controls that changed are sent on a page change, not the whole card
+        self.updates = UpdateBatcher(self)
+
         self.dt = datatable
         self.title = table_title
         self.rows_per_page = rows_per_page
+        self.row_provider = (
+            row_provider
+            if row_provider is not None
+            else ListRowProvider(datatable.rows)
+        )
 
-        # number of rows in the table
-        self.num_rows = len(datatable.rows)
+        # number of rows in the table, counted by `refresh_data_async()` once mounted, as
+        # counting may read the ledger and the control is built on the event loop
+        self.num_rows = 0
         self.current_page = 1
 
         # Calculating the number of pages.
-        p_int, p_add = divmod(self.num_rows, self.rows_per_page)
-        self.num_pages = p_int + (1 if p_add else 0)
+        self.num_pages = self.count_pages()
 
         # will display the current page number
         self.v_current_page = ft.Text(
@@ -59,7 +83,7 @@ class PaginatedDataTable(ft.UserControl):
             dense=True,
             filled=False,
             width=40,
-            on_submit=lambda e: self.set_page(page=e.control.value),
+            on_submit=self._on_page_field_submit,
             visible=False,
             keyboard_type=ft.KeyboardType.NUMBER,
             content_padding=2,
@@ -80,7 +104,7 @@ class PaginatedDataTable(ft.UserControl):
             dense=True,
             filled=False,
             width=40,
-            on_submit=lambda e: self.set_rows_per_page(e.control.value),
+            on_submit=self._on_rows_per_page_field_submit,
             keyboard_type=ft.KeyboardType.NUMBER,
             content_padding=2,
             text_align=ft.TextAlign.CENTER,
@@ -89,7 +113,8 @@ class PaginatedDataTable(ft.UserControl):
         # will display the number of rows in the table
         self.v_count = ft.Text(weight=ft.FontWeight.BOLD)
 
-        self.pdt = ft.DataTable(columns=self.dt.columns, rows=self.build_rows())
+        # the rows of the current page are fetched by `refresh_data()`, once mounted
+        self.pdt = ft.DataTable(columns=self.dt.columns, rows=[])
 
     @property
     def datatable(self) -> ft.DataTable:
@@ -103,7 +128,7 @@ class PaginatedDataTable(ft.UserControl):
     def datarows(self) -> list[ft.DataRow]:
         return self.dt.rows
 
-    def set_rows_per_page(self, new_row_per_page: str):
+    def _select_rows_per_page(self, new_row_per_page: str):
         """
         Takes a string as an argument, tries converting it to an integer, and sets the number of rows per page to that
         integer if it is between 1 and the total number of rows, otherwise it sets the number of rows per page to the
@@ -125,20 +150,30 @@ class PaginatedDataTable(ft.UserControl):
         self.v_num_of_row_changer_field.value = str(self.rows_per_page)
 
         # Calculating the number of pages.
-        p_int, p_add = divmod(self.num_rows, self.rows_per_page)
-        self.num_pages = p_int + (1 if p_add else 0)
+        self.num_pages = self.count_pages()
 
+    def set_rows_per_page(self, new_row_per_page: str):
+        """
+        Sets the number of rows per page (see `_select_rows_per_page`), and goes back to the first page
+        """
+        self._select_rows_per_page(new_row_per_page)
         self.set_page(page=1)
-        # self.refresh_data()
 
-    def set_page(self, page: [str, int, None] = None, delta: int = 0):
+    async def set_rows_per_page_async(self, new_row_per_page: str):
+        """
+        Like `set_rows_per_page`, but awaits the row provider instead of blocking on it
+        """
+        self._select_rows_per_page(new_row_per_page)
+        await self.set_page_async(page=1)
+
+    def _select_page(self, page: [str, int, None] = None, delta: int = 0) -> bool:
         """
         Sets the current page using the page parameter if provided. Else if the delta is not 0,
         sets the current page to the current page plus the provided delta.
 
         :param page: the page number to display
         :param delta: The number of pages to move forward or backward, defaults to 0 (optional)
-        :return: The current page number.
+        :return: Whether the current page was set, and the table needs a refresh.
         :raise ValueError
         """
         if page is not None:
@@ -149,33 +184,73 @@ class PaginatedDataTable(ft.UserControl):
         elif delta:
             self.current_page += delta
         else:
-            return
-        self.refresh_data()
+            return False
+        return True
+
+    @timed("handler.PaginatedDataTable.set_page")
+    def set_page(self, page: [str, int, None] = None, delta: int = 0):
+        """
+        Sets the current page (see `_select_page`), and refreshes the table
+        """
+        if self._select_page(page, delta):
+            self.refresh_data()
 
-    def next_page(self, e: ft.ControlEvent):
+    @timed("handler.PaginatedDataTable.set_page")
+    async def set_page_async(self, page: [str, int, None] = None, delta: int = 0):
+        """
+        Like `set_page`, but awaits the row provider instead of blocking on it
+        """
+        if self._select_page(page, delta):
+            await self.refresh_data_async()
+
+    async def _on_page_field_submit(self, e: ft.ControlEvent):
+        await self.set_page_async(page=e.control.value)
+
+    async def _on_rows_per_page_field_submit(self, e: ft.ControlEvent):
+        await self.set_rows_per_page_async(e.control.value)
+
+    async def next_page(self, e: ft.ControlEvent):
         """sets the current page to the next page"""
         if self.current_page < self.num_pages:
-            self.set_page(delta=1)
+            await self.set_page_async(delta=1)
 
-    def prev_page(self, e: ft.ControlEvent):
+    async def prev_page(self, e: ft.ControlEvent):
         """set the current page to the previous page"""
         if self.current_page > 1:
-            self.set_page(delta=-1)
+            await self.set_page_async(delta=-1)
 
-    def goto_first_page(self, e: ft.ControlEvent):
+    async def goto_first_page(self, e: ft.ControlEvent):
         """sets the current page to the first page"""
-        self.set_page(page=1)
+        await self.set_page_async(page=1)
 
-    def goto_last_page(self, e: ft.ControlEvent):
+    async def goto_last_page(self, e: ft.ControlEvent):
         """sets the current page to the last page"""
-        self.set_page(page=self.num_pages)
+        await self.set_page_async(page=self.num_pages)
+
+    def count_pages(self) -> int:
+        """
+        Returns the number of pages needed to show `num_rows` rows, `rows_per_page` at a time
+        :return: The number of pages.
+        """
+        p_int, p_add = divmod(self.num_rows, self.rows_per_page)
+        return p_int + (1 if p_add else 0)
 
     def build_rows(self) -> list:
         """
-        Returns a slice of indexes, using the start and end values returned by the paginate() function
+        Fetches the rows of the current page from the row provider, using the start and end values
+        returned by the paginate() function
+        :return: The rows of data that are being displayed on the page.
+        """
+        start, end = self.paginate()
+        return self.row_provider.fetch(start, end - start)
+
+    async def build_rows_async(self) -> list:
+        """
+        Like `build_rows`, but awaits the row provider instead of blocking on it
         :return: The rows of data that are being displayed on the page.
         """
-        return self.dt.rows[slice(*self.paginate())]
+        start, end = self.paginate()
+        return await self.row_provider.fetch_async(start, end - start)
 
     def paginate(self) -> tuple[int, int]:
         """
@@ -241,6 +316,7 @@ class PaginatedDataTable(ft.UserControl):
             elevation=5,
         )
 
+    @batched_updates
     def on_double_tap_page_changer(self, e):
         """
         Called when the content of the GestureDetector (gd) is double tapped.
@@ -251,22 +327,43 @@ class PaginatedDataTable(ft.UserControl):
         self.current_page_changer_field.visible = (
             not self.current_page_changer_field.visible
         )
-        self.update()
+        self.updates.mark(self.v_current_page, self.current_page_changer_field)
+
+    def _set_num_rows(self, num_rows: int):
+        # The provider may have grown (or shrunk) since the last refresh
+        self.num_rows = num_rows
+        self.num_pages = self.count_pages()
+        self.current_page = max(1, min(self.current_page, self.num_pages))
 
     def refresh_data(self):
+        self._set_num_rows(self.row_provider.count())
         # Setting the rows of the paginated datatable to the rows returned by the `build_rows()` function.
-        self.pdt.rows = self.build_rows()
-        # display the total number of rows in the table.
-        self.v_count.value = f"Total Rows: {self.num_rows}"
-        # the current page number versus the total number of pages.
-        self.v_current_page.value = f"{self.current_page}/{self.num_pages}"
-
-        # update the visibility of controls in the gesture detector
-        self.current_page_changer_field.visible = False
-        self.v_current_page.visible = True
-
-        # update the control so the above changes are rendered in the UI
-        self.update()
+        self._show_rows(self.build_rows())
+
+    async def refresh_data_async(self):
+        self._set_num_rows(await self.row_provider.count_async())
+        self._show_rows(await self.build_rows_async())
+
+    def _show_rows(self, rows: list):
+        with self.updates.batch():
+            self.pdt.rows = rows
+            # display the total number of rows in the table.
+            self.v_count.value = f"Total Rows: {self.num_rows}"
+            # the current page number versus the total number of pages.
+            self.v_current_page.value = f"{self.current_page}/{self.num_pages}"
+
+            # update the visibility of controls in the gesture detector
+            self.current_page_changer_field.visible = False
+            self.v_current_page.visible = True
+
+            # only the changed controls are sent, in one message, so the above changes are rendered in the UI
+            self.updates.mark(
+                self.pdt,
+                self.v_count,
+                self.v_current_page,
+                self.current_page_changer_field,
+                self.v_num_of_row_changer_field,
+            )
 
     def did_mount(self):
-        self.refresh_data()
+        self.page.run_task(self.refresh_data_async)
@@ -0,0 +1,75 @@
+"""
+Row providers feed `PaginatedDataTable` one page at a time.
+
+A provider only has to know how many rows there are, and how to build the
+`ft.DataRow`s for a window of them, so the table never holds more controls than
+the page it is showing. The `*_async` variants are what the table awaits from its
+event handlers; by default they run the blocking calls on a worker thread.
+"""
+
+import asyncio
+from abc import ABC, abstractmethod
+
+import flet as ft
+
+
+class RowProvider(ABC):
+    """
+    The interface `PaginatedDataTable` pulls its rows through
+    """
+
+    @abstractmethod
+    def count(self) -> int:
+        """
+        Returns the total number of rows the provider can serve
+        """
+
+    @abstractmethod
+    def fetch(self, offset: int, limit: int) -> list[ft.DataRow]:
+        """
+        Builds the rows of a window
+
+        Args:
+            offset (int): Index of the first row of the window
+            limit (int): Maximum number of rows in the window
+
+        Returns:
+            list[ft.DataRow]: The rows, at most `limit` of them
+        """
+
+    async def count_async(self) -> int:
+        """
+        Awaitable `count()`, that doesn't block the event loop
+        """
+        return await asyncio.to_thread(self.count)
+
+    async def fetch_async(self, offset: int, limit: int) -> list[ft.DataRow]:
+        """
+        Awaitable `fetch()`, that doesn't block the event loop
+        """
+        return await asyncio.to_thread(self.fetch, offset, limit)
+
+
+class ListRowProvider(RowProvider):
+    """
+    Serves rows out of an already built list, for tables small enough to keep in memory
+
+    Args:
+        rows (list[ft.DataRow]): The rows to serve
+    """
+
+    def __init__(self, rows: list[ft.DataRow]):
+        self.rows = rows
+
+    def count(self) -> int:
+        return len(self.rows)
+
+    def fetch(self, offset: int, limit: int) -> list[ft.DataRow]:
+        return self.rows[offset : offset + limit]
+
+    # the rows are already in memory, no point in a thread hop
+    async def count_async(self) -> int:
+        return self.count()
+
+    async def fetch_async(self, offset: int, limit: int) -> list[ft.DataRow]:
+        return self.fetch(offset, limit)
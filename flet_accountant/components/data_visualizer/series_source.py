@@ -0,0 +1,150 @@
+"""
+Series sources feed `TimeSeriesChart`, one visible range at a time.
+
+A source serves already aggregated `(x, y)` points (a total per day, per month ...),
+never the raw entries, where `x` is a date as the number of days since 1970-01-01.
+Like the row providers of `PaginatedDataTable`, the `*_async` variant is what the
+chart awaits, by default it runs the blocking call on a worker thread.
+"""
+
+import asyncio
+import bisect
+import datetime
+import threading
+from abc import ABC, abstractmethod
+from decimal import Decimal
+from typing import Callable, Literal
+
+from accountant.database.entry import FlowType
+
+from flet_accountant.components.data_visualizer.downsample import Point
+
+EPOCH = datetime.date(1970, 1, 1)
+
+# The series a `CashflowSeriesSource` can serve
+CashflowSeries = Literal["balance", "credit", "debit", "savings"]
+
+# `{period: {flow type: total}}`, keyed by a date or a `(year, month)`
+Cashflow = dict[datetime.date | tuple[int, int], dict[FlowType, Decimal]]
+
+
+def date_to_x(date: datetime.date) -> float:
+    """
+    Returns the `x` of a date: the number of days since 1970-01-01
+    """
+    return float((date - EPOCH).days)
+
+
+def x_to_date(x: float) -> datetime.date:
+    """
+    Returns the date of an `x`, see `date_to_x`
+    """
+    return EPOCH + datetime.timedelta(days=round(x))
+
+
+class SeriesSource(ABC):
+    """
+    The interface `TimeSeriesChart` pulls its points through
+    """
+
+    @abstractmethod
+    def fetch(self, start: float | None = None, end: float | None = None) -> list[Point]:
+        """
+        Returns the points of a range
+
+        Args:
+            start (float | None, optional): The smallest `x` to include. Defaults to `None` (from the first point).
+            end (float | None, optional): The largest `x` to include. Defaults to `None` (to the last point).
+
+        Returns:
+            list[Point]: The points, sorted by `x`
+        """
+
+    async def fetch_async(
+        self, start: float | None = None, end: float | None = None
+    ) -> list[Point]:
+        """
+        Awaitable `fetch()`, that doesn't block the event loop
+        """
+        return await asyncio.to_thread(self.fetch, start, end)
+
+
+class ListSeriesSource(SeriesSource):
+    """
+    Serves points out of an already built list
+
+    Args:
+        points (list[Point]): The points, sorted by `x`
+    """
+
+    def __init__(self, points: list[Point]):
+        self.points = points
+        self._xs = [each[0] for each in points]
+
+    def fetch(self, start: float | None = None, end: float | None = None) -> list[Point]:
+        low = 0 if start is None else bisect.bisect_left(self._xs, start)
+        high = len(self._xs) if end is None else bisect.bisect_right(self._xs, end)
+        return self.points[low:high]
+
+    # the points are already in memory, no point in a thread hop
+    async def fetch_async(
+        self, start: float | None = None, end: float | None = None
+    ) -> list[Point]:
+        return self.fetch(start, end)
+
+
+class CashflowSeriesSource(SeriesSource):
+    """
+    Serves a series out of a pre-aggregated cashflow: the running balance, or the total
+    of one flow type, per period. The cashflow comes from `LedgerAnalytics.cashflow`
+    (per day, week or month), or `LedgerDataBase.monthly_summary` (per month). The series
+    is only rebuilt when the cashflow returned is a new one, as `LedgerAnalytics` returns
+    the same (cached) cashflow until the next write.
+
+    Args:
+        cashflow (Callable[[], Cashflow]): Returns the totals of every flow type, per period
+        series (CashflowSeries, optional): The series served. Defaults to `"balance"`.
+    """
+
+    def __init__(
+        self, cashflow: Callable[[], Cashflow], series: CashflowSeries = "balance"
+    ):
+        """
+        Serves a series out of a pre-aggregated cashflow: the running balance, or the total
+        of one flow type, per period
+
+        Args:
+            cashflow (Callable[[], Cashflow]): Returns the totals of every flow type, per period
+            series (CashflowSeries, optional): The series served. Defaults to `"balance"`.
+        """
+        self._cashflow = cashflow
+        self.series = series
+        self._lock = threading.Lock()
+        self._built_from: Cashflow | None = None
+        self._points = ListSeriesSource([])
+
+    def _build(self, cashflow: Cashflow) -> list[Point]:
+        points: list[Point] = []
+        balance = Decimal(0)
+        for period, totals in sorted(cashflow.items()):
+            date = (
+                datetime.date(period[0], period[1], 1)
+                if isinstance(period, tuple)
+                else period
+            )
+            if self.series == "balance":
+                for flow_type, amount in totals.items():
+                    balance += amount if flow_type == FlowType.CREDIT else -amount
+                value = balance
+            else:
+                value = totals.get(FlowType(self.series), Decimal(0))
+            points.append((date_to_x(date), float(value)))
+        return points
+
+    def fetch(self, start: float | None = None, end: float | None = None) -> list[Point]:
+        cashflow = self._cashflow()
+        with self._lock:
+            if cashflow is not self._built_from:
+                self._points = ListSeriesSource(self._build(cashflow))
+                self._built_from = cashflow
+            return self._points.fetch(start, end)
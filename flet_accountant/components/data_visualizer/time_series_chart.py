@@ -0,0 +1,280 @@
+"""
+A line chart of a time series, for ledgers spanning years.
+
+The chart is never sent more points than it is pixels wide: the visible range is fetched
+from a `SeriesSource` (already aggregated data, never the raw entries) and downsampled
+with LTTB, which keeps the peaks and dips of the line. Zooming in, with the range slider
+under the chart, fetches the narrower range again, so its finer detail shows up.
+Given a `ChangeFeed`, the chart is fetched again whenever entries are written.
+"""
+
+from typing import Callable
+
+import flet as ft
+
+from flet_accountant.components.common.update_batcher import (
+    UpdateBatcher,
+    batched_updates,
+)
+from flet_accountant.components.data_visualizer.downsample import Point, lttb
+from flet_accountant.components.data_visualizer.series_source import (
+    SeriesSource,
+    x_to_date,
+)
+from flet_accountant.database.change_feed import Change, ChangeFeed
+from flet_accountant.instrumentation import timed
+
+
+class TimeSeriesChart(ft.Container):
+    """
+    A zoomable line chart of a time series, downsampled to its width
+
+    Args:
+        source (SeriesSource): Serves the (aggregated) points of the series
+        title (str, optional): Title shown above the chart. Defaults to `""`.
+        width (int, optional): Width of the chart in pixels, at most this many points are drawn. Defaults to `DEFAULT_WIDTH`.
+        height (int, optional): Height of the chart in pixels. Defaults to `DEFAULT_HEIGHT`.
+        color (str, optional): Color of the line. Defaults to `ft.colors.PRIMARY`.
+        change_feed (ChangeFeed | None, optional): Refresh the chart on every change of the ledger. Defaults to `None`.
+    """
+
+    DEFAULT_WIDTH = 800
+    DEFAULT_HEIGHT = 300
+    # Number of dates labelled under the chart
+    X_LABELS = 6
+
+    def __init__(
+        self,
+        source: SeriesSource,
+        title: str = "",
+        width: int = DEFAULT_WIDTH,
+        height: int = DEFAULT_HEIGHT,
+        color: str = ft.colors.PRIMARY,
+        change_feed: ChangeFeed | None = None,
+    ):
+        """
+        A zoomable line chart of a time series, downsampled to its width
+
+        Args:
+            source (SeriesSource): Serves the (aggregated) points of the series
+            title (str, optional): Title shown above the chart. Defaults to `""`.
+            width (int, optional): Width of the chart in pixels, at most this many points are drawn. Defaults to `DEFAULT_WIDTH`.
+            height (int, optional): Height of the chart in pixels. Defaults to `DEFAULT_HEIGHT`.
+            color (str, optional): Color of the line. Defaults to `ft.colors.PRIMARY`.
+            change_feed (ChangeFeed | None, optional): Refresh the chart on every change of the ledger. Defaults to `None`.
+        """
+        super().__init__()
+
+        self.source = source
+        self.max_points = width
+        self.updates = UpdateBatcher(self)
+        # full `x` range of the series, known after the first fetch
+        self._full_range: tuple[float, float] | None = None
+        # bumped on every fetch, so a slow fetch can't overwrite a newer one
+        self._generation: int = 0
+        self.change_feed = change_feed
+        self._unsubscribe: Callable[[], None] | None = None
+
+        #
+        # Widgets
+        #
+        self.line = ft.LineChartData(data_points=[], stroke_width=2, color=color)
+        self.chart = ft.LineChart(
+            data_series=[self.line],
+            left_axis=ft.ChartAxis(labels_size=64),
+            bottom_axis=ft.ChartAxis(labels_size=32),
+            horizontal_grid_lines=ft.ChartGridLines(
+                color=ft.colors.with_opacity(0.2, ft.colors.ON_SURFACE), width=1
+            ),
+            tooltip_bgcolor=ft.colors.with_opacity(0.8, ft.colors.SURFACE_VARIANT),
+            interactive=True,
+            width=width,
+            height=height,
+        )
+        self.range_slider = ft.RangeSlider(
+            min=0,
+            max=1,
+            start_value=0,
+            end_value=1,
+            width=width,
+            visible=False,
+            on_change_end=self._on_zoom,
+        )
+        self.reset_button = ft.IconButton(
+            icon=ft.icons.ZOOM_OUT_MAP,
+            tooltip="Show everything",
+            on_click=self._on_reset_zoom,
+        )
+        self.status_text = ft.Text("Loading ...", size=12)
+
+        self.content = ft.Card(
+            ft.Container(
+                ft.Column(
+                    controls=[
+                        ft.Row(
+                            controls=[
+                                ft.Text(title, style=ft.TextThemeStyle.TITLE_MEDIUM),
+                                self.reset_button,
+                            ],
+                            alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
+                        ),
+                        self.chart,
+                        self.range_slider,
+                        self.status_text,
+                    ],
+                ),
+                padding=10,
+            ),
+            elevation=5,
+        )
+
+    def did_mount(self):
+        self.page.run_task(self.refresh_async)
+        if self.change_feed is not None:
+            self._unsubscribe = self.change_feed.subscribe(self._on_change)
+
+    def will_unmount(self):
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = None
+
+    def _on_change(self, change: Change) -> None:
+        # called on the writer's thread, the chart is only touched on its session's loop
+        page = self.page
+        if page is not None:
+            page.run_task(self.refresh_async)
+
+    async def refresh_async(self) -> None:
+        """
+        Fetches the whole series again (after a write, ...), and shows all of it, unless
+        zoomed in on a range that's still inside it, which is fetched again instead
+        """
+        self._generation += 1
+        generation = self._generation
+        zoom = self._zoomed_range()
+        points = await self.source.fetch_async()
+        if generation != self._generation:
+            # zoomed (or refreshed) again while the series was being fetched
+            return
+        if not points:
+            self._full_range = None
+            self._show([], None, None)
+            return
+        start, end = points[0][0], points[-1][0]
+        upper = max(end, start + 1)
+        self._full_range = (start, end)
+        if zoom is not None and not (start <= zoom[0] and zoom[1] <= upper):
+            zoom = None
+        with self.updates.batch():
+            # the slider insists on `min <= max` at every step
+            self.range_slider.max = max(self.range_slider.max, upper)
+            self.range_slider.min = start
+            self.range_slider.max = upper
+            shown_start, shown_end = zoom or (start, upper)
+            self.range_slider.start_value = shown_start
+            self.range_slider.end_value = shown_end
+            self.range_slider.visible = end > start
+            self.updates.mark(self.range_slider)
+            if zoom is None:
+                self._show(points, start, end)
+        if zoom is not None:
+            await self.show_range_async(*zoom)
+
+    def _zoomed_range(self) -> tuple[float, float] | None:
+        """
+        Returns the range the slider is zoomed in on, `None` when it shows the whole series
+        """
+        if self._full_range is None:
+            return None
+        start, end = self._full_range
+        zoom = (float(self.range_slider.start_value), float(self.range_slider.end_value))
+        return None if zoom == (start, max(end, start + 1)) else zoom
+
+    @timed("handler.TimeSeriesChart.show_range")
+    async def show_range_async(self, start: float, end: float) -> None:
+        """
+        Fetches the points between `start` and `end` again, and shows them
+
+        Args:
+            start (float): The smallest `x` shown
+            end (float): The largest `x` shown
+        """
+        self._generation += 1
+        generation = self._generation
+        points = await self.source.fetch_async(start, end)
+        if generation != self._generation:
+            # zoomed again while this range was being fetched
+            return
+        self._show(points, start, end)
+
+    async def _on_zoom(self, e: ft.ControlEvent) -> None:
+        await self.show_range_async(
+            float(self.range_slider.start_value), float(self.range_slider.end_value)
+        )
+
+    async def _on_reset_zoom(self, e: ft.ControlEvent) -> None:
+        if self._full_range is None:
+            return
+        start, end = self._full_range
+        with self.updates.batch():
+            self.range_slider.start_value = start
+            self.range_slider.end_value = max(end, start + 1)
+            self.updates.mark(self.range_slider)
+        await self.show_range_async(start, end)
+
+    @batched_updates
+    def _show(self, points: list[Point], start: float | None, end: float | None) -> None:
+        """
+        Downsamples the points to the chart's width, and draws them
+
+        Args:
+            points (list[Point]): The points of the range, sorted by `x`
+            start (float | None): The smallest `x` of the range, `None` when there are no points
+            end (float | None): The largest `x` of the range, `None` when there are no points
+        """
+        sampled = lttb(points, self.max_points)
+        self.line.data_points = [
+            ft.LineChartDataPoint(
+                x, y, tooltip=f"{x_to_date(x):%d %b %Y}\n₹ {y:,.2f}"
+            )
+            for x, y in sampled
+        ]
+
+        if start is None or end is None or not sampled:
+            self.chart.min_x = self.chart.max_x = None
+            self.chart.min_y = self.chart.max_y = None
+            self.chart.bottom_axis.labels = []
+            self.status_text.value = "Nothing to show yet"
+        else:
+            low = min(y for _, y in sampled)
+            high = max(y for _, y in sampled)
+            margin = (high - low) * 0.05 or 1.0
+            self.chart.min_x, self.chart.max_x = start, max(end, start + 1)
+            self.chart.min_y, self.chart.max_y = low - margin, high + margin
+            self.chart.bottom_axis.labels = self._x_labels(start, end)
+            self.status_text.value = (
+                f"{x_to_date(start):%d %b %Y} to {x_to_date(end):%d %b %Y}, "
+                f"{len(sampled):,} of {len(points):,} points drawn"
+            )
+        self.updates.mark(self.chart, self.status_text)
+
+    def _x_labels(self, start: float, end: float) -> list[ft.ChartAxisLabel]:
+        """
+        Returns `X_LABELS` date labels, evenly spread over the range
+        """
+        if end <= start:
+            return [
+                ft.ChartAxisLabel(
+                    value=start, label=ft.Text(f"{x_to_date(start):%d %b %Y}", size=10)
+                )
+            ]
+        step = (end - start) / (self.X_LABELS - 1)
+        # a range of a few months is labelled with days, a longer one with months
+        label_format = "%d %b" if end - start <= 120 else "%b %Y"
+        return [
+            ft.ChartAxisLabel(
+                value=start + index * step,
+                label=ft.Text(f"{x_to_date(start + index * step):{label_format}}", size=10),
+            )
+            for index in range(self.X_LABELS)
+        ]
@@ -0,0 +1,162 @@
+from pathlib import Path
+
+import flet as ft
+
+from flet_accountant.components.common.update_batcher import (
+    UpdateBatcher,
+    batched_updates,
+)
+from flet_accountant.instrumentation import Metrics
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:,.2f}"
+
+
+class PerfPanel(ft.Container):
+    """
+    A debug panel showing the latency histograms and counters recorded by the instrumentation,
+    which can be reset, or dumped as JSON
+
+    Args:
+        metrics (Metrics): The registry shown
+        dump_folder (Path): The folder the dumps are written to
+    """
+
+    HISTOGRAM_COLUMNS = ("Name", "Calls", "Mean ms", "p50 ms", "p95 ms", "p99 ms", "Max ms")
+
+    def __init__(self, metrics: Metrics, dump_folder: Path):
+        """
+        A debug panel showing the latency histograms and counters recorded by the instrumentation,
+        which can be reset, or dumped as JSON
+
+        Args:
+            metrics (Metrics): The registry shown
+            dump_folder (Path): The folder the dumps are written to
+        """
+        super().__init__()
+
+        self._metrics = metrics
+        self._dump_folder = Path(dump_folder)
+        self.updates = UpdateBatcher(self)
+
+        #
+        # Widgets
+        #
+        self.histograms_table = ft.DataTable(
+            columns=[
+                ft.DataColumn(ft.Text(each), numeric=index > 0)
+                for index, each in enumerate(self.HISTOGRAM_COLUMNS)
+            ],
+        )
+        self.counters_table = ft.DataTable(
+            columns=[
+                ft.DataColumn(ft.Text("Counter")),
+                ft.DataColumn(ft.Text("Value"), numeric=True),
+            ],
+        )
+        self.status_text = ft.Text("")
+        self.enabled_switch = ft.Switch(
+            label="Record",
+            value=metrics.enabled,
+            on_change=self._on_toggle,
+        )
+
+        self.content = ft.Card(
+            ft.Container(
+                ft.Column(
+                    controls=[
+                        ft.Row(
+                            controls=[
+                                self.enabled_switch,
+                                ft.IconButton(
+                                    icon=ft.icons.REFRESH,
+                                    tooltip="Refresh",
+                                    on_click=self._on_refresh,
+                                ),
+                                ft.IconButton(
+                                    icon=ft.icons.DELETE_SWEEP,
+                                    tooltip="Reset",
+                                    on_click=self._on_reset,
+                                ),
+                                ft.IconButton(
+                                    icon=ft.icons.SAVE,
+                                    tooltip="Dump to the log folder",
+                                    on_click=self._on_dump,
+                                ),
+                            ],
+                        ),
+                        self.status_text,
+                        self.histograms_table,
+                        self.counters_table,
+                    ],
+                    spacing=10,
+                ),
+                padding=20,
+                expand=True,
+            ),
+            elevation=4,
+        )
+        self._fill_tables()
+
+    def did_mount(self):
+        # the numbers may have moved on since the panel was built
+        self._on_refresh(None)
+
+    def _fill_tables(self) -> None:
+        """
+        Fills the tables with the current numbers
+        """
+        snapshot = self._metrics.snapshot()
+        self.histograms_table.rows = [
+            ft.DataRow(
+                cells=[
+                    ft.DataCell(ft.Text(name)),
+                    ft.DataCell(ft.Text(f"{summary['count']:,}")),
+                    ft.DataCell(ft.Text(_ms(summary["mean_seconds"]))),
+                    ft.DataCell(ft.Text(_ms(summary["p50_seconds"]))),
+                    ft.DataCell(ft.Text(_ms(summary["p95_seconds"]))),
+                    ft.DataCell(ft.Text(_ms(summary["p99_seconds"]))),
+                    ft.DataCell(ft.Text(_ms(summary["max_seconds"]))),
+                ]
+            )
+            for name, summary in snapshot["histograms"].items()
+        ]
+        self.counters_table.rows = [
+            ft.DataRow(
+                cells=[ft.DataCell(ft.Text(name)), ft.DataCell(ft.Text(f"{value:,}"))]
+            )
+            for name, value in snapshot["counters"].items()
+        ]
+        if not self._metrics.enabled:
+            self.status_text.value = "Recording is off"
+        else:
+            self.status_text.value = f"Recording since {snapshot['since']}"
+
+    @batched_updates
+    def _on_refresh(self, e) -> None:
+        self._fill_tables()
+        self.updates.mark(self.histograms_table, self.counters_table, self.status_text)
+
+    @batched_updates
+    def _on_toggle(self, e) -> None:
+        if self.enabled_switch.value:
+            self._metrics.enable()
+        else:
+            self._metrics.disable()
+        self._on_refresh(e)
+
+    @batched_updates
+    def _on_reset(self, e) -> None:
+        self._metrics.reset()
+        self._on_refresh(e)
+
+    @batched_updates
+    def _on_dump(self, e) -> None:
+        try:
+            file_path = self._metrics.dump(self._dump_folder)
+        except OSError as error:
+            self.status_text.value = f"Couldn't dump the numbers: {error}"
+        else:
+            self.status_text.value = f"Dumped to {file_path}"
+        self.updates.mark(self.status_text)
@@ -0,0 +1,277 @@
+import asyncio
+import threading
+from pathlib import Path
+
+import flet as ft
+from accountant.database.entry import FlowType
+from accountant.logging import app_logger
+
+from flet_accountant.components.common.progress_throttle import ProgressThrottle
+from flet_accountant.components.common.text_field import TextField
+from flet_accountant.components.common.update_batcher import (
+    UpdateBatcher,
+    batched_updates,
+)
+from flet_accountant.database.async_db import AsyncLedgerDataBase
+from flet_accountant.database.exporter import (
+    EXPORT_FORMATS,
+    ExportProgress,
+    export_entries,
+    split_export_path,
+)
+from flet_accountant.database.filters import EntryFilter
+
+
+# Suffixes, that say which format (or compression) an export file is in
+NAMED_SUFFIXES = (".csv", ".jsonl", ".ndjson", ".gz")
+
+
+class ExportEntries(ft.Container):
+    """
+    This Control creates an Export form, that streams the (filtered) entries of the DB
+    to a CSV or JSON Lines file, optionally gzip-compressed
+
+    Args:
+        db_connection (AsyncLedgerDataBase): The async DB Connection Interface, whose ledger is exported
+    """
+
+    # Seconds between two progress updates sent to the client
+    PROGRESS_INTERVAL = 0.25
+
+    def __init__(self, db_connection: AsyncLedgerDataBase):
+        """
+        This Control creates an Export form, that streams the (filtered) entries of the DB
+        to a CSV or JSON Lines file, optionally gzip-compressed
+
+        Args:
+            db_connection (AsyncLedgerDataBase): The async DB Connection Interface, whose ledger is exported
+        """
+        super().__init__()
+
+        self._db_connection: AsyncLedgerDataBase = db_connection
+        self.updates = UpdateBatcher(self)
+        self._cancel = threading.Event()
+        self._progress_throttle = ProgressThrottle(self.PROGRESS_INTERVAL)
+
+        self._file_picker = ft.FilePicker(on_result=self._on_file_picked)
+
+        #
+        # Widgets
+        #
+        self.path_text = TextField(
+            label="Export to ...", expand=True, on_change=self._on_path_changed
+        )
+        self.browse_button = ft.IconButton(
+            icon=ft.icons.FOLDER_OPEN,
+            tooltip="Browse",
+            on_click=self._open_file_picker,
+        )
+        self.format_drop_down = ft.Dropdown(
+            label="Format",
+            value=EXPORT_FORMATS[0],
+            options=[ft.dropdown.Option(each) for each in EXPORT_FORMATS],
+            width=140,
+        )
+        self.gzip_checkbox = ft.Checkbox(label="Compress (gzip)", value=False)
+        self.start_text = TextField(label="From (YYYY-MM-DD)", expand=True)
+        self.end_text = TextField(label="To (YYYY-MM-DD)", expand=True)
+        self.flow_type_drop_down = ft.Dropdown(
+            label="Flow Type",
+            value="all",
+            options=[ft.dropdown.Option(key="all", text="All")]
+            + [ft.dropdown.Option(each) for each in FlowType],
+            expand=True,
+        )
+        self.tags_text = TextField(label="Tags (comma separated)", expand=True)
+
+        self.progress_bar = ft.ProgressBar(value=0, visible=False)
+        self.status_text = ft.Text("")
+        self.export_button = ft.ElevatedButton(
+            text="Export",
+            icon=ft.icons.DOWNLOAD,
+            on_click=self._start_export,
+        )
+        self.cancel_button = ft.TextButton(
+            text="Cancel",
+            on_click=self._cancel_export,
+            visible=False,
+        )
+
+        self.content = ft.Card(
+            ft.Container(
+                ft.Column(
+                    controls=[
+                        ft.Row(controls=[self.path_text, self.browse_button]),
+                        ft.Row(controls=[self.format_drop_down, self.gzip_checkbox]),
+                        ft.Row(controls=[self.start_text, self.end_text]),
+                        ft.Row(controls=[self.flow_type_drop_down, self.tags_text]),
+                        self.progress_bar,
+                        self.status_text,
+                        ft.Row(
+                            controls=[self.cancel_button, self.export_button],
+                            alignment=ft.MainAxisAlignment.END,
+                        ),
+                    ],
+                    horizontal_alignment=ft.CrossAxisAlignment.STRETCH,
+                    spacing=10,
+                ),
+                padding=20,
+                expand=True,
+            ),
+            elevation=4,
+        )
+
+    def did_mount(self):
+        self.page.overlay.append(self._file_picker)
+        self.page.update()
+
+    def will_unmount(self):
+        # a running job isn't cancelled by switching tabs, it just stops showing its progress
+        if self._file_picker in self.page.overlay:
+            self.page.overlay.remove(self._file_picker)
+
+    def _open_file_picker(self, e) -> None:
+        suffix = f".{self.format_drop_down.value}" + (
+            ".gz" if self.gzip_checkbox.value else ""
+        )
+        self._file_picker.save_file(
+            dialog_title="Export the ledger to",
+            file_name=f"ledger{suffix}",
+        )
+
+    @batched_updates
+    def _on_file_picked(self, e: ft.FilePickerResultEvent) -> None:
+        if e.path:
+            self.path_text.value = e.path
+            self.updates.mark(self.path_text)
+            self._sync_format_with_path()
+
+    def _on_path_changed(self, e: ft.ControlEvent) -> None:
+        with self.updates.batch():
+            self._sync_format_with_path()
+
+    @staticmethod
+    def _names_format(path: Path) -> bool:
+        """
+        Tells whether the file name says what to export, like `ledger.jsonl.gz` does
+        (the suffix then decides, as with the CLI)
+        """
+        return any(each.lower() in NAMED_SUFFIXES for each in path.suffixes[-2:])
+
+    def _sync_format_with_path(self) -> None:
+        """
+        Shows the format and compression, that the typed file name says, in the form
+        """
+        path = Path(str(self.path_text.value or "").strip())
+        if not self._names_format(path):
+            return
+        self.format_drop_down.value, self.gzip_checkbox.value = split_export_path(path)
+        self.updates.mark(self.format_drop_down, self.gzip_checkbox)
+
+    def _cancel_export(self, e) -> None:
+        self._cancel.set()
+
+    def _entry_filter(self) -> EntryFilter:
+        """
+        Builds the filter out of the form
+
+        Raises:
+            ValueError: When a date can't be understood
+        """
+        flow_type = self.flow_type_drop_down.value
+        return EntryFilter.from_text(
+            start=self.start_text.value,
+            end=self.end_text.value,
+            flow_types=None if flow_type in (None, "all") else [str(flow_type)],
+            tags=str(self.tags_text.value or "").split(","),
+        )
+
+    async def _start_export(self, e: ft.ControlEvent) -> None:
+        path_text = str(self.path_text.value or "").strip()
+        try:
+            entry_filter = self._entry_filter()
+        except ValueError as error:
+            self.status_text.value = str(error)
+            self.updates.mark(self.status_text)
+            return
+        if not path_text:
+            self.path_text.error_text = "Where should the export go?"
+            self.updates.mark(self.path_text)
+            return
+
+        self._cancel.clear()
+        self._progress_throttle.reset()
+        with self.updates.batch():
+            self.path_text.error_text = None
+            self.export_button.disabled = True
+            self.cancel_button.visible = True
+            self.progress_bar.value = 0
+            self.progress_bar.visible = True
+            self.status_text.value = f"Exporting to {Path(path_text).name} ..."
+            self.updates.mark(
+                self.path_text,
+                self.export_button,
+                self.cancel_button,
+                self.progress_bar,
+                self.status_text,
+            )
+
+        # The export streams the ledger on a thread of its own, the form only decides
+        # what a file name without a known suffix gets
+        file_path = Path(path_text)
+        named = self._names_format(file_path)
+        status = f"The export to {file_path.name} was interrupted"
+        try:
+            progress: ExportProgress = await asyncio.to_thread(
+                export_entries,
+                self._db_connection.db_connection,
+                file_path,
+                file_format=None if named else self.format_drop_down.value,  # type: ignore
+                compressed=None if named else bool(self.gzip_checkbox.value),
+                entry_filter=entry_filter,
+                on_progress=self._show_progress,
+                should_stop=self._cancel.is_set,
+            )
+            status = self._describe(progress)
+        except Exception as error:
+            app_logger.exception(f"Couldn't export the ledger to: {file_path}")
+            status = f"Couldn't export to {file_path.name}: {error}"
+        finally:
+            # The form is usable again, whether the export ended or failed
+            with self.updates.batch():
+                self.export_button.disabled = False
+                self.cancel_button.visible = False
+                self.status_text.value = status
+                self.updates.mark(self.export_button, self.cancel_button, self.status_text)
+
+    def _show_progress(self, progress: ExportProgress) -> None:
+        """
+        Shows the progress of the running export, at most every `PROGRESS_INTERVAL` seconds.
+        Called from the export's thread.
+
+        Args:
+            progress (ExportProgress): The progress so far
+        """
+        if not self._progress_throttle.due(progress.elapsed, progress.finished):
+            return
+        with self.updates.batch():
+            self.progress_bar.value = progress.fraction
+            self.status_text.value = self._describe(progress)
+            self.updates.mark(self.progress_bar, self.status_text)
+
+    @staticmethod
+    def _describe(progress: ExportProgress) -> str:
+        """
+        Returns a one line summary of the export's progress
+        """
+        summary = (
+            f"{progress.rows_written:,} of {progress.rows_scanned:,} entries exported "
+            f"({progress.rows_per_second:,.0f} rows/sec)"
+        )
+        if progress.failed:
+            return f"Export failed, {summary}"
+        if progress.cancelled:
+            return f"Export cancelled, {summary}"
+        if progress.finished:
+            return f"Export done in {progress.elapsed:.1f}s, {summary}"
+        return summary
@@ -0,0 +1,215 @@
+import asyncio
+import threading
+from pathlib import Path
+from typing import Callable
+
+import flet as ft
+from accountant.logging import app_logger
+
+from flet_accountant.components.common.progress_throttle import ProgressThrottle
+from flet_accountant.components.common.text_field import TextField
+from flet_accountant.components.common.update_batcher import (
+    UpdateBatcher,
+    batched_updates,
+)
+from flet_accountant.database.async_db import AsyncLedgerDataBase
+from flet_accountant.database.importer import BulkImporter, ImportProgress
+
+
+class BulkImport(ft.Container):
+    """
+    This Control creates an Import form, that streams a bank statement (CSV or OFX) or a legacy
+    ledger CSV into the DB, showing its progress and throughput
+
+    Args:
+        db_connection (AsyncLedgerDataBase): The async DB Connection Interface, whose ledger the entries are appended to
+        on_imported (Callable[[ImportProgress], None] | None, optional): The method, that had to be called once an import ends. Defaults to `None`.
+    """
+
+    # Seconds between two progress updates sent to the client
+    PROGRESS_INTERVAL = 0.25
+
+    def __init__(
+        self,
+        db_connection: AsyncLedgerDataBase,
+        on_imported: Callable[[ImportProgress], None] | None = None,
+    ):
+        """
+        This Control creates an Import form, that streams a bank statement (CSV or OFX) or a legacy
+        ledger CSV into the DB, showing its progress and throughput
+
+        Args:
+            db_connection (AsyncLedgerDataBase): The async DB Connection Interface, whose ledger the entries are appended to
+            on_imported (Callable[[ImportProgress], None] | None, optional): The method, that had to be called once an import ends. Defaults to `None`.
+        """
+        super().__init__()
+
+        self._db_connection: AsyncLedgerDataBase = db_connection
+        self.on_imported = on_imported
+        self.updates = UpdateBatcher(self)
+        self._cancel = threading.Event()
+        self._progress_throttle = ProgressThrottle(self.PROGRESS_INTERVAL)
+
+        self._file_picker = ft.FilePicker(on_result=self._on_file_picked)
+
+        #
+        # Widgets
+        #
+        self.path_text = TextField(
+            label="Statement file (.csv, .ofx, .qfx) ...",
+            expand=True,
+        )
+        self.browse_button = ft.IconButton(
+            icon=ft.icons.FOLDER_OPEN,
+            tooltip="Browse",
+            on_click=self._open_file_picker,
+        )
+        self.header_checkbox = ft.Checkbox(
+            label="First row names the columns", value=True
+        )
+        self.progress_bar = ft.ProgressBar(value=0, visible=False)
+        self.status_text = ft.Text("")
+        self.import_button = ft.ElevatedButton(
+            text="Import",
+            icon=ft.icons.UPLOAD_FILE,
+            on_click=self._start_import,
+        )
+        self.cancel_button = ft.TextButton(
+            text="Cancel",
+            on_click=self._cancel_import,
+            visible=False,
+        )
+
+        self.content = ft.Card(
+            ft.Container(
+                ft.Column(
+                    controls=[
+                        ft.Row(controls=[self.path_text, self.browse_button]),
+                        self.header_checkbox,
+                        self.progress_bar,
+                        self.status_text,
+                        ft.Row(
+                            controls=[self.cancel_button, self.import_button],
+                            alignment=ft.MainAxisAlignment.END,
+                        ),
+                    ],
+                    horizontal_alignment=ft.CrossAxisAlignment.STRETCH,
+                    spacing=10,
+                ),
+                padding=20,
+                expand=True,
+            ),
+            elevation=4,
+        )
+
+    def did_mount(self):
+        self.page.overlay.append(self._file_picker)
+        self.page.update()
+
+    def will_unmount(self):
+        # a running job isn't cancelled by switching tabs, it just stops showing its progress
+        if self._file_picker in self.page.overlay:
+            self.page.overlay.remove(self._file_picker)
+
+    def _open_file_picker(self, e) -> None:
+        self._file_picker.pick_files(
+            dialog_title="Choose a statement",
+            allowed_extensions=["csv", "ofx", "qfx"],
+        )
+
+    @batched_updates
+    def _on_file_picked(self, e: ft.FilePickerResultEvent) -> None:
+        if e.files and e.files[0].path:
+            self.path_text.value = e.files[0].path
+            self.updates.mark(self.path_text)
+
+    def _cancel_import(self, e) -> None:
+        self._cancel.set()
+
+    async def _start_import(self, e: ft.ControlEvent) -> None:
+        file_path = Path(str(self.path_text.value or "").strip())
+        if not file_path.is_file():
+            self.path_text.error_text = "No such file"
+            self.updates.mark(self.path_text)
+            return
+
+        self._cancel.clear()
+        self._progress_throttle.reset()
+        with self.updates.batch():
+            self.path_text.error_text = None
+            self.import_button.disabled = True
+            self.cancel_button.visible = True
+            self.progress_bar.value = 0
+            self.progress_bar.visible = True
+            self.status_text.value = f"Importing {file_path.name} ..."
+            self.updates.mark(
+                self.path_text,
+                self.import_button,
+                self.cancel_button,
+                self.progress_bar,
+                self.status_text,
+            )
+
+        # The import streams the file on a thread of its own, its chunks are appended by the
+        # database's (single) writer
+        progress: ImportProgress | None = None
+        status = f"The import of {file_path.name} was interrupted"
+        try:
+            importer = BulkImporter(
+                self._db_connection.db_connection,
+                write=self._db_connection.write_blocking,
+            )
+            progress = await asyncio.to_thread(
+                importer.import_file,
+                file_path,
+                has_header=bool(self.header_checkbox.value),
+                on_progress=self._show_progress,
+                should_stop=self._cancel.is_set,
+            )
+            status = self._describe(progress)
+        except Exception as error:
+            app_logger.exception(f"Couldn't import: {file_path}")
+            status = f"Couldn't import {file_path.name}: {error}"
+        finally:
+            # The form is usable again, whether the import ended or failed
+            with self.updates.batch():
+                self.import_button.disabled = False
+                self.cancel_button.visible = False
+                self.status_text.value = status
+                self.updates.mark(self.import_button, self.cancel_button, self.status_text)
+
+        if progress is not None and self.on_imported is not None:
+            self.on_imported(progress)
+
+    def _show_progress(self, progress: ImportProgress) -> None:
+        """
+        Shows the progress of the running import, at most every `PROGRESS_INTERVAL` seconds.
+        Called from the import's thread.
+
+        Args:
+            progress (ImportProgress): The progress so far
+        """
+        if not self._progress_throttle.due(progress.elapsed, progress.finished):
+            return
+        with self.updates.batch():
+            self.progress_bar.value = progress.fraction
+            self.status_text.value = self._describe(progress)
+            self.updates.mark(self.progress_bar, self.status_text)
+
+    @staticmethod
+    def _describe(progress: ImportProgress) -> str:
+        """
+        Returns a one line summary of the import's progress
+        """
+        summary = (
+            f"{progress.rows_written:,} imported, {progress.rows_rejected:,} skipped "
+            f"({progress.rows_per_second:,.0f} rows/sec)"
+        )
+        if progress.failed:
+            return f"Import failed, {summary}"
+        if progress.cancelled:
+            return f"Import cancelled, {summary}"
+        if progress.finished:
+            details = f" - {progress.errors[0]}" if progress.errors else ""
+            return f"Import done in {progress.elapsed:.1f}s, {summary}{details}"
+        return summary
@@ -1,27 +1,65 @@
+from collections import OrderedDict
 from dataclasses import dataclass
+from typing import Callable
+
 import flet as ft
 
+from flet_accountant.components.common.update_batcher import (
+    UpdateBatcher,
+    batched_updates,
+)
+from flet_accountant.instrumentation import timed
+
 
 @dataclass
 class MenuItem:
     """
     Represents a menu item in the navigation rail.
 
+    Either the content itself, or a factory building it, has to be given. A factory is only
+    called when the menu item is first selected, so heavy views don't slow down the startup.
+
     Attributes:
         nav_destination (ft.NavigationRailDestination): The navigation rail destination.
-        nav_content (ft.Control): The content to be displayed when the menu item is selected.
+        nav_content (ft.Control | None): The content to be displayed when the menu item is selected.
+        nav_content_factory (Callable[[], ft.Control] | None): Builds the content, when the menu item is selected.
     """
 
     nav_destination: ft.NavigationRailDestination
-    nav_content: ft.Control
+    nav_content: ft.Control | None = None
+    nav_content_factory: Callable[[], ft.Control] | None = None
+
+    def __post_init__(self):
+        if self.nav_content is None and self.nav_content_factory is None:
+            raise ValueError("A MenuItem needs either a nav_content or a nav_content_factory")
+
+    @property
+    def is_lazy(self) -> bool:
+        return self.nav_content is None
+
+    def build_content(self) -> ft.Control:
+        """
+        Returns the content of the menu item, building a new one if it's given as a factory.
+
+        Returns:
+            ft.Control: The content to be displayed.
+        """
+        if self.nav_content is not None:
+            return self.nav_content
+        return self.nav_content_factory()  # type: ignore
 
 
 class NavRail(ft.UserControl):
     """
     A custom navigation rail control.
 
+    The contents of lazy menu items are built on their first visit, and the most recently
+    visited `max_cached_tabs` of them are kept; older ones are dropped, and built again
+    when visited again.
+
     Attributes:
         menu_items (list[MenuItem]): A list of menu items.
+        max_cached_tabs (int): The number of built lazy contents kept alive.
         _nav_rail (ft.NavigationRail): The underlying navigation rail control.
         contents (ft.Container): The container to hold the content of the selected menu item.
         expand (bool): Whether the navigation rail should expand to fill the available space.
@@ -29,23 +67,31 @@ class NavRail(ft.UserControl):
     Example:
         >>> menu_items = [
         ...     MenuItem(ft.NavigationRailDestination(icon="home"), ft.Text("Home")),
-        ...     MenuItem(ft.NavigationRailDestination(icon="settings"), ft.Text("Settings")),
+        ...     MenuItem(ft.NavigationRailDestination(icon="settings"), nav_content_factory=lambda: ft.Text("Settings")),
         ... ]
         >>> nav_rail = NavRail(menu_items)
     """
 
+    # a default number of built lazy contents to keep alive
+    DEFAULT_MAX_CACHED_TABS = 3
+
     def __init__(
         self,
         menu_items: list[MenuItem],
+        max_cached_tabs: int = DEFAULT_MAX_CACHED_TABS,
     ):
         """
         Initializes the navigation rail control.
 
         Args:
             menu_items (list[MenuItem]): A list of menu items.
+            max_cached_tabs (int, optional): The number of built lazy contents kept alive. Defaults to `DEFAULT_MAX_CACHED_TABS`.
         """
         super().__init__()
         self.menu_items = menu_items
+        self.max_cached_tabs = max(max_cached_tabs, 1)
+        # built contents of the lazy menu items, keyed by index, least recently visited first
+        self._built_contents: OrderedDict[int, ft.Control] = OrderedDict()
 
         self._nav_rail = ft.NavigationRail(
             destinations=[each.nav_destination for each in self.menu_items],
@@ -55,6 +101,8 @@ class NavRail(ft.UserControl):
 
         self.contents = ft.Container(expand=True)
         self.expand = True
+        # switching tabs only re-sends the contents, not the rail
+        self.updates = UpdateBatcher(self)
 
     def did_mount(self):
         """
@@ -63,11 +111,7 @@ class NavRail(ft.UserControl):
         Returns:
             None
         """
-        if len(self.menu_items) > 0:
-            item = self._get_menu_item()
-            if item:
-                self.contents.content = item.nav_content
-                self.update()
+        self._show_selected_item()
         return super().did_mount()
 
     def _get_menu_item(self) -> MenuItem | None:
@@ -77,10 +121,45 @@ class NavRail(ft.UserControl):
         Returns:
             MenuItem: The currently selected menu item.
         """
-        for index, each in enumerate(self.menu_items):
-            if self._nav_rail.selected_index == index:
-                return each
+        index = self._nav_rail.selected_index
+        if index is None or not 0 <= index < len(self.menu_items):
+            return None
+        return self.menu_items[index]
+
+    def _get_content(self, index: int) -> ft.Control:
+        """
+        Gets the content of a menu item, building it on the first visit (or after it was evicted).
+
+        Args:
+            index (int): The index of the menu item.
+
+        Returns:
+            ft.Control: The content to be displayed.
+        """
+        item = self.menu_items[index]
+        if not item.is_lazy:
+            return item.build_content()
+
+        content = self._built_contents.get(index)
+        if content is None:
+            content = self._built_contents[index] = item.build_content()
+        self._built_contents.move_to_end(index)
+
+        while len(self._built_contents) > self.max_cached_tabs:
+            self._built_contents.popitem(last=False)
+        return content
+
+    def _show_selected_item(self) -> None:
+        """
+        Shows the content of the selected menu item.
+        """
+        if self._get_menu_item() is None:
+            return
+        self.contents.content = self._get_content(self._nav_rail.selected_index)  # type: ignore
+        self.updates.mark(self.contents)
 
+    @timed("handler.NavRail._on_nav_rail_change")
+    @batched_updates
     def _on_nav_rail_change(self, e: ft.ControlEvent):
         """
         Called when the navigation rail selection changes.
@@ -91,10 +170,7 @@ class NavRail(ft.UserControl):
         Returns:
             None
         """
-        item = self._get_menu_item()
-        if item:
-            self.contents.content = item.nav_content
-            self.update()
+        self._show_selected_item()
 
     def build(self):
         """
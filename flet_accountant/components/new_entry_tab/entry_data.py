@@ -1,3 +1,6 @@
+import asyncio
+import threading
+from decimal import Decimal
 from typing import Any, Callable, Dict, List
 
 import flet as ft
@@ -6,12 +9,20 @@ from accountant.database.entry import Entry
 from flet_accountant.components.data_visualizer.paginated_data_table import (
     PaginatedDataTable,
 )
+from flet_accountant.components.common.text_field import TextField
+from flet_accountant.components.data_visualizer.row_provider import RowProvider
+from flet_accountant.database.async_db import AsyncLedgerDataBase
+from flet_accountant.database.change_feed import Change, ChangeFeed, ChangeKind
+from flet_accountant.database.db import LedgerDataBase
+from flet_accountant.database.filters import EntryFilter
+from flet_accountant.database.ledger_columns import LedgerColumns
 
 
 class EntryRow(ft.DataRow):
     def __init__(
         self,
         entry: Entry,
+        serial_number: int = 1,
         color: None | str | Dict[ft.ControlState, str] = None,
         selected: bool | None = None,
         on_long_press: Callable[[ft.ControlEvent], None] | None = None,
@@ -23,18 +34,12 @@ class EntryRow(ft.DataRow):
     ):
         self.entry_data = entry
 
+        # one `Text` per column, rewritten in place when the row is recycled
+        self.texts: list[ft.Text] = [ft.Text() for _ in range(7)]
+        self._fill_texts(entry, serial_number)
+
         super().__init__(
-            cells=[
-                ft.DataCell(content=ft.Text("1")),
-                ft.DataCell(content=ft.Text(str(self.entry_data.date_time))),
-                ft.DataCell(content=ft.Text(str(self.entry_data.name))),
-                ft.DataCell(
-                    content=ft.Text(str("\u20b9 ") + str(self.entry_data.amount)),
-                ),
-                ft.DataCell(content=ft.Text(str(self.entry_data.reason))),
-                ft.DataCell(content=ft.Text(str(self.entry_data.tag))),
-                ft.DataCell(content=ft.Text(str(self.entry_data.flow_type))),
-            ],
+            cells=[ft.DataCell(content=text) for text in self.texts],
             color=color,
             selected=selected,
             on_long_press=on_long_press,
@@ -45,6 +50,91 @@ class EntryRow(ft.DataRow):
             data=data,
         )
 
+    def _fill_texts(self, entry: Entry, serial_number: int) -> None:
+        values = (
+            str(serial_number),
+            str(entry.date_time),
+            str(entry.name),
+            str("\u20b9 ") + str(entry.amount),
+            str(entry.reason),
+            str(entry.tag),
+            str(entry.flow_type),
+        )
+        for text, value in zip(self.texts, values):
+            text.value = value
+
+    def set_entry(self, entry: Entry, serial_number: int) -> None:
+        """
+        Shows another entry in this row, only the `Text` values change
+
+        Args:
+            entry (Entry): The entry to show
+            serial_number (int): The serial number shown in the first column
+        """
+        self.entry_data = entry
+        self._fill_texts(entry, serial_number)
+        self.visible = True
+
+
+class EntryRowPool:
+    """
+    Keeps a page worth of `EntryRow`s alive, and recycles them for every page shown.
+
+    As the same row (and `Text`) controls stay in the table, Flet only sends the client
+    the `Text` values that changed, instead of the control trees of new rows. The rows a
+    short (last) page doesn't need are hidden, not removed.
+    """
+
+    def __init__(self):
+        self.rows: list[EntryRow] = []
+        self._lock = threading.Lock()
+
+    def rows_for(
+        self, entries: list[Entry], first_serial_number: int, page_size: int
+    ) -> list[ft.DataRow]:
+        """
+        Shows the entries of a page in the pooled rows
+
+        Args:
+            entries (list[Entry]): The entries of the page
+            first_serial_number (int): Serial number of the page's first entry
+            page_size (int): Number of rows a page has, the rows past the entries are hidden
+
+        Returns:
+            list[ft.DataRow]: The page's rows, `page_size` of them (or more, if there are more entries)
+        """
+        size = max(page_size, len(entries))
+        with self._lock:
+            while len(self.rows) < size:
+                self.rows.append(EntryRow(Entry(name="", amount=Decimal(0), reason="")))
+            rows = self.rows[:size]
+            for index, row in enumerate(rows):
+                if index < len(entries):
+                    row.set_entry(entries[index], first_serial_number + index)
+                else:
+                    row.visible = False
+        return rows  # type: ignore
+
+
+def build_entry_rows(
+    entries: list[Entry], offset: int, limit: int, row_pool: EntryRowPool | None
+) -> list[ft.DataRow]:
+    """
+    Returns the rows showing a window of entries, recycled out of the pool if there is one
+
+    Args:
+        entries (list[Entry]): The entries of the window
+        offset (int): Index of the window's first entry, its serial number is one more
+        limit (int): Size of the window
+        row_pool (EntryRowPool | None): The pool to recycle the rows of, `None` builds new rows
+    """
+    if row_pool is not None:
+        return row_pool.rows_for(entries, offset + 1, limit)
+    return [
+        EntryRow(entry, serial_number=offset + index + 1)
+        for index, entry in enumerate(entries)
+    ]
+
 
 class EntryTable(ft.DataTable):
     def __init__(self, rows: List[EntryRow]):
@@ -62,11 +152,235 @@ class EntryTable(ft.DataTable):
         )
 
 
+class EntryRowProvider(RowProvider):
+    """
+    Serves `EntryRow`s straight out of the ledger, reading only the requested window
+
+    Args:
+        db_connection (AsyncLedgerDataBase): The ledger to read the entries from
+        entry_filter (EntryFilter | None, optional): Serve only the matching entries. Defaults to `None`.
+        row_pool (EntryRowPool | None, optional): Recycle the rows of this pool. Defaults to `None` (new rows every time).
+    """
+
+    def __init__(
+        self,
+        db_connection: AsyncLedgerDataBase,
+        entry_filter: EntryFilter | None = None,
+        row_pool: EntryRowPool | None = None,
+    ):
+        self._db_connection = db_connection
+        self.entry_filter = entry_filter
+        self.row_pool = row_pool
+
+    def count(self) -> int:
+        return self._db_connection.db_connection.count(self.entry_filter)
+
+    def fetch(self, offset: int, limit: int) -> list[ft.DataRow]:
+        entries = self._db_connection.db_connection.read_entries(
+            offset, limit, self.entry_filter
+        )
+        return build_entry_rows(entries, offset, limit, self.row_pool)
+
+    async def count_async(self) -> int:
+        return await self._db_connection.count(self.entry_filter)
+
+    async def fetch_async(self, offset: int, limit: int) -> list[ft.DataRow]:
+        entries = await self._db_connection.read_entries(
+            offset, limit, self.entry_filter
+        )
+        return build_entry_rows(entries, offset, limit, self.row_pool)
+
+
+class SearchResultRowProvider(RowProvider):
+    """
+    Serves the `EntryRow`s of search results, reading only the entries of the requested window
+
+    Args:
+        db_connection (AsyncLedgerDataBase): The ledger the search ran on, its backend must be a `LedgerDataBase` or `LedgerColumns`
+        row_ids (list[int]): Row ids of the matching entries, from the backend's `search`
+        row_pool (EntryRowPool | None, optional): Recycle the rows of this pool. Defaults to `None` (new rows every time).
+    """
+
+    def __init__(
+        self,
+        db_connection: AsyncLedgerDataBase,
+        row_ids: list[int],
+        row_pool: EntryRowPool | None = None,
+    ):
+        self._db_connection = db_connection
+        self.row_ids = row_ids
+        self.row_pool = row_pool
+
+    def count(self) -> int:
+        return len(self.row_ids)
+
+    def fetch(self, offset: int, limit: int) -> list[ft.DataRow]:
+        entries = self._db_connection.db_connection.read_entries_at(
+            self.row_ids[offset : offset + limit]
+        )
+        return build_entry_rows(entries, offset, limit, self.row_pool)
+
+    async def fetch_async(self, offset: int, limit: int) -> list[ft.DataRow]:
+        return await self._db_connection.run(self.fetch, offset, limit)
+
+
 class PaginatedEntryTable(PaginatedDataTable):
     def __init__(
         self,
-        datatable: ft.DataTable,
+        db_connection: AsyncLedgerDataBase,
         table_title: str = "Default Title",
         rows_per_page: int = 5,
+        entry_filter: EntryFilter | None = None,
+        change_feed: ChangeFeed | None = None,
     ):
-        super().__init__(datatable, table_title, rows_per_page)
+        # every page is shown in the same rows, see `EntryRowPool`
+        self.row_pool = EntryRowPool()
+        # keeps the table up to date with the entries written meanwhile, in any session
+        self.change_feed = change_feed
+        self._unsubscribe: Callable[[], None] | None = None
+        # the query of the search results shown, `""` when every entry is shown
+        self.query: str = ""
+        # the query of the last search started, it may still be running
+        self._requested_query: str = ""
+        # bumped on every search, so a slow search can't overwrite a newer one
+        self._search_generation: int = 0
+        self.entry_provider = EntryRowProvider(
+            db_connection, entry_filter, row_pool=self.row_pool
+        )
+        super().__init__(
+            EntryTable(rows=[]),
+            table_title,
+            rows_per_page,
+            row_provider=self.entry_provider,
+        )
+
+    async def set_filter(self, entry_filter: EntryFilter | None):
+        """
+        Shows only the entries that pass the filter, starting again from the first page
+        """
+        self.entry_provider.entry_filter = entry_filter
+        self.row_provider = self.entry_provider
+        self.current_page = 1
+        await self.refresh_data_async()
+
+    async def search(self, query: str, keep_page: bool = False):
+        """
+        Shows only the entries matching the query, starting again from the first page.
+        The backend's own search is used when it has one (the search index of the CSV ledger,
+        the dictionary-encoded columns of `LedgerColumns`), otherwise the entries
+        are filtered by name. A blank query shows every entry again.
+
+        Args:
+            query (str): The text to look for
+            keep_page (bool, optional): Stay on the current page (searching again after a write). Defaults to `False`.
+        """
+        self._requested_query = query
+        self._search_generation += 1
+        generation = self._search_generation
+        db = self.entry_provider._db_connection
+        row_provider: RowProvider
+        if not query.strip():
+            row_provider = self.entry_provider
+        elif isinstance(db.db_connection, (LedgerDataBase, LedgerColumns)):
+            row_ids = await db.run(db.db_connection.search, query)
+            row_provider = SearchResultRowProvider(db, row_ids, row_pool=self.row_pool)
+        else:
+            row_provider = EntryRowProvider(
+                db, EntryFilter(name=query.strip()), row_pool=self.row_pool
+            )
+        if generation != self._search_generation:
+            # searched again while this search ran
+            return
+        self.query = query.strip()
+        self.row_provider = row_provider
+        if not keep_page:
+            self.current_page = 1
+        await self.refresh_data_async()
+
+    def did_mount(self):
+        super().did_mount()
+        if self.change_feed is not None:
+            self._unsubscribe = self.change_feed.subscribe(self._on_change)
+
+    def will_unmount(self):
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = None
+
+    def _on_change(self, change: Change) -> None:
+        # called on the writer's thread, the table is only touched on its session's loop
+        page = self.page
+        if page is not None:
+            page.run_task(self.apply_change_async, change)
+
+    async def apply_change_async(self, change: Change):
+        """
+        Patches the table with a change of the ledger. New entries that come after every
+        other one only move the counters, and the rows are fetched again only when the page
+        shown is the one they land on. Any other change refreshes the table.
+        """
+        if self.row_provider is not self.entry_provider:
+            # the search results are row ids, searched for again to pick the new entries up
+            # (the query of a search still running, if any, so it isn't undone)
+            await self.search(self._requested_query, keep_page=True)
+            return
+        db = self.entry_provider._db_connection.db_connection
+        if change.kind != ChangeKind.INSERTED or not db.appends_in_order:
+            await self.refresh_data_async()
+            return
+
+        entry_filter = self.entry_provider.entry_filter
+        if entry_filter is None:
+            num_rows = change.count
+        else:
+            num_rows = self.num_rows + sum(map(entry_filter.matches, change.entries))
+        if num_rows == self.num_rows:
+            return
+
+        _, end = self.paginate()
+        shown_up_to = self.num_rows
+        self._set_num_rows(num_rows)
+        if shown_up_to < end:
+            self._show_rows(await self.build_rows_async())
+        else:
+            self._show_rows(self.pdt.rows)
+
+
+class EntrySearchField(TextField):
+    """
+    Searches the entries of a `PaginatedEntryTable` as the user types, once they stop typing
+    for `delay` seconds
+
+    Args:
+        table (PaginatedEntryTable): The table showing the search results
+        delay (float, optional): Seconds of quiet before the search runs. Defaults to `DEFAULT_DELAY`.
+    """
+
+    DEFAULT_DELAY = 0.3
+
+    def __init__(self, table: PaginatedEntryTable, delay: float = DEFAULT_DELAY):
+        """
+        Searches the entries of a `PaginatedEntryTable` as the user types, once they stop typing
+        for `delay` seconds
+
+        Args:
+            table (PaginatedEntryTable): The table showing the search results
+            delay (float, optional): Seconds of quiet before the search runs. Defaults to `DEFAULT_DELAY`.
+        """
+        super().__init__(
+            label="Search by name, reason or tag ...",
+            icon=ft.icons.SEARCH,
+            on_change=self._on_change,
+        )
+        self.table = table
+        self.delay = delay
+        self._generation: int = 0
+
+    async def _on_change(self, e: ft.ControlEvent) -> None:
+        self._generation += 1
+        generation = self._generation
+        await asyncio.sleep(self.delay)
+        if generation != self._generation:
+            # superseded by a newer keystroke
+            return
+        await self.table.search(str(self.value or ""))
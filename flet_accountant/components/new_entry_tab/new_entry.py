@@ -3,10 +3,19 @@ from decimal import Decimal
 from typing import Callable
 
 import flet as ft
-from accountant.database.db import CSVDataBase
 from accountant.database.entry import Entry, FlowType
 
+from flet_accountant.components.common.amount_validator import (
+    DebouncedAmountValidator,
+    parse_amount_text,
+)
 from flet_accountant.components.common.text_field import TextField
+from flet_accountant.components.common.update_batcher import (
+    UpdateBatcher,
+    batched_updates,
+)
+from flet_accountant.database.async_db import AsyncLedgerDataBase
+from flet_accountant.instrumentation import timed
 
 
 class NewEntry(ft.Container):
@@ -14,14 +23,17 @@ class NewEntry(ft.Container):
     This Control creates an Entry form, that will allow adding entries to CSV DB
 
     Args:
-        db_connection (CSVDataBase): The CSV DB Connection Interface
+        db_connection (AsyncLedgerDataBase): The async CSV DB Connection Interface
         on_adding (Callable[[ft.ControlEvent], None] | None, optional): The method, that had to be called on clicking the add entry button. Defaults to `None`.
         tag_list (list[str], optional): List of Pre-Made tag list. Defaults to `["grocery", "bill", "snacks", "milk"]`.
     """
 
+    # What the date, time, name, reason and amount fields show on a blank form
+    EMPTY_FORM: tuple = ("Date", "Time", "", "", "")
+
     def __init__(
         self,
-        db_connection: CSVDataBase,
+        db_connection: AsyncLedgerDataBase,
         on_adding: Callable[[ft.ControlEvent], None] | None = None,
         *,
         tag_list: list[str] = ["grocery", "bill", "snacks", "milk"],
@@ -30,17 +42,20 @@ class NewEntry(ft.Container):
         This Control creates an Entry form, that will allow adding entries to CSV DB
 
         Args:
-            db_connection (CSVDataBase): The CSV DB Connection Interface
+            db_connection (AsyncLedgerDataBase): The async CSV DB Connection Interface
             on_adding (Callable[[ft.ControlEvent], None] | None, optional): The method, that had to be called on clicking the add entry button. Defaults to `None`.
             tag_list (list[str], optional): List of Pre-Made tag list. Defaults to `["grocery", "bill", "snacks", "milk"]`.
         """
         super().__init__()
 
-        self._db_connection: CSVDataBase = db_connection
+        self._db_connection: AsyncLedgerDataBase = db_connection
         self.on_adding = on_adding
         time_on_init: datetime.datetime = datetime.datetime.now()
         self.tag_list: list[str] = tag_list
         self._entry = Entry(name="", amount=Decimal(0), reason="")
+        self._amount_validator = DebouncedAmountValidator()
+        # handlers mark the controls they change, instead of updating the whole card
+        self.updates = UpdateBatcher(self)
 
         # The date picker control
         self._date_picker = ft.DatePicker(
@@ -180,30 +195,36 @@ class NewEntry(ft.Container):
     def entry(self) -> Entry:
         return self._entry
 
+    @batched_updates
     def _open_date_picker(self, e) -> None:
         self._date_picker.open = True
-        self.update()
+        self.updates.mark(self._date_picker)
 
+    @batched_updates
     def _open_time_picker(self, e) -> None:
         self._time_picker.open = True
-        self.update()
+        self.updates.mark(self._time_picker)
 
+    @batched_updates
     def _update_tag_choice(self, e) -> None:
         self.tag_text.content.value = self._tag_drop_down.value  # type: ignore
         self._tag_drop_down.visible = False
         self.tag_text.visible = True
-        self.update()
+        self.updates.mark(self._tag_drop_down, self.tag_text)
 
+    @batched_updates
     def _open_tag_list_dropdown(self, e) -> None:
         self._tag_drop_down.visible = True
         self.tag_text.visible = False
-        self.update()
+        self.updates.mark(self._tag_drop_down, self.tag_text)
 
+    @batched_updates
     def _set_date_text(self, e) -> None:
         self.date_text.content.value = self._date_picker.value.strftime("%d %B, %Y")  # type: ignore
         self.date_text.content.data = self._date_picker.value  # type: ignore
-        self.update()
+        self.updates.mark(self.date_text)
 
+    @batched_updates
     def _set_time_text(self, e):
         val: datetime.time | None = self._time_picker.value
         hour: int = val.hour % 12  # type: ignore
@@ -215,33 +236,29 @@ class NewEntry(ft.Container):
             f"{hour:02}:{val.minute:02}:{val.second:02} {session}"  # type: ignore
         )
         self.time_text.content.data = self._time_picker.value  # type: ignore
-        self.update()
+        self.updates.mark(self.time_text)
 
     #
     # Internal Text field checkers
     #
-    def _check_amount_text_field(self, e: ft.ControlEvent) -> None:
+    async def _check_amount_text_field(self, e: ft.ControlEvent) -> None:
         """
-        Checks the amount field only contains the digits and .
+        Checks the amount field holds a valid amount, once the user stops typing.
+        Only the field itself is updated, and only when its validity changed.
 
         Args:
-            e (ft.ControlEvent): _description_
+            e (ft.ControlEvent): The `on_change` event of the amount field
         """
         text_field: ft.TextField = e.control
-        amount_string = str(text_field.value)
-
-        if not amount_string.isspace():
-            if not amount_string == "":  # needs more improvement, its very clear
-                if not self._check_amount_data(amount_string):
-                    text_field.error_text = f"{amount_string} is Not Valid Amount, Please Enter a Valid Number"
-                    self.update()
-                else:
-                    text_field.error_text = None
-                    self.update()
+        result = await self._amount_validator.check(str(text_field.value or ""))
+        if result is None:
+            return
+        text_field.error_text = result.error_text
+        text_field.update()
 
     def _check_amount_data(self, chars: str) -> bool:
         """
-        Checks whether the given string contains only Digits
+        Checks whether the given string is a valid amount (see `parse_amount_text`)
 
         Args:
             chars (str): The amount string to check
@@ -249,30 +266,29 @@ class NewEntry(ft.Container):
         Returns:
             bool: Returns `True` if the given string is an amount string, otherwise `False`.
         """
-        return chars.isdigit()
+        return parse_amount_text(chars) is not None
 
+    # `focus()` is a method call on the client, nothing has to be updated
     def _on_submitting_name_field(self, e) -> None:
         self.amount_text.focus()
-        self.update()
 
     def _on_submitting_amount_field(self, e) -> None:
         self.reason_text.focus()
-        self.update()
 
     def _on_submitting_reason_field(self, e) -> None:
         self._tag_drop_down.focus()
-        self.update()
 
+    @batched_updates
     def _open_flow_type_list_dropdown(self, e) -> None:
         self.flow_type_drop_down.visible = True
         self.flow_type_text.visible = False
-        self.update()
+        self.updates.mark(self.flow_type_drop_down, self.flow_type_text)
 
-    def _add_entry(self, e: ft.ControlEvent) -> None:
-        if self._check_amount_data(str(self.amount_text.value)):
-            self._entry.amount = Decimal(
-                str(self.amount_text.value)
-            )  # needs error handling btw
+    @timed("handler.NewEntry._add_entry")
+    async def _add_entry(self, e: ft.ControlEvent) -> None:
+        amount = parse_amount_text(str(self.amount_text.value or ""))
+        if amount is not None:
+            self._entry.amount = amount
 
         date_info: datetime.datetime = datetime.datetime.strptime(
             self.date_text.content.value,  # type: ignore
@@ -304,16 +320,71 @@ class NewEntry(ft.Container):
         self._entry.tag = self._tag_drop_down.value
         self._entry.name = str(self.name_text.value)
 
-        result: bool = self._db_connection.write([self._entry])
-        if result:
-            self._entry = Entry(name="", amount=Decimal(0), reason="")
-            self.date_text.content.value = "Date"  # type: ignore
-            self.time_text.content.value = "Time"  # type: ignore
-            self.name_text.value = None
-            self.reason_text.value = None
-            self.amount_text.value = None
+        # The form is free for the next entry right away, while this one is written in the background
+        entry, self._entry = self._entry, Entry(name="", amount=Decimal(0), reason="")
+        typed = self._form_values()
+        self._set_form_values(self.EMPTY_FORM)
 
-        self.update()
+        result: bool = await self._db_connection.write([entry])
+        if not result and self._form_values() == self.EMPTY_FORM:
+            # the user gets the entry back to try again, unless they started another one
+            self._entry = entry
+            self._set_form_values(typed)
+        self._show_write_result(entry, result)
 
         if self.on_adding is not None:
             self.on_adding(e)
+
+    def _form_values(self) -> tuple:
+        """
+        Returns what the date, time, name, reason and amount fields show
+        """
+        return (
+            self.date_text.content.value,  # type: ignore
+            self.time_text.content.value,  # type: ignore
+            self.name_text.value,
+            self.reason_text.value,
+            self.amount_text.value,
+        )
+
+    def _set_form_values(self, values: tuple) -> None:
+        """
+        Shows the given date, time, name, reason and amount in the form, see `_form_values`
+        """
+        date, time, name, reason, amount = values
+        with self.updates.batch():
+            self.date_text.content.value = date  # type: ignore
+            self.time_text.content.value = time  # type: ignore
+            self.name_text.value = name
+            self.reason_text.value = reason
+            self.amount_text.value = amount
+            self.amount_text.error_text = None
+            self._amount_validator.reset()
+            self.updates.mark(
+                self.date_text,
+                self.time_text,
+                self.name_text,
+                self.reason_text,
+                self.amount_text,
+            )
+
+    def _show_write_result(self, entry: Entry, result: bool) -> None:
+        """
+        Tells the user, whether the submitted entry was written
+
+        Args:
+            entry (Entry): The submitted entry
+            result (bool): Whether the entry was written
+        """
+        if self.page is None:
+            return
+        if result:
+            message = f"Added the entry: {entry.name}"
+        else:
+            message = f"Couldn't add the entry: {entry.name}, Please try again"
+        self.page.open(
+            ft.SnackBar(
+                ft.Text(message),
+                bgcolor=None if result else ft.colors.ERROR_CONTAINER,
+            )
+        )
@@ -1,10 +1,13 @@
 import flet as ft
 
+from flet_accountant.instrumentation import timed
+
 
 class ThemeSwitcher(ft.IconButton):
     def __init__(self, icon: str | None = None):
         super().__init__(icon=icon, on_click=self._on_click)
 
+    @timed("handler.ThemeSwitcher._on_click")
     def _on_click(self, e: ft.ControlEvent):
         control_page: ft.Page = e.control.page
         current_theme: ft.ThemeMode = e.control.page.theme_mode
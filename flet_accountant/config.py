@@ -10,4 +10,40 @@ APP_NAME_WITH_VERSION: str = APP_NAME + "@" + version_string
 HOME = user_data_path() / APP_NAME_WITH_VERSION
 DB_FOLDER = HOME / "Database"
 DB_FILE_PATH = DB_FOLDER / f"{APP_NAME}_DB.csv"
+DB_INDEX_FILE_PATH = DB_FOLDER / f"{APP_NAME}_DB.idx"
+DB_AGGREGATES_FILE_PATH = DB_FOLDER / f"{APP_NAME}_DB.aggregates.json"
+DB_SEARCH_INDEX_FILE_PATH = DB_FOLDER / f"{APP_NAME}_DB.search.json"
+COLUMNAR_DB_FOLDER = DB_FOLDER / f"{APP_NAME}_DB.columns"
+SQLITE_DB_FILE_PATH = DB_FOLDER / f"{APP_NAME}_DB.sqlite"
+PARTITIONED_DB_FOLDER = DB_FOLDER / f"{APP_NAME}_DB.partitions"
+DB_JOURNAL_FILE_PATH = DB_FOLDER / f"{APP_NAME}_DB.journal"
+DB_LOCK_FILE_PATH = DB_FOLDER / f"{APP_NAME}_DB.lock"
+
+# Storage engine of the ledger, `"csv"` (the plain `DB_FILE_PATH`), `"columnar"`, `"sqlite"`
+# or `"partitioned"` (one CSV per year, the closed years archived)
+DB_BACKEND: Literal["csv", "columnar", "sqlite", "partitioned"] = "csv"
+
+# Write-ahead journal of the CSV ledger, see `database.journal`. A write waits for its
+# record to be fsynced; `DB_JOURNAL_SYNC_WINDOW` is the least number of seconds between
+# two fsyncs, the writes that come in meanwhile share the next one (`0`: one per batch)
+DB_JOURNAL = True
+DB_JOURNAL_SYNC_WINDOW = 0.0
+# The ledger is fsynced, and the journal emptied, once the journal grows this big
+DB_JOURNAL_CHECKPOINT_BYTES = 4 * 1024 * 1024
+
 LOG_FOLDER = HOME / str("Log" + "@" + version_string)
+
+# Logging, see `log_pipeline`. `"plain"` skips the Rich rendering, for production
+LOG_MODE: Literal["rich", "plain"] = "rich"
+LOG_LEVEL = "DEBUG"
+# Flet's own loggers are very chatty, they only log from this level on
+FLET_LOG_LEVEL = "INFO"
+# The plain log file rotates once it reaches `LOG_MAX_BYTES` (`"size"`), or at midnight (`"time"`)
+LOG_ROTATION: Literal["size", "time"] = "size"
+LOG_MAX_BYTES = 5 * 1024 * 1024
+# Number of older log files kept in `LOG_FOLDER`
+LOG_BACKUP_COUNT = 5
+
+# Hot-path instrumentation, see `instrumentation`. Also adds the "Performance" debug tab
+PERF_INSTRUMENTATION = False
+PERF_DUMP_FOLDER = LOG_FOLDER / "perf"
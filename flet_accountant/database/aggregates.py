@@ -0,0 +1,233 @@
+"""
+A persisted cache of running totals of the ledger, bucketed by `(year, month, flow type, tag)`.
+
+The cache follows the ledger CSV incrementally (see `LedgerFollower`): every append
+only adds the new rows to their buckets, and at startup it is checked against the
+ledger's size and modification time, so it is rebuilt only when the ledger changed
+behind its back. Balance and summary queries then cost O(buckets), not O(ledger).
+"""
+
+import json
+import os
+from dataclasses import dataclass
+from decimal import Decimal
+from pathlib import Path
+
+from accountant.database.entry import FlowType
+from accountant.logging import app_logger
+
+from flet_accountant.database.filters import parse_date_time
+from flet_accountant.database.follower import LedgerFollower
+from flet_accountant.database.schema import (
+    ENTRY_FIELDS,
+    amount_to_paise,
+    paise_to_amount,
+    parse_amount,
+    parse_flow_type,
+)
+
+# Version of the persisted layout, a cache of another version is rebuilt
+_VERSION = 1
+
+# (year, month, flow type value, tag); `0`/`""` for a missing date, flow type or tag
+BucketKey = tuple[int, int, str, str]
+
+
+@dataclass
+class Bucket:
+    """
+    The running total of one bucket
+
+    Attributes:
+        paise (int): Sum of the amounts, in paise
+        count (int): Number of entries
+    """
+
+    paise: int = 0
+    count: int = 0
+
+    @property
+    def amount(self) -> Decimal:
+        return paise_to_amount(self.paise)
+
+
+class AggregateCache(LedgerFollower):
+    """
+    Running totals of the ledger per `(year, month, flow type, tag)`, persisted as JSON
+
+    Args:
+        db_file_path (Path): Path of the ledger CSV file
+        cache_file_path (Path): Path of the file the totals are persisted in
+    """
+
+    def __init__(self, db_file_path: Path, cache_file_path: Path):
+        """
+        Running totals of the ledger per `(year, month, flow type, tag)`, persisted as JSON
+
+        Args:
+            db_file_path (Path): Path of the ledger CSV file
+            cache_file_path (Path): Path of the file the totals are persisted in
+        """
+        super().__init__(db_file_path, cache_file_path)
+        self.buckets: dict[BucketKey, Bucket] = {}
+
+    #
+    # Following the ledger
+    #
+    def _reset_state(self) -> None:
+        self.buckets = {}
+
+    def _consume(self, start: int, row: list[str]) -> None:
+        cells = dict(zip(ENTRY_FIELDS, row))
+        date_time = parse_date_time(cells.get("date_time"))
+        flow_type = parse_flow_type(cells.get("flow_type", ""))
+        tag = cells.get("tag", "")
+        self.add(
+            (
+                date_time.year if date_time else 0,
+                date_time.month if date_time else 0,
+                "" if flow_type is None else str(flow_type.value),
+                "" if tag.lower() == "none" else tag,
+            ),
+            amount_to_paise(parse_amount(cells.get("amount", "0"))),
+        )
+
+    def add(self, key: BucketKey, paise: int, count: int = 1) -> None:
+        """
+        Adds an amount to a bucket
+
+        Args:
+            key (BucketKey): The bucket
+            paise (int): The amount, in paise
+            count (int, optional): Number of entries the amount stands for. Defaults to `1`.
+        """
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = Bucket()
+        bucket.paise += paise
+        bucket.count += count
+
+    #
+    # Persistence
+    #
+    def _load(self) -> bool:
+        """
+        Loads the totals from their file
+
+        Returns:
+            bool: Returns `True` if usable totals were loaded, otherwise `False`.
+        """
+        try:
+            with open(self.state_file_path, "r", encoding="utf-8") as file:
+                state = json.load(file)
+            if state.get("version") != _VERSION:
+                return False
+            buckets = {
+                (year, month, flow_type, tag): Bucket(paise, count)
+                for year, month, flow_type, tag, paise, count in state["buckets"]
+            }
+            self.indexed_size = state["size"]
+            self._mtime_ns = state["mtime_ns"]
+            self._head_crc = state["head_crc"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+
+        self.buckets = buckets
+        return True
+
+    def save(self) -> None:
+        """
+        Writes the totals to their file, replacing the old one atomically
+        """
+        state = {
+            "version": _VERSION,
+            "size": self.indexed_size,
+            "mtime_ns": self._mtime_ns,
+            "head_crc": self._head_crc,
+            "buckets": [
+                [*key, bucket.paise, bucket.count]
+                for key, bucket in self.buckets.items()
+            ],
+        }
+        temp_path = self.state_file_path.with_name(self.state_file_path.name + ".tmp")
+        try:
+            with open(temp_path, "w", encoding="utf-8") as file:
+                json.dump(state, file, separators=(",", ":"))
+            os.replace(temp_path, self.state_file_path)
+        except OSError:
+            app_logger.exception(f"Couldn't save the aggregate cache: {self.state_file_path}")
+
+    #
+    # Queries
+    #
+    def totals_by_flow_type(self) -> dict[FlowType, Decimal]:
+        """
+        Returns the total amount of every flow type, over the whole ledger
+        """
+        paise: dict[str, int] = {}
+        for (_, _, flow_type, _), bucket in self.buckets.items():
+            paise[flow_type] = paise.get(flow_type, 0) + bucket.paise
+        return {
+            each: paise_to_amount(paise.get(str(each.value), 0)) for each in FlowType
+        }
+
+    def balance(self) -> Decimal:
+        """
+        Returns what's left to spend: the credits, less the debits and the savings
+        """
+        totals = self.totals_by_flow_type()
+        balance = Decimal(0)
+        for flow_type, amount in totals.items():
+            balance += amount if flow_type == FlowType.CREDIT else -amount
+        return balance
+
+    def monthly_summary(
+        self, year: int | None = None
+    ) -> dict[tuple[int, int], dict[FlowType, Decimal]]:
+        """
+        Returns the total of every flow type, per month
+
+        Args:
+            year (int | None, optional): Only summarise the months of this year. Defaults to `None` (every year).
+
+        Returns:
+            dict[tuple[int, int], dict[FlowType, Decimal]]: The totals, keyed by `(year, month)`, in chronological order
+        """
+        paise: dict[tuple[int, int], dict[str, int]] = {}
+        for (bucket_year, month, flow_type, _), bucket in self.buckets.items():
+            if year is not None and bucket_year != year:
+                continue
+            month_paise = paise.setdefault((bucket_year, month), {})
+            month_paise[flow_type] = month_paise.get(flow_type, 0) + bucket.paise
+        return {
+            key: {
+                each: paise_to_amount(paise[key].get(str(each.value), 0))
+                for each in FlowType
+            }
+            for key in sorted(paise)
+        }
+
+    def tag_summary(
+        self, flow_type: FlowType | None = None, year: int | None = None
+    ) -> dict[str, Decimal]:
+        """
+        Returns the total amount per tag
+
+        Args:
+            flow_type (FlowType | None, optional): Only sum up this flow type. Defaults to `None` (every flow type).
+            year (int | None, optional): Only sum up this year. Defaults to `None` (every year).
+
+        Returns:
+            dict[str, Decimal]: The totals keyed by tag (`""` for untagged entries), largest first
+        """
+        paise: dict[str, int] = {}
+        for (bucket_year, _, bucket_flow_type, tag), bucket in self.buckets.items():
+            if year is not None and bucket_year != year:
+                continue
+            if flow_type is not None and bucket_flow_type != str(flow_type.value):
+                continue
+            paise[tag] = paise.get(tag, 0) + bucket.paise
+        return {
+            tag: paise_to_amount(total)
+            for tag, total in sorted(paise.items(), key=lambda item: -item[1])
+        }
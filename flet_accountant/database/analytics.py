@@ -0,0 +1,438 @@
+"""
+Vectorized analytics over the whole ledger, for the dashboard: totals, per-tag breakdowns,
+daily, weekly and monthly cashflow, rolling averages and the savings rate.
+
+The ledger is loaded once into NumPy arrays (the CSV ledger with `parallel_loader`),
+with the encodings of `LedgerColumns` (amounts as int64 paise, timestamps as int64 epoch
+seconds, the flow types and tags as small integer ids), and every group-by is a single
+`np.add.at` over them, so the sums stay exact. The ledger is append-only: when it grows,
+only the new entries are loaded. The results are cached until the next write. Subscribed
+to the ledger's `ChangeFeed` (see `apply_change`), the new entries are appended as they
+are written, in O(delta), and the totals are patched rather than summed up again.
+
+NumPy is an optional dependency (the `analytics` extra):
+
+    poetry install --extras analytics
+"""
+
+import datetime
+import functools
+import threading
+from decimal import Decimal
+from typing import Any, Callable, Literal
+
+from accountant.database.entry import FlowType
+
+from flet_accountant.database.change_feed import Change, ChangeKind
+from flet_accountant.database.db import LedgerBackend, LedgerDataBase
+from flet_accountant.database.encoding import FLOW_TYPES, NO_ID
+from flet_accountant.database.ledger_columns import LedgerColumns
+from flet_accountant.database.parallel_loader import load_ledger_columns
+from flet_accountant.database.schema import (
+    NO_TIMESTAMP,
+    amount_to_paise,
+    paise_to_amount,
+)
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None  # type: ignore
+
+HAS_NUMPY: bool = np is not None
+
+Period = Literal["month", "week", "day"]
+
+# 1970-01-01 was a Thursday, this many days after a Monday
+_EPOCH_WEEKDAY = 3
+_SECONDS_PER_DAY = 86_400
+
+# The arrays of `LedgerAnalytics`, named like the `LedgerColumns` arrays they're loaded from
+_ARRAYS: tuple[tuple[str, str], ...] = (
+    ("amounts", "int64"),
+    ("timestamps", "int64"),
+    ("flow_types", "int8"),
+    ("tags", "int32"),
+)
+
+
+def _cached(function: Callable) -> Callable:
+    """
+    Caches the results of a `LedgerAnalytics` query per arguments, until the ledger changes
+    """
+
+    @functools.wraps(function)
+    def wrapper(self: "LedgerAnalytics", *args: Any, **kwargs: Any) -> Any:
+        with self._lock:
+            self._refresh()
+            key = (function.__name__, args, tuple(sorted(kwargs.items())))
+            if key not in self._results:
+                self._results[key] = function(self, *args, **kwargs)
+            return self._results[key]
+
+    return wrapper
+
+
+class LedgerAnalytics:
+    """
+    Group-bys of the ledger by month, week, tag and flow type, computed with NumPy
+
+    Args:
+        db_connection (LedgerBackend): The ledger analysed
+
+    Raises:
+        ImportError: When NumPy isn't installed
+    """
+
+    def __init__(self, db_connection: LedgerBackend):
+        """
+        Group-bys of the ledger by month, week, tag and flow type, computed with NumPy
+
+        Args:
+            db_connection (LedgerBackend): The ledger analysed
+
+        Raises:
+            ImportError: When NumPy isn't installed
+        """
+        if not HAS_NUMPY:
+            raise ImportError(
+                "The ledger analytics need NumPy, install the `analytics` extra"
+            )
+        self.db_connection = db_connection
+        self._lock = threading.RLock()
+        self._results: dict[tuple, Any] = {}
+        # number of entries the arrays hold, `None` before the first query
+        self._loaded: int | None = None
+
+        self._columns = LedgerColumns()
+        self.amounts = np.empty(0, dtype=np.int64)
+        self.timestamps = np.empty(0, dtype=np.int64)
+        self.flow_types = np.empty(0, dtype=np.int8)
+        self.tags = np.empty(0, dtype=np.int32)
+        self._tag_values: list[str] = []
+
+    def invalidate(self) -> None:
+        """
+        Drops the cached results, and the loaded columns, so the next query reloads the whole ledger
+        """
+        with self._lock:
+            self._results.clear()
+            self._columns = LedgerColumns()
+            self._loaded = None
+
+    def _refresh(self) -> None:
+        """
+        Loads the entries written since the last query, dropping the cached results if there were any
+        """
+        # writes only ever append, so a new count means a write happened
+        count = self.db_connection.count()
+        if count == self._loaded:
+            return
+        self._results.clear()
+
+        if isinstance(self.db_connection, LedgerColumns):
+            # already in columns, nothing to parse
+            self._load(self.db_connection)
+        else:
+            loaded = len(self._columns)
+            if count < loaded or not self.db_connection.appends_in_order:
+                # the ledger shrank behind our back, or the new entries may be anywhere
+                # in it (not just after the loaded ones): start over
+                self._columns = LedgerColumns()
+                loaded = 0
+            if loaded == 0 and isinstance(self.db_connection, LedgerDataBase):
+                # a cold load of the CSV ledger is parsed on every core
+                self._columns = load_ledger_columns(self.db_connection.db_file_path)
+                loaded = len(self._columns)
+            if count > loaded:
+                self._columns.extend(self.db_connection.iter_entries(start=loaded))
+            self._load(self._columns)
+        self._loaded = len(self.amounts)
+
+    def _load(self, columns: LedgerColumns) -> None:
+        for name, dtype in _ARRAYS:
+            array = np.frombuffer(getattr(columns, name), dtype=dtype).copy()
+            setattr(self, name, array)
+        self._tag_values = list(columns.tag_dictionary.values)
+
+    def _append(self, start: int) -> None:
+        """
+        Appends the rows of the loaded columns from `start` on to the arrays. The arrays are
+        views of buffers that grow geometrically, so an append costs O(delta), amortized.
+
+        Args:
+            start (int): Number of rows the arrays already hold
+        """
+        length = len(self._columns)
+        for name, dtype in _ARRAYS:
+            array = getattr(self, name)
+            buffer = array.base if array.base is not None else array
+            if len(buffer) < length:
+                grown = np.empty(max(length, 2 * len(buffer)), dtype=dtype)
+                grown[:start] = array[:start]
+                buffer = grown
+            buffer[start:length] = np.frombuffer(
+                memoryview(getattr(self._columns, name))[start:length], dtype=dtype
+            )
+            setattr(self, name, buffer[:length])
+        values = self._columns.tag_dictionary.values
+        self._tag_values.extend(values[len(self._tag_values) :])
+
+    def apply_change(self, change: Change) -> None:
+        """
+        Takes in a change of the ledger, a `ChangeFeed` subscriber. New entries are appended
+        to the loaded ones, and the totals patched, in O(delta); updates and deletions drop
+        everything, to be reloaded by the next query. The queries are all sums, so the new
+        entries don't have to be in ledger order (a backdated one in the partitioned DB).
+
+        Args:
+            change (Change): What changed in the ledger
+        """
+        with self._lock:
+            if change.kind != ChangeKind.INSERTED:
+                self.invalidate()
+                return
+            if (
+                isinstance(self.db_connection, LedgerColumns)
+                or self._loaded is None
+                or change.count != self._loaded + len(change.entries)
+            ):
+                # not loaded yet, or out of step: the next query catches up on its own
+                return
+
+            start = len(self._columns)
+            self._columns.extend(change.entries)
+            self._append(start)
+            self._loaded = len(self._columns)
+
+            totals_key = ("totals_by_flow_type", (), ())
+            totals = self._results.get(totals_key)
+            self._results.clear()
+            if totals is not None:
+                paise = {each: amount_to_paise(amount) for each, amount in totals.items()}
+                for entry in change.entries:
+                    if entry.flow_type is not None:
+                        paise[entry.flow_type] += amount_to_paise(entry.amount)
+                self._results[totals_key] = {
+                    each: paise_to_amount(amount) for each, amount in paise.items()
+                }
+
+    def _period_keys(self, period: Period) -> tuple["np.ndarray", "np.ndarray"]:
+        """
+        Returns, for the entries that have a date, their positions and the start of their period
+
+        Args:
+            period (Period): `"month"`, `"week"` (weeks start on Monday) or `"day"`
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The positions, and the period starts as `datetime64[D]`
+        """
+        dated = np.flatnonzero(self.timestamps != NO_TIMESTAMP)
+        days = self.timestamps[dated] // _SECONDS_PER_DAY
+        if period == "day":
+            return dated, days.astype("datetime64[D]")
+        if period == "week":
+            starts = days - (days + _EPOCH_WEEKDAY) % 7
+            return dated, starts.astype("datetime64[D]")
+        return dated, days.astype("datetime64[D]").astype("datetime64[M]").astype(
+            "datetime64[D]"
+        )
+
+    def _sum_by_period_and_flow_type(
+        self, period: Period
+    ) -> tuple["np.ndarray", "np.ndarray"]:
+        """
+        Returns the periods (sorted), and a `(period, flow type)` matrix of the summed paise
+        """
+        dated, keys = self._period_keys(period)
+        flow_types = self.flow_types[dated]
+        typed = flow_types != NO_ID
+        periods, period_index = np.unique(keys[typed], return_inverse=True)
+        paise = np.zeros((len(periods), len(FLOW_TYPES)), dtype=np.int64)
+        np.add.at(
+            paise,
+            (period_index, flow_types[typed].astype(np.intp)),
+            self.amounts[dated][typed],
+        )
+        return periods, paise
+
+    def _fill_periods(
+        self, periods: "np.ndarray", paise: "np.ndarray", period: Period
+    ) -> tuple["np.ndarray", "np.ndarray"]:
+        """
+        Spreads the sums of `_sum_by_period_and_flow_type` over every period from the first
+        to the last, the ones without any entry summing up to zero
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The contiguous periods, and their summed paise
+        """
+        if len(periods) == 0:
+            return periods, paise
+        first, last = periods[0], periods[-1]
+        if period == "day":
+            filled = np.arange(first, last + 1, dtype="datetime64[D]")
+        elif period == "week":
+            filled = np.arange(first, last + 1, 7, dtype="datetime64[D]")
+        else:
+            filled = np.arange(
+                first.astype("datetime64[M]"),
+                last.astype("datetime64[M]") + 1,
+                dtype="datetime64[M]",
+            ).astype("datetime64[D]")
+        sums = np.zeros((len(filled), paise.shape[1]), dtype=np.int64)
+        sums[np.searchsorted(filled, periods)] = paise
+        return filled, sums
+
+    #
+    # Queries
+    #
+    @_cached
+    def totals_by_flow_type(self) -> dict[FlowType, Decimal]:
+        """
+        Returns the total amount of every flow type, over the whole ledger
+        """
+        typed = self.flow_types != NO_ID
+        paise = np.zeros(len(FLOW_TYPES), dtype=np.int64)
+        np.add.at(paise, self.flow_types[typed].astype(np.intp), self.amounts[typed])
+        return {
+            each: paise_to_amount(int(paise[index]))
+            for index, each in enumerate(FLOW_TYPES)
+        }
+
+    @_cached
+    def tag_summary(self, flow_type: FlowType | None = None) -> dict[str, Decimal]:
+        """
+        Returns the total amount per tag
+
+        Args:
+            flow_type (FlowType | None, optional): Only sum up this flow type. Defaults to `None` (every flow type).
+
+        Returns:
+            dict[str, Decimal]: The totals keyed by tag (`""` for untagged entries), largest first
+        """
+        selected = (
+            slice(None)
+            if flow_type is None
+            else self.flow_types == FLOW_TYPES.index(flow_type)
+        )
+        # untagged entries (`NO_ID`) go in the first slot
+        tags = self.tags[selected].astype(np.intp) + 1
+        paise = np.zeros(len(self._tag_values) + 1, dtype=np.int64)
+        np.add.at(paise, tags, self.amounts[selected])
+        used = np.zeros(len(paise), dtype=bool)
+        used[tags] = True
+        order = np.flatnonzero(used)
+        order = order[np.argsort(-paise[order], kind="stable")]
+        return {
+            ("" if slot == 0 else self._tag_values[slot - 1]): paise_to_amount(
+                int(paise[slot])
+            )
+            for slot in order
+        }
+
+    @_cached
+    def cashflow(
+        self, period: Period = "month"
+    ) -> dict[datetime.date, dict[FlowType, Decimal]]:
+        """
+        Returns the total of every flow type per month (or week, or day), and its net cashflow
+
+        Args:
+            period (Period, optional): `"month"`, `"week"` (weeks start on Monday) or `"day"`. Defaults to `"month"`.
+
+        Returns:
+            dict[datetime.date, dict[FlowType, Decimal]]: The totals keyed by the first day of the period,
+            in chronological order. Entries without a date are left out.
+        """
+        periods, paise = self._sum_by_period_and_flow_type(period)
+        return {
+            start.item(): {
+                each: paise_to_amount(int(paise[row, index]))
+                for index, each in enumerate(FLOW_TYPES)
+            }
+            for row, start in enumerate(periods)
+        }
+
+    @_cached
+    def net_cashflow(self, period: Period = "month") -> dict[datetime.date, Decimal]:
+        """
+        Returns what was left of every month (or week): the credits, less the debits and the savings
+
+        Args:
+            period (Period, optional): `"month"`, `"week"` or `"day"`. Defaults to `"month"`.
+
+        Returns:
+            dict[datetime.date, Decimal]: The net cashflow keyed by the first day of the period
+        """
+        periods, paise = self._sum_by_period_and_flow_type(period)
+        signs = np.array(
+            [1 if each == FlowType.CREDIT else -1 for each in FLOW_TYPES], dtype=np.int64
+        )
+        net = paise @ signs
+        return {
+            start.item(): paise_to_amount(int(value))
+            for start, value in zip(periods, net)
+        }
+
+    @_cached
+    def rolling_average(
+        self,
+        flow_type: FlowType = FlowType.DEBIT,
+        window: int = 3,
+        period: Period = "month",
+    ) -> dict[datetime.date, Decimal]:
+        """
+        Returns the moving average of a flow type's totals, over the last `window` periods
+
+        Args:
+            flow_type (FlowType, optional): The flow type averaged. Defaults to `FlowType.DEBIT`.
+            window (int, optional): Number of periods averaged. Defaults to `3`.
+            period (Period, optional): `"month"`, `"week"` or `"day"`. Defaults to `"month"`.
+
+        Returns:
+            dict[datetime.date, Decimal]: The averages keyed by the first day of the period; the first
+            `window - 1` periods, which don't have a full window yet, are left out. The periods
+            without any entry count as zero, so every window spans `window` calendar periods.
+        """
+        periods, paise = self._fill_periods(
+            *self._sum_by_period_and_flow_type(period), period
+        )
+        totals = paise[:, FLOW_TYPES.index(flow_type)]
+        if window <= 0 or len(totals) < window:
+            return {}
+        sums = np.convolve(totals, np.ones(window, dtype=np.int64), mode="valid")
+        return {
+            start.item(): (paise_to_amount(int(total)) / window).quantize(Decimal("0.01"))
+            for start, total in zip(periods[window - 1 :], sums)
+        }
+
+    @_cached
+    def savings_rate(self, period: Period = "month") -> dict[datetime.date, float | None]:
+        """
+        Returns the share of every month's (or week's) credits that went into savings
+
+        Args:
+            period (Period, optional): `"month"`, `"week"` or `"day"`. Defaults to `"month"`.
+
+        Returns:
+            dict[datetime.date, float | None]: The rates keyed by the first day of the period,
+            `None` for the periods without any credit
+        """
+        periods, paise = self._sum_by_period_and_flow_type(period)
+        credits = paise[:, FLOW_TYPES.index(FlowType.CREDIT)]
+        savings = paise[:, FLOW_TYPES.index(FlowType.SAVINGS)]
+        return {
+            start.item(): (float(saved) / float(credit) if credit else None)
+            for start, saved, credit in zip(periods, savings, credits)
+        }
+
+    @_cached
+    def overall_savings_rate(self) -> float | None:
+        """
+        Returns the share of all the credits that went into savings, `None` without any credit
+        """
+        totals = self.totals_by_flow_type()
+        credit = totals.get(FlowType.CREDIT, Decimal(0))
+        if not credit:
+            return None
+        return float(totals.get(FlowType.SAVINGS, Decimal(0)) / credit)
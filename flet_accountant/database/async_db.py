@@ -0,0 +1,160 @@
+"""
+An asyncio-facing wrapper around a `LedgerBackend` (the CSV `LedgerDataBase`, or any
+other storage engine), for Flet's async event handlers.
+
+Every call is run on a small thread pool of its own, so a slow disk or a long scan
+never blocks the event loop the window is drawn from. Writes go through the
+`EntryWriteQueue` when one is given, and are awaited without blocking either.
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from functools import partial
+from typing import Any, Callable, TypeVar
+
+from accountant.database.entry import Entry, FlowType
+
+from flet_accountant.database.db import LedgerBackend
+from flet_accountant.database.filters import EntryFilter
+from flet_accountant.database.write_queue import EntryWriteQueue
+from flet_accountant.instrumentation import metrics
+
+T = TypeVar("T")
+
+
+class AsyncLedgerDataBase:
+    """
+    Runs the reads, writes and aggregate queries of a `LedgerBackend` off the event loop
+
+    Args:
+        db_connection (LedgerBackend): The database to wrap
+        write_queue (EntryWriteQueue | None, optional): The queue writes are batched through. Defaults to `None` (write directly).
+        max_workers (int, optional): Number of threads running the database calls. Defaults to `DEFAULT_MAX_WORKERS`.
+    """
+
+    DEFAULT_MAX_WORKERS = 2
+
+    def __init__(
+        self,
+        db_connection: LedgerBackend,
+        write_queue: EntryWriteQueue | None = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+    ):
+        """
+        Runs the reads, writes and aggregate queries of a `LedgerBackend` off the event loop
+
+        Args:
+            db_connection (LedgerBackend): The database to wrap
+            write_queue (EntryWriteQueue | None, optional): The queue writes are batched through. Defaults to `None` (write directly).
+            max_workers (int, optional): Number of threads running the database calls. Defaults to `DEFAULT_MAX_WORKERS`.
+        """
+        self.db_connection = db_connection
+        self.write_queue = write_queue
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="AsyncLedgerDataBase"
+        )
+
+    async def run(self, function: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Runs any blocking call on the database's threads, and awaits its result
+
+        Args:
+            function (Callable[..., T]): The blocking call
+
+        Returns:
+            T: Whatever the call returns
+        """
+        loop = asyncio.get_running_loop()
+        call = partial(function, *args, **kwargs)
+        if not metrics.enabled:
+            return await loop.run_in_executor(self._executor, call)
+        # The time spent queued for a thread counts too, it's what the handler waits on
+        started = time.perf_counter()
+        try:
+            return await loop.run_in_executor(self._executor, call)
+        finally:
+            metrics.observe(
+                f"db.{getattr(function, '__name__', 'call')}",
+                time.perf_counter() - started,
+            )
+
+    async def write(self, entries: list[Entry]) -> bool:
+        """
+        Writes the entries, through the write queue if there is one
+
+        Args:
+            entries (list[Entry]): The entries to write, they mustn't be modified afterwards
+
+        Returns:
+            bool: Returns `True` if all the entries were written, otherwise `False`.
+        """
+        if self.write_queue is None or self.write_queue.closed:
+            return await self.run(self.db_connection.write, entries)
+        results = await asyncio.gather(
+            *[
+                asyncio.wrap_future(self.write_queue.submit(entry))
+                for entry in entries
+            ]
+        )
+        return all(results)
+
+    def write_blocking(self, entries: list[Entry]) -> bool:
+        """
+        Writes the entries as one batch from a worker thread (an import, ...), through the
+        write queue's single writer if there is one
+
+        Args:
+            entries (list[Entry]): The entries to write, they mustn't be modified afterwards
+
+        Returns:
+            bool: Returns `True` if the entries were written, otherwise `False`.
+        """
+        if self.write_queue is None:
+            return self.db_connection.write(entries)
+        return self.write_queue.write(entries)
+
+    async def count(self, entry_filter: EntryFilter | None = None) -> int:
+        """
+        Returns the number of entries in the ledger
+
+        Args:
+            entry_filter (EntryFilter | None, optional): Count only the matching entries. Defaults to `None`.
+        """
+        return await self.run(self.db_connection.count, entry_filter)
+
+    async def read_entries(
+        self, offset: int, limit: int, entry_filter: EntryFilter | None = None
+    ) -> list[Entry]:
+        """
+        Reads a window of entries out of the ledger
+
+        Args:
+            offset (int): Index of the first entry to read
+            limit (int): Maximum number of entries to read
+            entry_filter (EntryFilter | None, optional): Read only the matching entries. Defaults to `None`.
+
+        Returns:
+            list[Entry]: At most `limit` entries, starting at `offset`
+        """
+        return await self.run(
+            self.db_connection.read_entries, offset, limit, entry_filter
+        )
+
+    async def totals_by_flow_type(self) -> dict[FlowType, Decimal]:
+        """
+        Sums up the amounts of the whole ledger, per flow type
+
+        Returns:
+            dict[FlowType, Decimal]: The total amount of every flow type
+        """
+        return await self.run(self.db_connection.totals_by_flow_type)
+
+    def close(self) -> None:
+        """
+        Flushes the write queue and stops the database's threads
+        """
+        if self.write_queue is not None:
+            self.write_queue.close()
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,89 @@
+"""
+An in-process feed of the changes made to the ledger, so the views showing it can patch
+themselves with just the delta, instead of reading the whole ledger again.
+
+The ledger's writer publishes a `Change` once entries are written, and every subscriber
+is called with it, on the writer's thread. A Flet control hands it over to its session
+with `page.run_task`, so every open session (they all share the feed, see
+`connection_manager`) catches up.
+"""
+
+import threading
+from dataclasses import dataclass
+from enum import Enum
+from typing import Callable
+
+from accountant.database.entry import Entry
+from accountant.logging import app_logger
+
+
+class ChangeKind(str, Enum):
+    INSERTED = "inserted"
+    UPDATED = "updated"
+    DELETED = "deleted"
+
+
+@dataclass(frozen=True)
+class Change:
+    """
+    Entries added to, changed in or removed from the ledger
+
+    Attributes:
+        kind (ChangeKind): What happened to the entries
+        entries (list[Entry]): The entries, as they are now (as they were, once deleted)
+        count (int): Number of entries in the ledger after the change
+    """
+
+    kind: ChangeKind
+    entries: list[Entry]
+    count: int
+
+
+Subscriber = Callable[[Change], None]
+
+
+class ChangeFeed:
+    """
+    Publishes the changes of the ledger to its subscribers
+    """
+
+    def __init__(self):
+        """
+        Publishes the changes of the ledger to its subscribers
+        """
+        self._lock = threading.Lock()
+        self._subscribers: list[Subscriber] = []
+
+    def subscribe(self, subscriber: Subscriber) -> Callable[[], None]:
+        """
+        Calls `subscriber` with every change published from now on
+
+        Args:
+            subscriber (Subscriber): Called on the publishing thread, it must not block
+
+        Returns:
+            Callable[[], None]: Unsubscribes it
+        """
+        with self._lock:
+            self._subscribers.append(subscriber)
+        return lambda: self.unsubscribe(subscriber)
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def publish(self, change: Change) -> None:
+        """
+        Hands the change to every subscriber, a failing one doesn't keep it from the others
+
+        Args:
+            change (Change): What changed
+        """
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber(change)
+            except Exception:
+                app_logger.exception(f"A change feed subscriber failed on {change.kind}")
@@ -0,0 +1,379 @@
+"""
+A columnar, binary storage engine for the ledger, as an alternative to the CSV file.
+
+Each `Entry` field lives in a file of its own, as a packed array that is memory
+mapped for reading:
+
+    - `amount`     : int64, the amount in paise
+    - `timestamp`  : int64, epoch seconds of `date_time`
+    - `name`, `reason`, `tag` : int32 ids, into append-only string dictionaries
+    - `flow_type`  : int8 id, the position of the `FlowType` member
+    - `date_time`  : int32 id, into a string dictionary of the `date_time` texts the
+      timestamp can't reproduce (not ISO, with microseconds, ...), `-1` for the others
+
+Nothing is parsed on a read, so scans and aggregations cost a fraction of what the
+CSV needs. The arrays are written in the machine's native byte order.
+"""
+
+import json
+import mmap
+import threading
+from array import array
+from decimal import Decimal
+from pathlib import Path
+from typing import Iterator
+
+from accountant.database.entry import Entry, FlowType
+from accountant.logging import app_logger
+
+from flet_accountant.database.db import LedgerBackend, migrate_ledger
+from flet_accountant.database.encoding import (
+    FLOW_TYPES,
+    NO_ID,
+    decode_entry,
+    encode_entry,
+)
+from flet_accountant.database.filters import EntryFilter, filter_window
+from flet_accountant.database.schema import paise_to_amount, timestamp_to_text
+
+
+class _Column:
+    """
+    A packed array of one `typecode`, stored in a file and read through `mmap`
+    """
+
+    def __init__(self, path: Path, typecode: str):
+        self.path = path
+        self.typecode = typecode
+        self.itemsize = array(typecode).itemsize
+        self._map: mmap.mmap | None = None
+        self._mapped_size: int = 0
+
+    def __len__(self) -> int:
+        try:
+            return self.path.stat().st_size // self.itemsize
+        except FileNotFoundError:
+            return 0
+
+    def append(self, values: array) -> None:
+        with open(self.path, "ab") as file:
+            values.tofile(file)
+
+    def truncate(self, length: int) -> None:
+        if len(self) > length:
+            with open(self.path, "r+b") as file:
+                file.truncate(length * self.itemsize)
+            self._map = None
+
+    def view(self) -> memoryview:
+        """
+        Returns the whole column as a read-only, memory-mapped view
+        """
+        size = len(self) * self.itemsize
+        if size == 0:
+            return memoryview(array(self.typecode))
+        if self._map is None or self._mapped_size != size:
+            # the old map is left to whoever still holds a view of it
+            with open(self.path, "rb") as file:
+                self._map = mmap.mmap(file.fileno(), size, access=mmap.ACCESS_READ)
+            self._mapped_size = size
+        return memoryview(self._map).cast(self.typecode)
+
+
+class _Dictionary:
+    """
+    An append-only list of distinct strings, one JSON string per line, encoding each as its position.
+    Other writers (instances, processes) may append to the file too, `refresh()` reads what they added.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._values: list[str] = []
+        self._ids: dict[str, int] = {}
+        self._pending: list[str] = []
+        # bytes of the file read into `_values`, up to the end of its last complete line
+        self._read_size: int = 0
+
+    @property
+    def values(self) -> list[str]:
+        with self._lock:
+            if self._read_size == 0:
+                self.refresh()
+            return self._values
+
+    def refresh(self) -> None:
+        """
+        Reads the strings appended to the file since the last read
+        """
+        with self._lock:
+            if self._pending:
+                # mid-write, the file is read again once the new strings are in it
+                return
+            try:
+                size = self.path.stat().st_size
+            except FileNotFoundError:
+                size = 0
+            if size < self._read_size:
+                # the file was replaced, start over
+                self.reload()
+            if size == self._read_size:
+                return
+            with open(self.path, "rb") as file:
+                file.seek(self._read_size)
+                data = file.read(size - self._read_size)
+            # a line still being written is left for the next refresh
+            end = data.rfind(b"\n") + 1
+            for line in data[:end].splitlines():
+                if line.strip():
+                    value = json.loads(line)
+                    self._ids.setdefault(value, len(self._values))
+                    self._values.append(value)
+            self._read_size += end
+
+    def encode(self, value: str | None) -> int:
+        if value is None:
+            return NO_ID
+        with self._lock:
+            values = self.values
+            index = self._ids.get(value)
+            if index is None:
+                index = len(values)
+                values.append(value)
+                self._ids[value] = index
+                self._pending.append(value)
+            return index
+
+    def decode(self, index: int) -> str | None:
+        if index == NO_ID:
+            return None
+        with self._lock:
+            if index >= len(self.values):
+                # written by another instance since the last read
+                self.refresh()
+            return self._values[index]
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._pending:
+                data = "".join(json.dumps(value) + "\n" for value in self._pending)
+                with open(self.path, "ab") as file:
+                    file.write(data.encode("utf-8"))
+                self._read_size += len(data.encode("utf-8"))
+                self._pending = []
+
+    def reload(self) -> None:
+        with self._lock:
+            self._values = []
+            self._ids = {}
+            self._pending = []
+            self._read_size = 0
+
+
+class ColumnarDataBase(LedgerBackend):
+    """
+    Stores the ledger as typed, memory-mappable column files, inside `folder`
+
+    Args:
+        folder (Path): The folder the column and dictionary files are kept in
+    """
+
+    def __init__(self, folder: Path):
+        """
+        Stores the ledger as typed, memory-mappable column files, inside `folder`
+
+        Args:
+            folder (Path): The folder the column and dictionary files are kept in
+        """
+        self.folder = Path(folder)
+        self._lock = threading.RLock()
+
+        self.amounts = _Column(self.folder / "amount.i64", "q")
+        self.timestamps = _Column(self.folder / "timestamp.i64", "q")
+        self.names = _Column(self.folder / "name.i32", "i")
+        self.reasons = _Column(self.folder / "reason.i32", "i")
+        self.tags = _Column(self.folder / "tag.i32", "i")
+        self.flow_types = _Column(self.folder / "flow_type.i8", "b")
+        # added later than the other columns, it may be shorter: the missing ids are `NO_ID`
+        self.date_times = _Column(self.folder / "date_time.i32", "i")
+        self._columns: list[_Column] = [
+            self.amounts,
+            self.timestamps,
+            self.names,
+            self.reasons,
+            self.tags,
+            self.flow_types,
+        ]
+
+        self.name_dictionary = _Dictionary(self.folder / "name.dict")
+        self.reason_dictionary = _Dictionary(self.folder / "reason.dict")
+        self.tag_dictionary = _Dictionary(self.folder / "tag.dict")
+        self.date_time_dictionary = _Dictionary(self.folder / "date_time.dict")
+        self._dictionaries: list[_Dictionary] = [
+            self.name_dictionary,
+            self.reason_dictionary,
+            self.tag_dictionary,
+            self.date_time_dictionary,
+        ]
+
+    def count(self, entry_filter: EntryFilter | None = None) -> int:
+        """
+        Returns the number of entries, rows only some of the columns got (from an interrupted write) aren't counted
+
+        Args:
+            entry_filter (EntryFilter | None, optional): Count only the matching entries. Defaults to `None`.
+
+        Returns:
+            int: The number of entries
+        """
+        if entry_filter is not None:
+            return sum(1 for entry in self.iter_entries() if entry_filter.matches(entry))
+        return min(len(column) for column in self._columns)
+
+    def write(self, entries: list[Entry]) -> bool:
+        """
+        Appends the entries to every column
+
+        Args:
+            entries (list[Entry]): The entries to append
+
+        Returns:
+            bool: Returns `True` if the entries were written, otherwise `False`.
+        """
+        with self._lock:
+            try:
+                self.folder.mkdir(parents=True, exist_ok=True)
+                # drop the tail of an interrupted write, so the columns line up again
+                length = self.count()
+                for column in [*self._columns, self.date_times]:
+                    column.truncate(length)
+                missing = length - len(self.date_times)
+                if missing > 0:
+                    self.date_times.append(array("i", [NO_ID]) * missing)
+                # the strings other writers added since, so their ids aren't handed out again
+                for dictionary in self._dictionaries:
+                    dictionary.refresh()
+
+                rows = [array(column.typecode) for column in self._columns]
+                date_times = array("i")
+                for entry in entries:
+                    row = encode_entry(
+                        entry,
+                        self.name_dictionary,
+                        self.reason_dictionary,
+                        self.tag_dictionary,
+                    )
+                    for values, value in zip(rows, row):
+                        values.append(value)
+                    _, timestamp, *_ = row
+                    date_time = "" if entry.date_time is None else str(entry.date_time)
+                    date_times.append(
+                        NO_ID
+                        if date_time == timestamp_to_text(timestamp)
+                        else self.date_time_dictionary.encode(date_time)
+                    )
+
+                # the strings go first, so every id a column holds can be decoded
+                for dictionary in self._dictionaries:
+                    dictionary.flush()
+                for column, values in zip(self._columns, rows):
+                    column.append(values)
+                self.date_times.append(date_times)
+                return True
+
+            except (OSError, ValueError):
+                app_logger.exception(f"Couldn't write to the columnar DB: {self.folder}")
+                for dictionary in self._dictionaries:
+                    dictionary.reload()
+                return False
+
+    def _views(self) -> list[memoryview]:
+        return [column.view() for column in [*self._columns, self.date_times]]
+
+    def _entry_at(self, index: int, views: list[memoryview]) -> Entry:
+        *columns, date_times = views
+        entry = decode_entry(
+            [column[index] for column in columns],
+            self.name_dictionary,
+            self.reason_dictionary,
+            self.tag_dictionary,
+        )
+        date_time = date_times[index] if index < len(date_times) else NO_ID
+        if date_time != NO_ID:
+            entry.date_time = self.date_time_dictionary.decode(date_time)
+        return entry
+
+    def iter_entries(self, start: int = 0) -> Iterator[Entry]:
+        """
+        Lazily yields the entries, in the order they were written
+
+        Args:
+            start (int, optional): Index of the first entry to yield. Defaults to `0`.
+
+        Yields:
+            Entry: Each entry of the ledger
+        """
+        with self._lock:
+            length = self.count()
+            views = self._views()
+        for index in range(max(start, 0), length):
+            yield self._entry_at(index, views)
+
+    def read_entries(
+        self, offset: int, limit: int, entry_filter: EntryFilter | None = None
+    ) -> list[Entry]:
+        """
+        Reads a window of entries
+
+        Args:
+            offset (int): Index of the first entry to read (among the matching ones)
+            limit (int): Maximum number of entries to read
+            entry_filter (EntryFilter | None, optional): Read only the matching entries. Defaults to `None`.
+
+        Returns:
+            list[Entry]: At most `limit` entries, starting at `offset`
+        """
+        if entry_filter is not None:
+            return filter_window(self.iter_entries(), entry_filter, offset, limit)
+        with self._lock:
+            length = self.count()
+            views = self._views()
+        return [
+            self._entry_at(index, views)
+            for index in range(max(offset, 0), min(offset + max(limit, 0), length))
+        ]
+
+    def totals_by_flow_type(self) -> dict[FlowType, Decimal]:
+        """
+        Sums up the amounts of the whole ledger, per flow type, straight off the columns
+
+        Returns:
+            dict[FlowType, Decimal]: The total amount of every flow type
+        """
+        with self._lock:
+            length = self.count()
+            amounts = self.amounts.view()[:length]
+            flow_types = self.flow_types.view()[:length]
+        paise = [0] * len(FLOW_TYPES)
+        for flow_type, amount in zip(flow_types, amounts):
+            if flow_type != NO_ID:
+                paise[flow_type] += amount
+        return {
+            each: paise_to_amount(paise[index]) for index, each in enumerate(FLOW_TYPES)
+        }
+
+    def migrate_from(self, source: LedgerBackend, batch_size: int = 10_000) -> int:
+        """
+        One-shot copy of another ledger (normally the CSV one) into this, still empty, database
+
+        Args:
+            source (LedgerBackend): The ledger to copy the entries from
+            batch_size (int, optional): Number of entries written at a time. Defaults to `10_000`.
+
+        Returns:
+            int: The number of entries copied, `0` if this database already had entries
+        """
+        return migrate_ledger(
+            source, self, f"columnar DB ({self.folder})", batch_size
+        )
+
@@ -0,0 +1,240 @@
+"""
+Opens the app's ledger, with the storage engine chosen in the config.
+
+Kept apart from `main`, which starts the Flet app as soon as it's imported, so headless
+tools (the exporter's command line, ...) can open the same ledger.
+
+Served as a web app, every session runs `main` again. `connection_manager` hands all of
+them the same `SharedDataBase`: one ledger (and so one set of read caches), one write
+queue (the single writer, holding the ledger's file lock against other processes), the
+`ChangeFeed` it publishes the new entries to, and whatever else the sessions `cache()`. It's reference counted, the last session to leave
+flushes and closes it.
+"""
+
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+from accountant.logging import app_logger
+
+from flet_accountant.config import (
+    COLUMNAR_DB_FOLDER,
+    DB_AGGREGATES_FILE_PATH,
+    DB_BACKEND,
+    DB_FILE_PATH,
+    DB_INDEX_FILE_PATH,
+    DB_JOURNAL,
+    DB_JOURNAL_CHECKPOINT_BYTES,
+    DB_JOURNAL_FILE_PATH,
+    DB_JOURNAL_SYNC_WINDOW,
+    DB_LOCK_FILE_PATH,
+    DB_SEARCH_INDEX_FILE_PATH,
+    PARTITIONED_DB_FOLDER,
+    SQLITE_DB_FILE_PATH,
+)
+from flet_accountant.database.async_db import AsyncLedgerDataBase
+from flet_accountant.database.change_feed import ChangeFeed
+from flet_accountant.database.columnar_db import ColumnarDataBase
+from flet_accountant.database.db import LedgerBackend, LedgerDataBase
+from flet_accountant.database.file_lock import FileLock
+from flet_accountant.database.journal import LedgerJournal, recover_ledger
+from flet_accountant.database.partitioned_db import PartitionedDataBase
+from flet_accountant.database.sqlite_db import SQLiteDataBase
+from flet_accountant.database.write_queue import EntryWriteQueue
+
+
+_journal: LedgerJournal | None = None
+_journal_lock = threading.Lock()
+
+
+def get_journal() -> LedgerJournal:
+    """
+    Returns the journal of the CSV ledger, one per process, shared by every connection to it.
+    Before the journal is first opened, the ledger is recovered from it (see
+    `recover_ledger`), holding the ledger's file lock, so no write of this process, nor
+    of another one, can interleave with the replay.
+
+    Returns:
+        LedgerJournal: The journal at `DB_JOURNAL_FILE_PATH`
+    """
+    global _journal
+    with _journal_lock:
+        if _journal is None:
+            with FileLock(DB_LOCK_FILE_PATH):
+                # replays the journaled writes a crash cut short, and drops a torn last line
+                recovery = recover_ledger(DB_FILE_PATH, DB_JOURNAL_FILE_PATH)
+            app_logger.debug(f"Database recovery: {recovery}")
+            _journal = LedgerJournal(
+                DB_JOURNAL_FILE_PATH,
+                sync_window=DB_JOURNAL_SYNC_WINDOW,
+                checkpoint_bytes=DB_JOURNAL_CHECKPOINT_BYTES,
+            )
+        return _journal
+
+
+def get_db_connection() -> LedgerBackend:
+    """
+    Returns a database instance of the `CSVDataBase` interface,  with the default `DB_FILE_PATH`,
+    or of the storage engine chosen with `DB_BACKEND`.
+
+    The first time the `"columnar"`, `"sqlite"` or `"partitioned"` backend is used, the existing CSV ledger
+    is migrated into it. The `"partitioned"` one archives the years that have closed since it was last opened.
+    The CSV ledger's writes are journaled when `DB_JOURNAL` is set.
+
+    Returns:
+        LedgerBackend: The DB Interface (readable page by page), with the default DB paths
+    """
+    csv_db = LedgerDataBase(
+        DB_FILE_PATH,
+        DB_INDEX_FILE_PATH,
+        DB_AGGREGATES_FILE_PATH,
+        DB_SEARCH_INDEX_FILE_PATH,
+        # the other engines only ever read the CSV ledger, to migrate it
+        journal=get_journal() if DB_JOURNAL and DB_BACKEND == "csv" else None,
+    )
+
+    db: ColumnarDataBase | SQLiteDataBase | PartitionedDataBase
+    match DB_BACKEND:
+        case "columnar":
+            db = ColumnarDataBase(COLUMNAR_DB_FOLDER)
+        case "sqlite":
+            db = SQLiteDataBase(SQLITE_DB_FILE_PATH)
+        case "partitioned":
+            db = PartitionedDataBase(PARTITIONED_DB_FOLDER)
+        case _:
+            return csv_db
+
+    if db.count() == 0 and csv_db.count() > 0:
+        app_logger.info(f"Migrating {DB_FILE_PATH} to the {DB_BACKEND} DB")
+        db.migrate_from(csv_db)
+    if isinstance(db, PartitionedDataBase):
+        db.archive_closed_years()
+    return db
+
+
+@dataclass
+class SharedDataBase:
+    """
+    The database, as shared by every session of the app
+
+    Attributes:
+        db_connection (LedgerBackend): The ledger, with its read caches
+        write_queue (EntryWriteQueue): The single writer of the ledger
+        db (AsyncLedgerDataBase): The ledger's calls, run off the event loop
+        change_feed (ChangeFeed): The changes the write queue made to the ledger
+    """
+
+    db_connection: LedgerBackend
+    write_queue: EntryWriteQueue
+    db: AsyncLedgerDataBase
+    change_feed: ChangeFeed
+    _cache: dict[str, Any] = field(default_factory=dict)
+    _cache_lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def cache(self, key: str, factory: Callable[[], Any]) -> Any:
+        """
+        Returns the object cached under `key`, building it with `factory` the first time,
+        so the sessions share it (the dashboard's analytics, ...)
+
+        Args:
+            key (str): Name of the cached object
+            factory (Callable[[], Any]): Builds the object
+
+        Returns:
+            Any: The cached object
+        """
+        with self._cache_lock:
+            if key not in self._cache:
+                self._cache[key] = factory()
+            return self._cache[key]
+
+    def close(self) -> None:
+        """
+        Writes whatever is still queued, and stops the database's threads
+        """
+        self.db.close()
+        self._cache.clear()
+
+
+class ConnectionManager:
+    """
+    Hands the sessions of the app one `SharedDataBase`, opened by the first session and
+    closed once the last one is gone
+
+    Args:
+        open_connection (Callable[[], LedgerBackend], optional): Opens the ledger. Defaults to `get_db_connection`.
+        lock_file_path (Path, optional): Lock file of the ledger's writers. Defaults to `DB_LOCK_FILE_PATH`.
+    """
+
+    def __init__(
+        self,
+        open_connection: Callable[[], LedgerBackend] = get_db_connection,
+        lock_file_path: Path = DB_LOCK_FILE_PATH,
+    ):
+        """
+        Hands the sessions of the app one `SharedDataBase`, opened by the first session and
+        closed once the last one is gone
+
+        Args:
+            open_connection (Callable[[], LedgerBackend], optional): Opens the ledger. Defaults to `get_db_connection`.
+            lock_file_path (Path, optional): Lock file of the ledger's writers. Defaults to `DB_LOCK_FILE_PATH`.
+        """
+        self._open_connection = open_connection
+        self.file_lock = FileLock(lock_file_path)
+        self._lock = threading.Lock()
+        self._shared: SharedDataBase | None = None
+        self._sessions: int = 0
+
+    @property
+    def sessions(self) -> int:
+        """
+        Number of sessions holding the database
+        """
+        return self._sessions
+
+    def acquire(self) -> SharedDataBase:
+        """
+        Returns the shared database, opening it for the first session. Every `acquire()`
+        needs a `release()`, once the session is gone.
+
+        Returns:
+            SharedDataBase: The database shared by the sessions
+        """
+        with self._lock:
+            if self._shared is None:
+                db_connection = self._open_connection()
+                change_feed = ChangeFeed()
+                write_queue = EntryWriteQueue(
+                    db_connection, file_lock=self.file_lock, change_feed=change_feed
+                )
+                self._shared = SharedDataBase(
+                    db_connection=db_connection,
+                    write_queue=write_queue,
+                    db=AsyncLedgerDataBase(db_connection, write_queue=write_queue),
+                    change_feed=change_feed,
+                )
+                app_logger.info("Opened the shared database")
+            self._sessions += 1
+            app_logger.debug(f"Database sessions: {self._sessions}")
+            return self._shared
+
+    def release(self) -> None:
+        """
+        Lets go of the database for a session, closing it when it was the last one
+        """
+        with self._lock:
+            if self._sessions == 0:
+                app_logger.warning("Released the shared database more often than acquired")
+                return
+            self._sessions -= 1
+            app_logger.debug(f"Database sessions: {self._sessions}")
+            if self._sessions > 0 or self._shared is None:
+                return
+            shared, self._shared = self._shared, None
+        shared.close()
+        app_logger.info("Closed the shared database, its last session is gone")
+
+
+# The manager every session of this process goes through
+connection_manager = ConnectionManager()
@@ -0,0 +1,377 @@
+"""
+The app's view of the ledger database.
+
+`LedgerDataBase` keeps `CSVDataBase` in charge of writing entries, and adds the
+read side the UI needs: counting rows and pulling a window of entries out of the
+ledger without loading the whole file. A `RowOffsetIndex` kept next to the ledger
+lets a read `seek` straight to the region of the rows it wants, an
+`AggregateCache` answers totals and summaries without a scan, and a `SearchIndex`
+finds entries by the words of their name, reason and tag. With a `LedgerJournal`,
+writes are crash-safe: the rows are journaled before they are appended.
+
+`LedgerBackend` is the interface the rest of the app relies on, so other storage
+engines can stand in for the CSV file.
+"""
+
+import threading
+from decimal import Decimal
+from pathlib import Path
+from typing import Iterator, Protocol
+
+from accountant.database.db import CSVDataBase
+from accountant.database.entry import Entry, FlowType
+from accountant.logging import app_logger
+
+from flet_accountant.database.aggregates import AggregateCache
+from flet_accountant.database.filters import EntryFilter, filter_window
+from flet_accountant.database.journal import LedgerJournal
+from flet_accountant.database.row_index import RowOffsetIndex
+from flet_accountant.database.search_index import SearchIndex
+from flet_accountant.database.schema import (
+    entries_to_csv,
+    entry_from_row,
+    flatten_entry,
+    iter_ledger_rows,
+)
+
+
+class LedgerBackend(Protocol):
+    """
+    What the app needs from a ledger database, whatever it stores the entries in
+    """
+
+    # Whether written entries always come after every other one in `iter_entries`, so a
+    # reader can catch up on a write by reading on from the entries it already has
+    appends_in_order: bool = True
+
+    def write(self, entries: list[Entry]) -> bool: ...
+
+    def count(self, entry_filter: EntryFilter | None = None) -> int: ...
+
+    def iter_entries(self, start: int = 0) -> Iterator[Entry]: ...
+
+    def read_entries(
+        self, offset: int, limit: int, entry_filter: EntryFilter | None = None
+    ) -> list[Entry]: ...
+
+    def totals_by_flow_type(self) -> dict[FlowType, Decimal]: ...
+
+
+def migrate_ledger(
+    source: LedgerBackend,
+    target: LedgerBackend,
+    target_name: str,
+    batch_size: int = 10_000,
+) -> int:
+    """
+    One-shot copy of a ledger (normally the CSV one) into another, still empty, one.
+    The storage engines' `migrate_from` all go through here.
+
+    Args:
+        source (LedgerBackend): The ledger to copy the entries from
+        target (LedgerBackend): The ledger to copy the entries into
+        target_name (str): How the logs call the target, for example `"SQLite DB (<path>)"`
+        batch_size (int, optional): Number of entries written at a time. Defaults to `10_000`.
+
+    Returns:
+        int: The number of entries copied, `0` if the target already had entries
+    """
+    if target.count() > 0:
+        app_logger.info(f"The {target_name} isn't empty, skipping the migration")
+        return 0
+
+    copied = 0
+    batch: list[Entry] = []
+    for entry in source.iter_entries():
+        batch.append(entry)
+        if len(batch) >= batch_size:
+            if not target.write(batch):
+                break
+            copied += len(batch)
+            batch = []
+    if batch and target.write(batch):
+        copied += len(batch)
+
+    app_logger.info(f"Migrated {copied} entries into the {target_name}")
+    return copied
+
+
+class LedgerDataBase(CSVDataBase):
+    """
+    A `CSVDataBase` that can also be read a page at a time
+
+    Args:
+        db_file_path (Path): Path of the ledger CSV file
+        index_file_path (Path | None, optional): Path of the sidecar row index. Defaults to the ledger's path with an `.idx` suffix.
+        aggregates_file_path (Path | None, optional): Path of the aggregate cache. Defaults to the ledger's path with an `.aggregates.json` suffix.
+        search_index_file_path (Path | None, optional): Path of the search index. Defaults to the ledger's path with a `.search.json` suffix.
+        journal (LedgerJournal | None, optional): Write-ahead journal of the appends. Defaults to `None` (appends aren't journaled).
+    """
+
+    appends_in_order: bool = True
+
+    def __init__(
+        self,
+        db_file_path: Path,
+        index_file_path: Path | None = None,
+        aggregates_file_path: Path | None = None,
+        search_index_file_path: Path | None = None,
+        journal: LedgerJournal | None = None,
+    ):
+        """
+        A `CSVDataBase` that can also be read a page at a time
+
+        Args:
+            db_file_path (Path): Path of the ledger CSV file
+            index_file_path (Path | None, optional): Path of the sidecar row index. Defaults to the ledger's path with an `.idx` suffix.
+            aggregates_file_path (Path | None, optional): Path of the aggregate cache. Defaults to the ledger's path with an `.aggregates.json` suffix.
+            search_index_file_path (Path | None, optional): Path of the search index. Defaults to the ledger's path with a `.search.json` suffix.
+            journal (LedgerJournal | None, optional): Write-ahead journal of the appends. Defaults to `None` (appends aren't journaled).
+        """
+        super().__init__(db_file_path)
+        self.db_file_path = Path(db_file_path)
+        self.journal = journal
+        # writes and index refreshes may come from the write queue and the reader threads at once
+        self._lock = threading.RLock()
+        self.index = RowOffsetIndex(
+            self.db_file_path,
+            (
+                index_file_path
+                if index_file_path is not None
+                else self.db_file_path.with_suffix(".idx")
+            ),
+        )
+        self.aggregates = AggregateCache(
+            self.db_file_path,
+            (
+                aggregates_file_path
+                if aggregates_file_path is not None
+                else self.db_file_path.with_suffix(".aggregates.json")
+            ),
+        )
+        self.search_index = SearchIndex(
+            self.db_file_path,
+            (
+                search_index_file_path
+                if search_index_file_path is not None
+                else self.db_file_path.with_suffix(".search.json")
+            ),
+        )
+
+    def write(self, entries: list[Entry]) -> bool:
+        """
+        Appends the entries to the ledger, then indexes, totals up and makes searchable the appended rows
+
+        Args:
+            entries (list[Entry]): The entries to append
+
+        Returns:
+            bool: Returns `True` if the entries were written (and journaled, with a journal), otherwise `False`.
+        """
+        if self.journal is not None:
+            return self._write_journaled(entries)
+        with self._lock:
+            result: bool = super().write([flatten_entry(entry) for entry in entries])
+            if result:
+                self._refresh_sidecars()
+        return result
+
+    def _write_journaled(self, entries: list[Entry]) -> bool:
+        """
+        Journals the rows, appends them to the ledger, and waits for the journal record to be
+        on disk, sharing the fsync with the writes that came in meanwhile (group commit)
+        """
+        payload = entries_to_csv(entries)
+        with self.journal.lock, self._lock:
+            try:
+                offset = (
+                    self.db_file_path.stat().st_size
+                    if self.db_file_path.exists()
+                    else 0
+                )
+                position = self.journal.append(offset, payload)
+            except OSError:
+                app_logger.exception(f"Couldn't journal {len(entries)} entries")
+                return False
+            try:
+                with open(self.db_file_path, "ab") as file:
+                    file.write(payload)
+            except OSError:
+                app_logger.exception(f"Couldn't append {len(entries)} entries")
+                # neither a record to replay the failed write from, nor (as far as it can
+                # be cut off) a half-written row, is left behind
+                try:
+                    self.journal.discard_last()
+                except OSError:
+                    app_logger.exception("Couldn't take the failed write out of the journal")
+                try:
+                    with open(self.db_file_path, "rb+") as file:
+                        file.truncate(offset)
+                except OSError:
+                    app_logger.exception(
+                        f"Couldn't cut the failed append off {self.db_file_path}"
+                    )
+                return False
+            self._refresh_sidecars()
+            if self.journal.needs_checkpoint():
+                try:
+                    self.journal.checkpoint(self.db_file_path)
+                except OSError:
+                    # the records stay in the journal, the next write tries again
+                    app_logger.exception("Couldn't checkpoint the journal")
+        # the fsync runs outside the lock, so other writes can join it
+        return self.journal.commit(position)
+
+    def _refresh_sidecars(self) -> None:
+        self.index.refresh()
+        self.aggregates.refresh()
+        self.search_index.refresh()
+
+    def _iter_rows(self, start: int = 0) -> Iterator[list[str]]:
+        """
+        Yields the parsed data rows of the ledger, skipping the header and blank lines.
+        Seeks close to `start` with the row index, instead of scanning from the top.
+
+        Args:
+            start (int, optional): Index of the first data row to yield. Defaults to `0`.
+
+        Yields:
+            list[str]: The cells of each row
+        """
+        if not self.db_file_path.exists():
+            return
+        with self._lock:
+            offset, skip = self.index.refresh().locate(start)
+        with open(self.db_file_path, "rb") as file:
+            for _, _, row in iter_ledger_rows(file, offset):
+                if skip > 0:
+                    skip -= 1
+                    continue
+                yield row
+
+    def count(self, entry_filter: EntryFilter | None = None) -> int:
+        """
+        Returns the number of entries in the ledger, as known to the row index.
+        Counting only the entries that pass a filter takes a full scan.
+
+        Args:
+            entry_filter (EntryFilter | None, optional): Count only the matching entries. Defaults to `None`.
+
+        Returns:
+            int: The number of entries
+        """
+        if entry_filter is not None:
+            return sum(1 for entry in self.iter_entries() if entry_filter.matches(entry))
+        with self._lock:
+            return self.index.refresh().row_count
+
+    def iter_entries(self, start: int = 0) -> Iterator[Entry]:
+        """
+        Lazily yields the entries of the ledger, in the order they were written
+
+        Args:
+            start (int, optional): Index of the first entry to yield. Defaults to `0`.
+
+        Yields:
+            Entry: Each entry of the ledger
+        """
+        for row in self._iter_rows(start):
+            yield entry_from_row(row)
+
+    def read_entries(
+        self, offset: int, limit: int, entry_filter: EntryFilter | None = None
+    ) -> list[Entry]:
+        """
+        Reads a window of entries out of the ledger. Without a filter, the read seeks
+        straight to `offset`; with one, the ledger is scanned from the top.
+
+        Args:
+            offset (int): Index of the first entry to read (among the matching ones)
+            limit (int): Maximum number of entries to read
+            entry_filter (EntryFilter | None, optional): Read only the matching entries. Defaults to `None`.
+
+        Returns:
+            list[Entry]: At most `limit` entries, starting at `offset`
+        """
+        if entry_filter is None:
+            return filter_window(self.iter_entries(offset), None, 0, limit)
+        return filter_window(self.iter_entries(), entry_filter, offset, limit)
+
+    def read_entries_at(self, row_ids: list[int]) -> list[Entry]:
+        """
+        Reads the entries with the given row ids (their positions in the ledger)
+
+        Args:
+            row_ids (list[int]): The row ids, in the order the entries should be returned
+
+        Returns:
+            list[Entry]: The entries, ids past the end of the ledger are left out
+        """
+        # the wanted ids of each indexed block are read in one pass over the block
+        blocks: dict[int, list[int]] = {}
+        with self._lock:
+            self.index.refresh()
+        for row_id in sorted(set(row_ids)):
+            if row_id >= 0:
+                blocks.setdefault(row_id // self.index.stride, []).append(row_id)
+
+        rows: dict[int, list[str]] = {}
+        with open(self.db_file_path, "rb") as file:
+            for wanted in blocks.values():
+                offset, skip = self.index.locate(wanted[0])
+                row_id = wanted[0] - skip
+                for _, _, row in iter_ledger_rows(file, offset):
+                    if row_id in wanted:
+                        rows[row_id] = row
+                    if row_id >= wanted[-1]:
+                        break
+                    row_id += 1
+        return [entry_from_row(rows[each]) for each in row_ids if each in rows]
+
+    def search(self, query: str) -> list[int]:
+        """
+        Finds the entries whose name, reason or tag has words starting with every word of the query
+
+        Args:
+            query (str): What the user typed
+
+        Returns:
+            list[int]: Row ids of the matching entries, in ledger order
+        """
+        with self._lock:
+            return self.search_index.refresh().search(query)
+
+    def totals_by_flow_type(self) -> dict[FlowType, Decimal]:
+        """
+        Sums up the amounts of the whole ledger, per flow type, from the aggregate cache
+
+        Returns:
+            dict[FlowType, Decimal]: The total amount of every flow type
+        """
+        with self._lock:
+            return self.aggregates.refresh().totals_by_flow_type()
+
+    def balance(self) -> Decimal:
+        """
+        Returns what's left to spend: the credits, less the debits and the savings
+        """
+        with self._lock:
+            return self.aggregates.refresh().balance()
+
+    def monthly_summary(
+        self, year: int | None = None
+    ) -> dict[tuple[int, int], dict[FlowType, Decimal]]:
+        """
+        Returns the total of every flow type, per `(year, month)`, see `AggregateCache.monthly_summary`
+        """
+        with self._lock:
+            return self.aggregates.refresh().monthly_summary(year)
+
+    def tag_summary(
+        self, flow_type: FlowType | None = None, year: int | None = None
+    ) -> dict[str, Decimal]:
+        """
+        Returns the total amount per tag, see `AggregateCache.tag_summary`
+        """
+        with self._lock:
+            return self.aggregates.refresh().tag_summary(flow_type, year)
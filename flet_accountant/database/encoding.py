@@ -0,0 +1,134 @@
+"""
+How an `Entry` is encoded as a row of integers, by the storage engines that keep the
+ledger column by column (`ColumnarDataBase` on disk, `LedgerColumns` in memory):
+
+    - `amount`     : the amount in paise
+    - `timestamp`  : epoch seconds of `date_time`
+    - `name`, `reason`, `tag` : ids, into string dictionaries
+    - `flow_type`  : id, the position of the `FlowType` member
+
+A missing value (`None` tag, flow type ...) is encoded as `NO_ID`. The scalar encodings
+(paise, timestamps) are the ones of `schema`.
+"""
+
+from typing import Protocol, Sequence
+
+from accountant.database.entry import Entry, FlowType
+
+from flet_accountant.database.schema import (
+    amount_to_paise,
+    paise_to_amount,
+    timestamp_from_text,
+    timestamp_to_text,
+)
+
+# Id stored for a missing value (`None` tag, flow type ...)
+NO_ID = -1
+
+FLOW_TYPES: list[FlowType] = list(FlowType)
+
+# `(amount, timestamp, name, reason, tag, flow_type)`, the order of the columns
+EncodedEntry = tuple[int, int, int, int, int, int]
+
+
+class Dictionary(Protocol):
+    """
+    Encodes strings as ids, and back (`StringDictionary`, or one kept in a file)
+    """
+
+    def encode(self, value: str | None) -> int: ...
+
+    def decode(self, index: int) -> str | None: ...
+
+
+class StringDictionary:
+    """
+    Interns strings, encoding each distinct one as its position in `values`
+    """
+
+    __slots__ = ("values", "_ids")
+
+    def __init__(self):
+        self.values: list[str] = []
+        self._ids: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def encode(self, value: str | None) -> int:
+        if value is None:
+            return NO_ID
+        index = self._ids.get(value)
+        if index is None:
+            index = self._ids[value] = len(self.values)
+            self.values.append(value)
+        return index
+
+    def decode(self, index: int) -> str | None:
+        return None if index == NO_ID else self.values[index]
+
+    def ids_where(self, predicate) -> set[int]:
+        """
+        Returns the ids of the strings the predicate holds for, checking every distinct string once
+        """
+        return {index for index, value in enumerate(self.values) if predicate(value)}
+
+
+def encode_flow_type(flow_type: FlowType | None) -> int:
+    return NO_ID if flow_type is None else FLOW_TYPES.index(flow_type)
+
+
+def decode_flow_type(flow_type: int) -> FlowType | None:
+    return None if flow_type == NO_ID else FLOW_TYPES[flow_type]
+
+
+def encode_entry(
+    entry: Entry, names: Dictionary, reasons: Dictionary, tags: Dictionary
+) -> EncodedEntry:
+    """
+    Encodes an entry as a row of the columns
+
+    Args:
+        entry (Entry): The entry to encode
+        names (Dictionary): Where the name is interned
+        reasons (Dictionary): Where the reason is interned
+        tags (Dictionary): Where the tag is interned
+
+    Returns:
+        EncodedEntry: The value of every column
+    """
+    return (
+        amount_to_paise(entry.amount),
+        timestamp_from_text(entry.date_time),
+        names.encode(entry.name),
+        reasons.encode(entry.reason),
+        tags.encode(entry.tag),
+        encode_flow_type(entry.flow_type),
+    )
+
+
+def decode_entry(
+    row: Sequence[int], names: Dictionary, reasons: Dictionary, tags: Dictionary
+) -> Entry:
+    """
+    Builds the entry a row of the columns encodes
+
+    Args:
+        row (Sequence[int]): The value of every column, as in `EncodedEntry`
+        names (Dictionary): Where the name was interned
+        reasons (Dictionary): Where the reason was interned
+        tags (Dictionary): Where the tag was interned
+
+    Returns:
+        Entry: A new `Entry`
+    """
+    amount, timestamp, name, reason, tag, flow_type = row
+    entry = Entry(
+        name=names.decode(name) or "",
+        amount=paise_to_amount(amount),
+        reason=reasons.decode(reason) or "",
+    )
+    entry.tag = tags.decode(tag)
+    entry.flow_type = decode_flow_type(flow_type)
+    entry.date_time = timestamp_to_text(timestamp)
+    return entry
@@ -0,0 +1,221 @@
+"""
+Streaming export of the ledger to CSV, JSON Lines, or either of them gzip-compressed.
+
+Entries flow from the database to the file through generators, one at a time, so
+exporting a huge ledger never loads it into memory. The file is written next to its
+destination and only moved in place once complete, so a cancelled or failed export
+never leaves a truncated file behind.
+"""
+
+import csv
+import gzip
+import io
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterator, Literal, TextIO
+
+from accountant.database.entry import Entry
+from accountant.logging import app_logger
+
+from flet_accountant.database.db import LedgerBackend
+from flet_accountant.database.filters import EntryFilter
+from flet_accountant.database.schema import ENTRY_FIELDS, entry_to_row
+
+ExportFormat = Literal["csv", "jsonl"]
+
+EXPORT_FORMATS: tuple[ExportFormat, ...] = ("csv", "jsonl")
+
+
+@dataclass
+class ExportProgress:
+    """
+    How far an export got, reported every `REPORT_EVERY` entries
+
+    Attributes:
+        total_rows (int): Number of entries in the ledger, before filtering
+        rows_scanned (int): Entries read from the ledger so far
+        rows_written (int): Entries that passed the filter, and were written so far
+        started_at (float): `time.monotonic()` when the export started
+        finished_at (float | None): `time.monotonic()` when the export ended
+        cancelled (bool): Whether the export was stopped before the end (no file is left behind)
+        failed (bool): Whether the file couldn't be written (no file is left behind)
+    """
+
+    REPORT_EVERY = 5_000
+
+    total_rows: int = 0
+    rows_scanned: int = 0
+    rows_written: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+    finished_at: float | None = None
+    cancelled: bool = False
+    failed: bool = False
+
+    @property
+    def finished(self) -> bool:
+        return self.finished_at is not None
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def rows_per_second(self) -> float:
+        elapsed = self.elapsed
+        return self.rows_scanned / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def fraction(self) -> float:
+        """
+        The part of the ledger scanned so far, from `0.0` to `1.0`
+        """
+        if self.total_rows <= 0:
+            return 1.0 if self.finished else 0.0
+        return min(self.rows_scanned / self.total_rows, 1.0)
+
+
+def split_export_path(file_path: Path) -> tuple[ExportFormat, bool]:
+    """
+    Tells the format of an export from its file name, for example `ledger.jsonl.gz`
+
+    Args:
+        file_path (Path): Where the export goes
+
+    Returns:
+        tuple[ExportFormat, bool]: The format (`"csv"` unless the name says `.jsonl`), and whether it's gzip-compressed
+    """
+    suffixes = [each.lower() for each in Path(file_path).suffixes]
+    compressed = bool(suffixes) and suffixes[-1] == ".gz"
+    if compressed:
+        suffixes = suffixes[:-1]
+    file_format: ExportFormat = (
+        "jsonl" if suffixes and suffixes[-1] in (".jsonl", ".ndjson") else "csv"
+    )
+    return file_format, compressed
+
+
+def iter_matching_entries(
+    db_connection: LedgerBackend,
+    entry_filter: EntryFilter | None,
+    progress: ExportProgress,
+    on_progress: Callable[[ExportProgress], None] | None = None,
+    should_stop: Callable[[], bool] | None = None,
+) -> Iterator[Entry]:
+    """
+    Lazily yields the entries of the ledger that pass the filter, keeping `progress` up to date.
+    Progress is reported, and cancellation polled, every `REPORT_EVERY` scanned entries (not
+    written ones), so even a filter that matches nothing can be cancelled.
+    """
+    for entry in db_connection.iter_entries():
+        progress.rows_scanned += 1
+        if progress.rows_scanned % progress.REPORT_EVERY == 0:
+            if on_progress is not None:
+                on_progress(progress)
+            if should_stop is not None and should_stop():
+                progress.cancelled = True
+                return
+        if entry_filter is None or entry_filter.matches(entry):
+            progress.rows_written += 1
+            yield entry
+
+
+def iter_csv_lines(entries: Iterator[Entry]) -> Iterator[str]:
+    """
+    Yields the export as CSV lines: a header, then the entries in the ledger's own column order
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+
+    def line(row) -> str:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(row)
+        return buffer.getvalue()
+
+    yield line(ENTRY_FIELDS)
+    for entry in entries:
+        yield line(entry_to_row(entry))
+
+
+def iter_jsonl_lines(entries: Iterator[Entry]) -> Iterator[str]:
+    """
+    Yields the export as JSON Lines, one object per entry (amounts as text, so they stay exact)
+    """
+    for entry in entries:
+        record = dict(zip(ENTRY_FIELDS, entry_to_row(entry)))
+        yield json.dumps(record, ensure_ascii=False) + "\n"
+
+
+def _open_output(file_path: Path, compressed: bool) -> TextIO:
+    if compressed:
+        return gzip.open(file_path, "wt", encoding="utf-8", newline="")
+    return open(file_path, "w", encoding="utf-8", newline="")
+
+
+def export_entries(
+    db_connection: LedgerBackend,
+    file_path: Path,
+    file_format: ExportFormat | None = None,
+    compressed: bool | None = None,
+    entry_filter: EntryFilter | None = None,
+    on_progress: Callable[[ExportProgress], None] | None = None,
+    should_stop: Callable[[], bool] | None = None,
+) -> ExportProgress:
+    """
+    Exports the ledger, blocking until it's done (run it off the event loop)
+
+    Args:
+        db_connection (LedgerBackend): The ledger to export
+        file_path (Path): Where the export goes
+        file_format (ExportFormat | None, optional): `"csv"` or `"jsonl"`. Defaults to `None` (from the file name).
+        compressed (bool | None, optional): Whether to gzip the file. Defaults to `None` (from the file name).
+        entry_filter (EntryFilter | None, optional): Export only the matching entries. Defaults to `None` (everything).
+        on_progress (Callable[[ExportProgress], None] | None, optional): Called every `ExportProgress.REPORT_EVERY` scanned entries, and at the end. Defaults to `None`.
+        should_stop (Callable[[], bool] | None, optional): Polled as often as `on_progress`, the export stops once it returns `True`. Defaults to `None`.
+
+    Returns:
+        ExportProgress: The final tally
+    """
+    file_path = Path(file_path)
+    named_format, named_compressed = split_export_path(file_path)
+    file_format = file_format or named_format
+    compressed = named_compressed if compressed is None else compressed
+    if file_format not in EXPORT_FORMATS:
+        raise ValueError(f"Can't export to: {file_format}")
+
+    progress = ExportProgress(total_rows=db_connection.count())
+    entries = iter_matching_entries(
+        db_connection, entry_filter, progress, on_progress, should_stop
+    )
+    lines = iter_csv_lines(entries) if file_format == "csv" else iter_jsonl_lines(entries)
+    app_logger.info(f"Exporting the ledger to {file_path} ({file_format})")
+
+    temp_path = file_path.with_name(file_path.name + ".part")
+    try:
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        with _open_output(temp_path, compressed) as file:
+            file.writelines(lines)
+        if progress.cancelled:
+            temp_path.unlink(missing_ok=True)
+        else:
+            os.replace(temp_path, file_path)
+    except OSError:
+        app_logger.exception(f"Couldn't export the ledger to: {file_path}")
+        progress.failed = True
+        temp_path.unlink(missing_ok=True)
+    except BaseException:
+        # reading the ledger failed, the half written file mustn't be left behind
+        temp_path.unlink(missing_ok=True)
+        raise
+
+    progress.finished_at = time.monotonic()
+    app_logger.info(
+        f"Exported {progress.rows_written} of {progress.rows_scanned} entries to {file_path} "
+        f"in {progress.elapsed:.1f}s"
+    )
+    if on_progress is not None:
+        on_progress(progress)
+    return progress
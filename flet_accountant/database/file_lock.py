@@ -0,0 +1,109 @@
+"""
+An exclusive lock between processes, held on a lock file next to the ledger, so two app
+processes serving the same ledger never append to it at the same time.
+
+It's an advisory lock (`flock` on POSIX, `msvcrt.locking` on Windows): it only keeps out
+the processes that take it too. Inside a process, it also works as a re-entrant lock
+between threads.
+"""
+
+import threading
+from pathlib import Path
+from typing import BinaryIO
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore
+
+try:
+    import msvcrt
+except ImportError:  # pragma: no cover - POSIX
+    msvcrt = None  # type: ignore
+
+
+def _lock(file: BinaryIO) -> None:
+    if fcntl is not None:
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+        return
+    if msvcrt is not None:
+        file.seek(0)
+        while True:
+            try:
+                # gives up after about 10 seconds, keep trying
+                msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue
+
+
+def _unlock(file: BinaryIO) -> None:
+    if fcntl is not None:
+        fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+    elif msvcrt is not None:
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class FileLock:
+    """
+    A re-entrant, exclusive lock, held between processes through a lock file
+
+    Args:
+        lock_file_path (Path): The lock file, created when missing
+    """
+
+    def __init__(self, lock_file_path: Path):
+        """
+        A re-entrant, exclusive lock, held between processes through a lock file
+
+        Args:
+            lock_file_path (Path): The lock file, created when missing
+        """
+        self.lock_file_path = Path(lock_file_path)
+        self._thread_lock = threading.RLock()
+        self._file: BinaryIO | None = None
+        self._depth: int = 0
+
+    def acquire(self) -> None:
+        """
+        Blocks until no other thread, nor process, holds the lock
+
+        Raises:
+            OSError: When the lock file can't be opened
+        """
+        self._thread_lock.acquire()
+        try:
+            if self._depth == 0:
+                self.lock_file_path.parent.mkdir(parents=True, exist_ok=True)
+                file = open(self.lock_file_path, "a+b")
+                try:
+                    _lock(file)
+                except BaseException:
+                    file.close()
+                    raise
+                self._file = file
+            self._depth += 1
+        except BaseException:
+            self._thread_lock.release()
+            raise
+
+    def release(self) -> None:
+        """
+        Releases the lock, the other processes can take it once every `acquire()` is released
+        """
+        self._depth -= 1
+        if self._depth == 0 and self._file is not None:
+            try:
+                _unlock(self._file)
+            finally:
+                self._file.close()
+                self._file = None
+        self._thread_lock.release()
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
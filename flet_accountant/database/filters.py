@@ -0,0 +1,180 @@
+"""
+Filters over ledger entries, shared by every storage engine and by the views that query them.
+"""
+
+import datetime
+from dataclasses import dataclass
+from typing import Iterable
+
+from accountant.database.entry import Entry, FlowType
+
+from flet_accountant.database.schema import parse_flow_type
+
+
+def parse_date_time(date_time: str | None) -> datetime.datetime | None:
+    """
+    Parses the stored `date_time` of an entry
+
+    Args:
+        date_time (str | None): The stored date and time, for example `"2024-06-01 10:15:00"`
+
+    Returns:
+        datetime.datetime | None: The naive date and time, `None` when it can't be parsed
+    """
+    if not date_time:
+        return None
+    try:
+        value = datetime.datetime.fromisoformat(str(date_time).strip())
+    except ValueError:
+        return None
+    return value.replace(tzinfo=None)
+
+
+@dataclass
+class EntryFilter:
+    """
+    Which entries a query should return. Every criterion left as `None` matches everything.
+
+    Attributes:
+        start (datetime.datetime | None): Earliest `date_time` to include
+        end (datetime.datetime | None): `date_time` to stop before (exclusive)
+        flow_types (set[FlowType] | None): The flow types to include
+        tags (set[str] | None): The tags to include
+        name (str | None): Text the entry's name has to contain, ignoring case
+    """
+
+    start: datetime.datetime | None = None
+    end: datetime.datetime | None = None
+    flow_types: set[FlowType] | None = None
+    tags: set[str] | None = None
+    name: str | None = None
+
+    @classmethod
+    def from_text(
+        cls,
+        start: str | None = None,
+        end: str | None = None,
+        flow_types: list[str] | None = None,
+        tags: list[str] | None = None,
+        name: str | None = None,
+    ) -> "EntryFilter":
+        """
+        Builds a filter out of what a user typed (in a form, or on the command line)
+
+        Args:
+            start (str | None, optional): Earliest date (and time) to include, for example `"2024-01-01"`. Defaults to `None`.
+            end (str | None, optional): Last date to include; a date alone includes that whole day. Defaults to `None`.
+            flow_types (list[str] | None, optional): Names or values of the flow types to include. Defaults to `None`.
+            tags (list[str] | None, optional): The tags to include. Defaults to `None`.
+            name (str | None, optional): Text the entry's name has to contain. Defaults to `None`.
+
+        Returns:
+            EntryFilter: The filter, blank inputs match everything
+
+        Raises:
+            ValueError: When a date or a flow type can't be understood
+        """
+        def date(text: str | None, inclusive_end: bool = False) -> datetime.datetime | None:
+            if not text or not text.strip():
+                return None
+            value = parse_date_time(text)
+            if value is None:
+                raise ValueError(f"Not a date: {text}")
+            if inclusive_end and len(text.strip()) <= len("YYYY-MM-DD"):
+                value += datetime.timedelta(days=1)
+            return value
+
+        parsed_flow_types: set[FlowType] | None = None
+        if flow_types:
+            parsed_flow_types = set()
+            for each in flow_types:
+                flow_type = parse_flow_type(each)
+                if flow_type is None:
+                    raise ValueError(f"Not a flow type: {each}")
+                parsed_flow_types.add(flow_type)
+
+        cleaned_tags = {each.strip() for each in tags or [] if each.strip()}
+        return cls(
+            start=date(start),
+            end=date(end, inclusive_end=True),
+            flow_types=parsed_flow_types,
+            tags=cleaned_tags or None,
+            name=name.strip() if name and name.strip() else None,
+        )
+
+    @property
+    def has_date_range(self) -> bool:
+        return self.start is not None or self.end is not None
+
+    def matches_date_time(self, date_time: datetime.datetime | None) -> bool:
+        """
+        Checks whether the date and time falls inside `start` and `end`
+
+        Args:
+            date_time (datetime.datetime | None): The date and time of an entry
+
+        Returns:
+            bool: Returns `True` if it's in range (or there's no range), otherwise `False`.
+        """
+        if not self.has_date_range:
+            return True
+        if date_time is None:
+            return False
+        if self.start is not None and date_time < self.start:
+            return False
+        if self.end is not None and date_time >= self.end:
+            return False
+        return True
+
+    def matches(self, entry: Entry) -> bool:
+        """
+        Checks whether the entry passes every criterion of the filter
+
+        Args:
+            entry (Entry): The entry to check
+
+        Returns:
+            bool: Returns `True` if the entry should be included, otherwise `False`.
+        """
+        if self.flow_types is not None and entry.flow_type not in self.flow_types:
+            return False
+        if self.tags is not None and entry.tag not in self.tags:
+            return False
+        if self.name is not None and self.name.lower() not in str(entry.name).lower():
+            return False
+        if self.has_date_range:
+            return self.matches_date_time(parse_date_time(entry.date_time))
+        return True
+
+
+def filter_window(
+    entries: Iterable[Entry],
+    entry_filter: EntryFilter | None,
+    offset: int,
+    limit: int,
+) -> list[Entry]:
+    """
+    Picks a window out of the entries that pass the filter, for engines that can only scan
+
+    Args:
+        entries (Iterable[Entry]): The entries to scan, in order
+        entry_filter (EntryFilter | None): The filter, `None` lets everything through
+        offset (int): Number of matching entries to skip
+        limit (int): Maximum number of entries to return
+
+    Returns:
+        list[Entry]: At most `limit` matching entries, after the first `offset` of them
+    """
+    window: list[Entry] = []
+    if limit <= 0:
+        return window
+    for entry in entries:
+        if entry_filter is not None and not entry_filter.matches(entry):
+            continue
+        if offset > 0:
+            offset -= 1
+            continue
+        window.append(entry)
+        if len(window) >= limit:
+            break
+    return window
@@ -0,0 +1,159 @@
+"""
+Base class of the sidecar structures that follow the ledger CSV (the row index, the
+aggregate cache, ...).
+
+A follower remembers how many bytes of the ledger it has consumed, and the size,
+modification time and head checksum of the ledger at that point. On `refresh()`
+it only consumes the rows appended since, and starts over from the top when the
+ledger was truncated or rewritten behind its back (or its own state file is
+missing or unreadable).
+"""
+
+import zlib
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+from accountant.logging import app_logger
+
+from flet_accountant.database.schema import iter_ledger_rows
+
+# Number of bytes at the top of the ledger, whose checksum detects rewrites
+HEAD_SIZE = 4096
+
+
+class LedgerFollower(ABC):
+    """
+    Keeps some state derived from the ledger in step with it, incrementally
+
+    Args:
+        db_file_path (Path): Path of the ledger CSV file
+        state_file_path (Path): Path of the file the follower persists its state in
+    """
+
+    def __init__(self, db_file_path: Path, state_file_path: Path):
+        """
+        Keeps some state derived from the ledger in step with it, incrementally
+
+        Args:
+            db_file_path (Path): Path of the ledger CSV file
+            state_file_path (Path): Path of the file the follower persists its state in
+        """
+        self.db_file_path = Path(db_file_path)
+        self.state_file_path = Path(state_file_path)
+
+        # number of bytes of the ledger already consumed, always on a line boundary
+        self.indexed_size: int = 0
+        self._mtime_ns: int = 0
+        self._head_crc: int = 0
+        self._loaded: bool = False
+
+    #
+    # What a follower has to provide
+    #
+    @abstractmethod
+    def _reset_state(self) -> None:
+        """
+        Forgets everything derived from the ledger so far
+        """
+
+    @abstractmethod
+    def _consume(self, start: int, row: list[str]) -> None:
+        """
+        Takes in one data row of the ledger
+
+        Args:
+            start (int): Byte offset the row starts at
+            row (list[str]): The cells of the row
+        """
+
+    @abstractmethod
+    def _load(self) -> bool:
+        """
+        Loads the persisted state (including `indexed_size`, `_mtime_ns` and `_head_crc`)
+
+        Returns:
+            bool: Returns `True` if a usable state was loaded, otherwise `False`.
+        """
+
+    @abstractmethod
+    def save(self) -> None:
+        """
+        Persists the state (including `indexed_size`, `_mtime_ns` and `_head_crc`)
+        """
+
+    #
+    # Following the ledger
+    #
+    def _reset(self) -> None:
+        self._reset_state()
+        self.indexed_size = 0
+
+    def _head_checksum(self) -> int:
+        """
+        Returns the checksum of the first consumed bytes of the ledger (at most `HEAD_SIZE`)
+        """
+        try:
+            with open(self.db_file_path, "rb") as file:
+                return zlib.crc32(file.read(min(self.indexed_size, HEAD_SIZE)))
+        except OSError:
+            return 0
+
+    def _is_stale(self, size: int, mtime_ns: int) -> bool:
+        """
+        Checks whether the consumed part of the ledger was changed behind the follower's back
+
+        Args:
+            size (int): The current size of the ledger
+            mtime_ns (int): The current modification time of the ledger
+
+        Returns:
+            bool: Returns `True` if the ledger has to be consumed from the top again, otherwise `False`.
+        """
+        if size < self.indexed_size:
+            return True
+        if size == self.indexed_size:
+            return mtime_ns != self._mtime_ns
+        return self._head_checksum() != self._head_crc
+
+    def refresh(self):
+        """
+        Brings the follower up to date with the ledger, consuming only the appended rows
+        unless its state is missing or stale, and saves it when anything changed
+
+        Returns:
+            The follower itself, for chaining
+        """
+        if not self._loaded:
+            self._loaded = True
+            if not self._load():
+                self._reset()
+
+        try:
+            stat = self.db_file_path.stat()
+        except FileNotFoundError:
+            self._reset()
+            return self
+
+        if (stat.st_size, stat.st_mtime_ns) == (self.indexed_size, self._mtime_ns):
+            return self
+
+        if self._is_stale(stat.st_size, stat.st_mtime_ns):
+            app_logger.debug(f"Rebuilding the stale {self.state_file_path}")
+            self._reset()
+
+        # a half-written last row is left for the next refresh
+        end = self.indexed_size
+        with open(self.db_file_path, "rb") as file:
+            for start, end, row in iter_ledger_rows(
+                file, self.indexed_size, stat.st_size
+            ):
+                self._consume(start, row)
+            # the lines after the last row yield none (a header, blank lines), they're
+            # consumed too, up to the torn last line if any
+            file.seek(end)
+            end += file.read(stat.st_size - end).rfind(b"\n") + 1
+        self.indexed_size = end
+        self._mtime_ns = stat.st_mtime_ns
+        self._head_crc = self._head_checksum()
+        self.save()
+        return self
@@ -0,0 +1,523 @@
+"""
+Streaming bulk import of bank statements (CSV, or OFX/QFX) and legacy ledger CSVs.
+
+The file is read line by line through generators, converted to entries a chunk at a
+time and appended to the ledger in large batches, so memory stays the same however
+big the file is. Rows that can't be converted are counted and skipped, the first
+few of them are reported with the reason.
+"""
+
+import csv
+import datetime
+import re
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterator, Literal
+
+from accountant.database.entry import Entry, FlowType
+from accountant.logging import app_logger
+
+from flet_accountant.database.db import LedgerBackend
+from flet_accountant.database.filters import parse_date_time
+from flet_accountant.database.schema import ENTRY_FIELDS, parse_flow_type
+
+ImportFormat = Literal["csv", "ofx"]
+
+# Date layouts tried, in order, when the mapping doesn't name one (day first, as on Indian statements)
+DATE_FORMATS: tuple[str, ...] = (
+    "%d/%m/%Y",
+    "%d-%m-%Y",
+    "%d.%m.%Y",
+    "%d/%m/%y",
+    "%d-%m-%y",
+    "%d %b %Y",
+    "%d-%b-%Y",
+    "%d %B %Y",
+    "%d/%m/%Y %H:%M:%S",
+    "%d/%m/%Y %H:%M",
+    "%Y%m%d%H%M%S",
+    "%Y%m%d",
+)
+
+# Words banks use for the direction of a transaction, besides the `FlowType` names
+_CREDIT_WORDS = {"cr", "credit", "dep", "deposit", "int", "div", "directdep", "refund"}
+_DEBIT_WORDS = {
+    "dr",
+    "debit",
+    "withdrawal",
+    "payment",
+    "pos",
+    "atm",
+    "fee",
+    "srvchg",
+    "check",
+    "cash",
+    "directdebit",
+    "repeatpmt",
+}
+
+_CURRENCY = re.compile(r"(₹|\$|€|£|rs\.?|inr)", re.IGNORECASE)
+_OFX_TAG = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<]*)")
+
+# Header names banks commonly use, for each `Entry` field
+_HEADER_ALIASES: dict[str, tuple[str, ...]] = {
+    "name": ("name", "description", "narration", "particulars", "payee", "details"),
+    "amount": ("amount", "transaction amount", "amt"),
+    "reason": ("reason", "memo", "remarks", "reference", "ref no", "chq/ref no"),
+    "tag": ("tag", "category"),
+    "flow_type": ("flow_type", "flow type", "type", "dr/cr", "cr/dr", "transaction type"),
+    "date_time": (
+        "date_time",
+        "date",
+        "txn date",
+        "transaction date",
+        "value date",
+        "posted date",
+    ),
+    "debit": ("debit", "withdrawal", "withdrawal amt", "withdrawal amount", "debit amount"),
+    "credit": ("credit", "deposit", "deposit amt", "deposit amount", "credit amount"),
+}
+
+
+@dataclass
+class ColumnMapping:
+    """
+    Which column of the source file holds each `Entry` field. A field mapped to `None`
+    (or to a column the file doesn't have) is left empty.
+
+    Attributes:
+        name (str | None): Column of the entry's name
+        amount (str | None): Column of the signed amount, negative amounts are debits
+        reason (str | None): Column of the entry's reason
+        tag (str | None): Column of the entry's tag
+        flow_type (str | None): Column of the flow type, when missing it follows the amount's sign
+        date_time (str | None): Column of the date (and time)
+        debit (str | None): Column of the withdrawn amount, for statements splitting debits and credits
+        credit (str | None): Column of the deposited amount, for statements splitting debits and credits
+        date_format (str | None): `strptime` layout of the dates, `None` tries `DATE_FORMATS`
+        default_tag (str | None): Tag of the entries whose tag column is empty
+    """
+
+    name: str | None = "name"
+    amount: str | None = "amount"
+    reason: str | None = "reason"
+    tag: str | None = "tag"
+    flow_type: str | None = "flow_type"
+    date_time: str | None = "date_time"
+    debit: str | None = None
+    credit: str | None = None
+    date_format: str | None = None
+    default_tag: str | None = None
+
+    @classmethod
+    def guess(cls, header: list[str]) -> "ColumnMapping":
+        """
+        Guesses the mapping from the header of a bank statement
+
+        Args:
+            header (list[str]): The column names
+
+        Returns:
+            ColumnMapping: The mapping, fields with no matching column are mapped to `None`
+        """
+        normalized = {each.strip().lower(): each for each in header}
+        columns: dict[str, str | None] = {}
+        for entry_field, aliases in _HEADER_ALIASES.items():
+            columns[entry_field] = next(
+                (normalized[alias] for alias in aliases if alias in normalized), None
+            )
+        return cls(**columns)
+
+
+@dataclass
+class ImportProgress:
+    """
+    How far an import got, reported after every chunk
+
+    Attributes:
+        total_bytes (int): Size of the source file
+        bytes_read (int): Bytes of the source file read so far
+        rows_read (int): Data rows read so far
+        rows_written (int): Entries appended to the ledger so far
+        rows_rejected (int): Rows skipped, as they couldn't be converted
+        errors (list[str]): Why the first `MAX_REPORTED_ERRORS` rejected rows were skipped
+        started_at (float): `time.monotonic()` when the import started
+        finished_at (float | None): `time.monotonic()` when the import ended
+        cancelled (bool): Whether the import was stopped before the end of the file
+        failed (bool): Whether the ledger refused a batch, which ends the import
+    """
+
+    MAX_REPORTED_ERRORS = 20
+
+    total_bytes: int = 0
+    bytes_read: int = 0
+    rows_read: int = 0
+    rows_written: int = 0
+    rows_rejected: int = 0
+    errors: list[str] = field(default_factory=list)
+    started_at: float = field(default_factory=time.monotonic)
+    finished_at: float | None = None
+    cancelled: bool = False
+    failed: bool = False
+
+    @property
+    def finished(self) -> bool:
+        return self.finished_at is not None
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def rows_per_second(self) -> float:
+        elapsed = self.elapsed
+        return self.rows_read / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def fraction(self) -> float:
+        """
+        The part of the file read so far, from `0.0` to `1.0`
+        """
+        if self.total_bytes <= 0:
+            return 1.0 if self.finished else 0.0
+        return min(self.bytes_read / self.total_bytes, 1.0)
+
+    def reject(self, row_number: int, reason: str) -> None:
+        self.rows_rejected += 1
+        if len(self.errors) < self.MAX_REPORTED_ERRORS:
+            self.errors.append(f"Row {row_number}: {reason}")
+
+
+#
+# Parsing the cells
+#
+def parse_statement_amount(text: str) -> Decimal | None:
+    """
+    Parses an amount as printed on a statement: with a currency, digit grouping,
+    a leading `-`, parentheses, or a trailing `Cr`/`Dr` for the sign
+
+    Args:
+        text (str): The cell, for example `"₹1,200.50 Dr"` or `"(45.00)"`
+
+    Returns:
+        Decimal | None: The signed amount, `None` for an empty cell
+
+    Raises:
+        ValueError: When the cell isn't an amount
+    """
+    text = _CURRENCY.sub("", text).replace(",", "").replace(" ", "").strip()
+    if not text:
+        return None
+    sign = 1
+    if text.startswith("(") and text.endswith(")"):
+        sign, text = -1, text[1:-1]
+    lowered = text.lower()
+    if lowered.endswith(("dr", "cr")):
+        sign = -1 if lowered.endswith("dr") else sign
+        text = text[:-2]
+    try:
+        return sign * Decimal(text)
+    except InvalidOperation:
+        raise ValueError(f"not an amount: {text!r}") from None
+
+
+def parse_statement_date(
+    text: str, date_format: str | None = None
+) -> datetime.datetime | None:
+    """
+    Parses a date as printed on a statement (or an OFX `DTPOSTED`)
+
+    Args:
+        text (str): The cell, for example `"15/01/2024"` or `"20240115120000.000[-5:EST]"`
+        date_format (str | None, optional): The `strptime` layout. Defaults to `None` (try ISO, then `DATE_FORMATS`).
+
+    Returns:
+        datetime.datetime | None: The date and time, `None` when it can't be parsed
+    """
+    text = text.strip()
+    if not text:
+        return None
+    if date_format is not None:
+        try:
+            return datetime.datetime.strptime(text, date_format)
+        except ValueError:
+            return None
+
+    parsed = parse_date_time(text)
+    if parsed is not None:
+        return parsed
+    # OFX dates carry fractional seconds and a time zone after the digits
+    ofx_digits = re.match(r"\d{8}(\d{6})?", text)
+    candidates = [text] if ofx_digits is None else [ofx_digits.group(0), text]
+    for candidate in candidates:
+        for each in DATE_FORMATS:
+            try:
+                return datetime.datetime.strptime(candidate, each)
+            except ValueError:
+                continue
+    return None
+
+
+def parse_statement_flow_type(text: str) -> FlowType | None:
+    """
+    Resolves the direction of a transaction, as banks write it
+
+    Args:
+        text (str): The cell, for example `"Dr"`, `"CREDIT"` or `"POS"`
+
+    Returns:
+        FlowType | None: The flow type, `None` when it can't be resolved
+    """
+    flow_type = parse_flow_type(text)
+    if flow_type is not None:
+        return flow_type
+    word = text.strip().rstrip(".").lower()
+    if word in _CREDIT_WORDS:
+        return FlowType.CREDIT
+    if word in _DEBIT_WORDS:
+        return FlowType.DEBIT
+    return None
+
+
+def entry_from_record(record: dict[str, str], mapping: ColumnMapping) -> Entry:
+    """
+    Converts one row of the source file to an `Entry`
+
+    Args:
+        record (dict[str, str]): The row, keyed by column name
+        mapping (ColumnMapping): Which column holds which field
+
+    Returns:
+        Entry: The entry
+
+    Raises:
+        ValueError: When the row has no valid amount, date or name
+    """
+
+    def cell(column: str | None) -> str:
+        return (record.get(column) or "").strip() if column else ""
+
+    amount = parse_statement_amount(cell(mapping.amount))
+    if amount is None:
+        debit = parse_statement_amount(cell(mapping.debit))
+        credit = parse_statement_amount(cell(mapping.credit))
+        if debit:
+            amount = -abs(debit)
+        elif credit is not None:
+            amount = abs(credit)
+    if amount is None:
+        raise ValueError("no amount")
+
+    date_time = parse_statement_date(cell(mapping.date_time), mapping.date_format)
+    if date_time is None:
+        raise ValueError(f"not a date: {cell(mapping.date_time)!r}")
+
+    reason = cell(mapping.reason)
+    name = cell(mapping.name) or reason
+    if not name:
+        raise ValueError("no name")
+
+    flow_type = parse_statement_flow_type(cell(mapping.flow_type))
+    if flow_type is None:
+        flow_type = FlowType.DEBIT if amount < 0 else FlowType.CREDIT
+
+    entry = Entry(name=name, amount=abs(amount), reason=reason)
+    tag = cell(mapping.tag)
+    entry.tag = tag if tag and tag.lower() != "none" else mapping.default_tag
+    entry.flow_type = flow_type
+    entry.date_time = str(date_time.replace(microsecond=0))
+    return entry
+
+
+#
+# Reading the source file
+#
+def _iter_lines(
+    file: BinaryIO, progress: ImportProgress, encoding: str
+) -> Iterator[str]:
+    """
+    Yields the decoded lines of the file, counting the bytes read into `progress`
+    """
+    for line in file:
+        progress.bytes_read += len(line)
+        yield line.decode(encoding, errors="replace")
+
+
+def iter_csv_records(
+    lines: Iterator[str], has_header: bool = True
+) -> tuple[list[str], Iterator[dict[str, str]]]:
+    """
+    Reads CSV rows as records, keyed by column name
+
+    Args:
+        lines (Iterator[str]): The lines of the file
+        has_header (bool, optional): Whether the first row names the columns. Defaults to `True`;
+            without a header the columns are read in the ledger's own `ENTRY_FIELDS` order.
+
+    Returns:
+        tuple[list[str], Iterator[dict[str, str]]]: The column names, and the records (lazily)
+    """
+    reader = csv.reader(lines)
+    header = next(reader, []) if has_header else list(ENTRY_FIELDS)
+    header = [each.strip() for each in header]
+    return header, (dict(zip(header, row)) for row in reader if any(row))
+
+
+def iter_ofx_records(lines: Iterator[str]) -> Iterator[dict[str, str]]:
+    """
+    Reads the `<STMTTRN>` transactions of an OFX/QFX statement (SGML or XML flavour),
+    as records keyed like the ledger's own columns
+
+    Args:
+        lines (Iterator[str]): The lines of the file
+
+    Yields:
+        dict[str, str]: Each transaction
+    """
+    transaction: dict[str, str] | None = None
+    for line in lines:
+        for closing, tag, value in _OFX_TAG.findall(line):
+            tag = tag.upper()
+            if tag == "STMTTRN":
+                if closing and transaction is not None:
+                    yield {
+                        "name": transaction.get("NAME") or transaction.get("PAYEE", ""),
+                        "amount": transaction.get("TRNAMT", ""),
+                        "reason": transaction.get("MEMO", ""),
+                        "flow_type": transaction.get("TRNTYPE", ""),
+                        "date_time": transaction.get("DTPOSTED", ""),
+                    }
+                transaction = None if closing else {}
+            elif transaction is not None and not closing:
+                transaction[tag] = value.strip()
+
+
+def detect_format(file_path: Path) -> ImportFormat:
+    """
+    Returns the format of the file, from its suffix
+    """
+    return "ofx" if Path(file_path).suffix.lower() in (".ofx", ".qfx") else "csv"
+
+
+class BulkImporter:
+    """
+    Imports statements into the ledger, streaming them a chunk at a time
+
+    Args:
+        db_connection (LedgerBackend): The ledger to append the entries to
+        mapping (ColumnMapping | None, optional): Which column holds which field. Defaults to `None` (guessed from the CSV header).
+        chunk_size (int, optional): Number of entries appended at a time. Defaults to `DEFAULT_CHUNK_SIZE`.
+        write (Callable[[list[Entry]], bool] | None, optional): Appends a chunk (through a write queue, ...). Defaults to `None` (`db_connection.write`).
+    """
+
+    DEFAULT_CHUNK_SIZE = 5_000
+    # Rows read between two polls of `on_progress` and `should_stop`, whether or not they
+    # were written (a statement may be mostly rejected rows)
+    POLL_ROWS = 1_000
+
+    def __init__(
+        self,
+        db_connection: LedgerBackend,
+        mapping: ColumnMapping | None = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        write: Callable[[list[Entry]], bool] | None = None,
+    ):
+        """
+        Imports statements into the ledger, streaming them a chunk at a time
+
+        Args:
+            db_connection (LedgerBackend): The ledger to append the entries to
+            mapping (ColumnMapping | None, optional): Which column holds which field. Defaults to `None` (guessed from the CSV header).
+            chunk_size (int, optional): Number of entries appended at a time. Defaults to `DEFAULT_CHUNK_SIZE`.
+            write (Callable[[list[Entry]], bool] | None, optional): Appends a chunk (through a write queue, ...). Defaults to `None` (`db_connection.write`).
+        """
+        self.db_connection = db_connection
+        self.mapping = mapping
+        self.chunk_size = max(chunk_size, 1)
+        self._write = write if write is not None else db_connection.write
+
+    def import_file(
+        self,
+        file_path: Path,
+        file_format: ImportFormat | None = None,
+        has_header: bool = True,
+        encoding: str = "utf-8-sig",
+        on_progress: Callable[[ImportProgress], None] | None = None,
+        should_stop: Callable[[], bool] | None = None,
+    ) -> ImportProgress:
+        """
+        Imports a statement, blocking until it's done (run it off the event loop)
+
+        Args:
+            file_path (Path): The statement to import
+            file_format (ImportFormat | None, optional): `"csv"` or `"ofx"`. Defaults to `None` (from the suffix).
+            has_header (bool, optional): Whether the first CSV row names the columns. Defaults to `True`.
+            encoding (str, optional): Encoding of the file. Defaults to `"utf-8-sig"`.
+            on_progress (Callable[[ImportProgress], None] | None, optional): Called every `POLL_ROWS` rows read, and at the end. Defaults to `None`.
+            should_stop (Callable[[], bool] | None, optional): Polled every `POLL_ROWS` rows read, the import stops once it returns `True`. Defaults to `None`.
+
+        Returns:
+            ImportProgress: The final tally
+        """
+        file_path = Path(file_path)
+        file_format = file_format or detect_format(file_path)
+        progress = ImportProgress(total_bytes=file_path.stat().st_size)
+        app_logger.info(f"Importing {file_path} ({file_format})")
+
+        with open(file_path, "rb") as file:
+            lines = _iter_lines(file, progress, encoding)
+            if file_format == "ofx":
+                records = iter_ofx_records(lines)
+                mapping = self.mapping or ColumnMapping()
+            else:
+                header, records = iter_csv_records(lines, has_header)
+                mapping = self.mapping or (
+                    ColumnMapping.guess(header) if has_header else ColumnMapping()
+                )
+
+            chunk: list[Entry] = []
+            for record in records:
+                progress.rows_read += 1
+                try:
+                    chunk.append(entry_from_record(record, mapping))
+                except ValueError as error:
+                    progress.reject(progress.rows_read, str(error))
+                if len(chunk) >= self.chunk_size:
+                    written = self._write_chunk(chunk, progress)
+                    chunk = []
+                    if not written:
+                        break
+                if progress.rows_read % self.POLL_ROWS == 0:
+                    if on_progress is not None:
+                        on_progress(progress)
+                    if should_stop is not None and should_stop():
+                        progress.cancelled = True
+                        break
+            # what was read before the end (or the cancellation) is written all the same
+            if chunk:
+                self._write_chunk(chunk, progress)
+
+        progress.finished_at = time.monotonic()
+        app_logger.info(
+            f"Imported {progress.rows_written} of {progress.rows_read} rows of {file_path} "
+            f"in {progress.elapsed:.1f}s ({progress.rows_per_second:.0f} rows/s)"
+        )
+        if on_progress is not None:
+            on_progress(progress)
+        return progress
+
+    def _write_chunk(self, chunk: list[Entry], progress: ImportProgress) -> bool:
+        """
+        Appends a chunk of entries to the ledger
+
+        Returns:
+            bool: Returns `True` if the chunk was written, otherwise `False` (and the import fails).
+        """
+        if not self._write(chunk):
+            app_logger.error(f"Couldn't write {len(chunk)} imported entries")
+            progress.failed = True
+            return False
+        progress.rows_written += len(chunk)
+        return True
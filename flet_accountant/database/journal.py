@@ -0,0 +1,351 @@
+"""
+A write-ahead journal for the ledger CSV, so an append that was acknowledged survives a
+crash, and one that wasn't can't leave a torn line behind.
+
+Every `LedgerDataBase.write` is first appended to the journal as a single record: the
+ledger offset the rows go to, and their exact bytes, behind a CRC32. Only then are the
+rows appended to the ledger, and the write returns once the record is on disk.
+
+Records are made durable by group commit: a writer waiting for its record becomes the
+leader, waits out what's left of `sync_window` since the last fsync so the records of
+other writers pile up, and fsyncs them all at once; the writers that came in meanwhile
+just wait for that fsync.
+With the write queue, a whole batch of entries is a single record already, so even a
+window of `0` costs one fsync per batch, not per entry.
+
+The ledger itself is only fsynced at checkpoints, once the journal outgrows
+`checkpoint_bytes`, after which the journal is emptied. After a crash, `recover_ledger`
+replays the intact records the ledger is missing, drops a torn last record, and cuts
+off a torn last line of the ledger.
+"""
+
+import os
+import struct
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO
+
+from accountant.logging import app_logger
+
+# Record header: magic, ledger offset, payload length and CRC32 (of the offset, the
+# length and the payload)
+_MAGIC = b"LJR1"
+_HEADER = struct.Struct("<4sQII")
+_CHECKED = struct.Struct("<QI")
+
+
+def _checksum(offset: int, payload: bytes) -> int:
+    return zlib.crc32(payload, zlib.crc32(_CHECKED.pack(offset, len(payload))))
+
+
+def encode_record(offset: int, payload: bytes) -> bytes:
+    """
+    Frames the rows appended at `offset` as a journal record
+
+    Args:
+        offset (int): Size of the ledger before the rows are appended
+        payload (bytes): The rows, exactly as they are appended to the ledger
+
+    Returns:
+        bytes: The record
+    """
+    return (
+        _HEADER.pack(_MAGIC, offset, len(payload), _checksum(offset, payload))
+        + payload
+    )
+
+
+def read_records(journal_file_path: Path) -> tuple[list[tuple[int, bytes]], int]:
+    """
+    Reads the intact records of a journal, stopping at the first torn or corrupt one
+
+    Args:
+        journal_file_path (Path): The journal
+
+    Returns:
+        tuple[list[tuple[int, bytes]], int]: The `(ledger offset, payload)` of every intact
+        record, in order, and the number of bytes they span
+    """
+    try:
+        data = Path(journal_file_path).read_bytes()
+    except FileNotFoundError:
+        return [], 0
+
+    records: list[tuple[int, bytes]] = []
+    position = 0
+    while position + _HEADER.size <= len(data):
+        magic, offset, length, crc = _HEADER.unpack_from(data, position)
+        start = position + _HEADER.size
+        payload = data[start : start + length]
+        if (
+            magic != _MAGIC
+            or len(payload) != length
+            or _checksum(offset, payload) != crc
+        ):
+            break
+        records.append((offset, payload))
+        position = start + length
+    return records, position
+
+
+def _end_of_last_line(file: BinaryIO, size: int, chunk_size: int = 64 * 1024) -> int:
+    """
+    Returns the offset right after the last line terminator of a file, `0` without any
+    """
+    end = size
+    while end > 0:
+        start = max(0, end - chunk_size)
+        file.seek(start)
+        line_end = file.read(end - start).rfind(b"\n")
+        if line_end >= 0:
+            return start + line_end + 1
+        end = start
+    return 0
+
+
+def _fsync_file(file_path: Path) -> None:
+    with open(file_path, "rb+") as file:
+        os.fsync(file.fileno())
+
+
+class LedgerJournal:
+    """
+    The write-ahead journal of a ledger, with group commit
+
+    Args:
+        journal_file_path (Path): Path of the journal file
+        sync_window (float, optional): Seconds a commit waits for more records to share its fsync. Defaults to `DEFAULT_SYNC_WINDOW`.
+        checkpoint_bytes (int, optional): Size of the journal that triggers a checkpoint. Defaults to `DEFAULT_CHECKPOINT_BYTES`.
+    """
+
+    DEFAULT_SYNC_WINDOW = 0.0
+    DEFAULT_CHECKPOINT_BYTES = 4 * 1024 * 1024
+
+    def __init__(
+        self,
+        journal_file_path: Path,
+        sync_window: float = DEFAULT_SYNC_WINDOW,
+        checkpoint_bytes: int = DEFAULT_CHECKPOINT_BYTES,
+    ):
+        """
+        The write-ahead journal of a ledger, with group commit
+
+        Args:
+            journal_file_path (Path): Path of the journal file
+            sync_window (float, optional): Seconds a commit waits for more records to share its fsync. Defaults to `DEFAULT_SYNC_WINDOW`.
+            checkpoint_bytes (int, optional): Size of the journal that triggers a checkpoint. Defaults to `DEFAULT_CHECKPOINT_BYTES`.
+        """
+        self.journal_file_path = Path(journal_file_path)
+        self.sync_window = max(0.0, sync_window)
+        self.checkpoint_bytes = max(1, checkpoint_bytes)
+
+        # a fresh install (the exporter's command line, ...) has no database folder yet
+        self.journal_file_path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.journal_file_path, "ab")
+        # held by a writer from its record to its rows being in the ledger, so ledgers
+        # sharing the journal append in journal order, and checkpoints see every row
+        self.lock = threading.RLock()
+        self._condition = threading.Condition()
+        # positions in the stream of records ever appended, they keep growing across checkpoints
+        self._appended: int = 0
+        self._synced: int = 0
+        self._syncing: bool = False
+        self._last_sync: float = 0.0
+        self._last_record_start: int | None = None
+        self.syncs: int = 0
+
+    @property
+    def size(self) -> int:
+        """
+        Number of bytes in the journal file
+        """
+        return self._file.tell()
+
+    def append(self, offset: int, payload: bytes) -> int:
+        """
+        Appends a record, without waiting for it to be on disk
+
+        Args:
+            offset (int): Size of the ledger before the rows are appended
+            payload (bytes): The rows, exactly as they are appended to the ledger
+
+        Returns:
+            int: The position to `commit()` the record up to
+        """
+        record = encode_record(offset, payload)
+        with self._condition:
+            self._last_record_start = self._file.tell()
+            self._file.write(record)
+            self._file.flush()
+            self._appended += len(record)
+            return self._appended
+
+    def discard_last(self) -> None:
+        """
+        Takes back the last appended record, when its rows couldn't be appended to the ledger.
+        The caller must hold `lock` since the `append()`.
+        """
+        with self._condition:
+            if self._last_record_start is None:
+                return
+            self._appended -= self._file.tell() - self._last_record_start
+            self._file.truncate(self._last_record_start)
+            self._file.seek(self._last_record_start)
+            self._last_record_start = None
+
+    def commit(self, position: int) -> bool:
+        """
+        Waits until the records up to `position` are on disk, fsyncing them (and every
+        record appended meanwhile) unless another writer already is
+
+        Args:
+            position (int): What `append()` returned
+
+        Returns:
+            bool: Returns `True` once the records are durable, `False` if the fsync failed.
+        """
+        with self._condition:
+            while self._synced < position and self._syncing:
+                self._condition.wait()
+            if self._synced >= position:
+                return True
+            self._syncing = True
+
+        synced = False
+        target = position
+        try:
+            delay = self._last_sync + self.sync_window - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            with self._condition:
+                target = self._appended
+            os.fsync(self._file.fileno())
+            synced = True
+        except OSError:
+            app_logger.exception(f"Couldn't fsync the journal {self.journal_file_path}")
+        finally:
+            with self._condition:
+                self._syncing = False
+                if synced:
+                    self._synced = max(self._synced, target)
+                    self._last_sync = time.monotonic()
+                    self.syncs += 1
+                self._condition.notify_all()
+        return synced
+
+    def needs_checkpoint(self) -> bool:
+        return self.size >= self.checkpoint_bytes
+
+    def checkpoint(self, db_file_path: Path) -> None:
+        """
+        Fsyncs the ledger, then empties the journal, whose records it now holds for good.
+        The caller must hold `lock`.
+
+        Args:
+            db_file_path (Path): The ledger the records were appended to
+        """
+        _fsync_file(db_file_path)
+        with self._condition:
+            self._file.truncate(0)
+            self._file.seek(0)
+            self._last_record_start = None
+            os.fsync(self._file.fileno())
+            # the ledger is on disk, so is everything appended so far
+            self._synced = self._appended
+            self._condition.notify_all()
+        app_logger.debug(f"Checkpointed the journal into {db_file_path}")
+
+    def close(self) -> None:
+        """
+        Closes the journal file, its records are left for `recover_ledger`
+        """
+        with self._condition:
+            if not self._file.closed:
+                self._file.close()
+
+
+@dataclass
+class JournalRecovery:
+    """
+    What `recover_ledger` did to the ledger
+
+    Attributes:
+        replayed (int): Records that were (re-)applied to the ledger
+        already_applied (int): Records the ledger already held
+        dropped_journal_bytes (int): Bytes of a torn or corrupt journal tail dropped
+        dropped_ledger_bytes (int): Bytes of a torn last ledger line dropped
+    """
+
+    replayed: int = 0
+    already_applied: int = 0
+    dropped_journal_bytes: int = 0
+    dropped_ledger_bytes: int = 0
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.replayed or self.dropped_ledger_bytes)
+
+
+def recover_ledger(db_file_path: Path, journal_file_path: Path) -> JournalRecovery:
+    """
+    Brings the ledger back to a consistent state after a crash: the intact journal records
+    it's missing are replayed, a torn last line is cut off, and the journal is emptied.
+    Meant to run before the ledger is opened.
+
+    Args:
+        db_file_path (Path): The ledger CSV file
+        journal_file_path (Path): Its journal
+
+    Returns:
+        JournalRecovery: What was done
+    """
+    db_file_path, journal_file_path = Path(db_file_path), Path(journal_file_path)
+    recovery = JournalRecovery()
+    if not journal_file_path.exists() and not db_file_path.exists():
+        return recovery
+
+    records, intact = read_records(journal_file_path)
+    if journal_file_path.exists():
+        recovery.dropped_journal_bytes = journal_file_path.stat().st_size - intact
+
+    db_file_path.touch()
+    with open(db_file_path, "rb+") as ledger:
+        for offset, payload in records:
+            size = ledger.seek(0, os.SEEK_END)
+            if size >= offset + len(payload):
+                ledger.seek(offset)
+                if ledger.read(len(payload)) == payload:
+                    recovery.already_applied += 1
+                    continue
+            if size < offset:
+                app_logger.warning(
+                    f"{db_file_path} ends at {size}, before a journal record at {offset}"
+                )
+                offset = size
+            # whatever follows was never acknowledged, the record wins
+            ledger.truncate(offset)
+            ledger.seek(offset)
+            ledger.write(payload)
+            recovery.replayed += 1
+
+        # a torn last line, left by a crash in the middle of an unjournaled append
+        size = ledger.seek(0, os.SEEK_END)
+        keep = _end_of_last_line(ledger, size)
+        if keep < size:
+            ledger.truncate(keep)
+            recovery.dropped_ledger_bytes = size - keep
+
+        ledger.flush()
+        os.fsync(ledger.fileno())
+
+    if journal_file_path.exists() and journal_file_path.stat().st_size:
+        with open(journal_file_path, "rb+") as journal:
+            journal.truncate(0)
+            os.fsync(journal.fileno())
+
+    if recovery.changed or recovery.dropped_journal_bytes:
+        app_logger.warning(f"Recovered {db_file_path} from its journal: {recovery}")
+    return recovery
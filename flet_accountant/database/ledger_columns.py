@@ -0,0 +1,403 @@
+"""
+A compact, in-memory representation of a ledger, column by column.
+
+A list of `Entry` objects costs a `Decimal`, a few strings and an enum per entry,
+several hundred bytes each. `LedgerColumns` keeps every field in a packed array
+instead, with the encodings of the columnar storage engine (see `encoding`):
+
+    - `amounts`    : int64, the amount in paise
+    - `timestamps` : int64, epoch seconds of `date_time`
+    - `names`, `reasons`, `tags` : int32 ids, into interned string dictionaries
+    - `flow_types` : int8 id, the position of the `FlowType` member
+
+which is about 29 bytes an entry, plus each distinct string once. `Entry` objects are
+only built on demand (for a page of the table, ...), filters and searches run on the
+encoded columns, and slices share the dictionaries of the columns they're cut from.
+It implements `LedgerBackend`, so it can be put behind an `AsyncLedgerDataBase`.
+"""
+
+import threading
+from array import array
+from decimal import Decimal
+from typing import Iterable, Iterator, overload
+
+from accountant.database.entry import Entry, FlowType
+
+from flet_accountant.database.db import LedgerBackend
+from flet_accountant.database.encoding import (
+    FLOW_TYPES,
+    NO_ID,
+    StringDictionary,
+    decode_entry,
+    encode_entry,
+)
+from flet_accountant.database.filters import EntryFilter
+from flet_accountant.database.schema import (
+    NO_TIMESTAMP,
+    paise_to_amount,
+    timestamp_from_datetime,
+)
+from flet_accountant.database.search_index import tokenize
+
+
+class LedgerColumns(LedgerBackend):
+    """
+    Holds a ledger in memory as packed columns, and serves `Entry` views of it on demand
+
+    Args:
+        entries (Iterable[Entry] | None, optional): The entries to start with. Defaults to `None`.
+    """
+
+    def __init__(self, entries: Iterable[Entry] | None = None):
+        """
+        Holds a ledger in memory as packed columns, and serves `Entry` views of it on demand
+
+        Args:
+            entries (Iterable[Entry] | None, optional): The entries to start with. Defaults to `None`.
+        """
+        self.amounts = array("q")
+        self.timestamps = array("q")
+        self.names = array("i")
+        self.reasons = array("i")
+        self.tags = array("i")
+        self.flow_types = array("b")
+        self.name_dictionary = StringDictionary()
+        self.reason_dictionary = StringDictionary()
+        self.tag_dictionary = StringDictionary()
+        self._lock = threading.RLock()
+        if entries is not None:
+            self.extend(entries)
+
+    @classmethod
+    def from_backend(cls, source: LedgerBackend) -> "LedgerColumns":
+        """
+        Loads a whole ledger (of any storage engine) into memory
+
+        Args:
+            source (LedgerBackend): The ledger to load
+
+        Returns:
+            LedgerColumns: The ledger's entries, as columns
+        """
+        return cls(source.iter_entries())
+
+    @property
+    def _columns(self) -> tuple[array, ...]:
+        return (
+            self.amounts,
+            self.timestamps,
+            self.names,
+            self.reasons,
+            self.tags,
+            self.flow_types,
+        )
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+    def nbytes(self) -> int:
+        """
+        Returns the size of the packed columns in bytes (the interned strings aren't counted)
+        """
+        return sum(len(column) * column.itemsize for column in self._columns)
+
+    #
+    # Adding entries
+    #
+    def append(self, entry: Entry) -> None:
+        """
+        Appends an entry to every column
+
+        Args:
+            entry (Entry): The entry to append
+        """
+        row = encode_entry(
+            entry, self.name_dictionary, self.reason_dictionary, self.tag_dictionary
+        )
+        with self._lock:
+            for column, value in zip(self._columns, row):
+                column.append(value)
+
+    def extend(self, entries: Iterable[Entry]) -> None:
+        """
+        Appends the entries to every column
+
+        Args:
+            entries (Iterable[Entry]): The entries to append
+        """
+        with self._lock:
+            for entry in entries:
+                self.append(entry)
+
+    #
+    # Entry views and slices
+    #
+    def entry_at(self, index: int) -> Entry:
+        """
+        Builds the `Entry` of a row
+
+        Args:
+            index (int): Index of the row, negative indexes count from the end
+
+        Returns:
+            Entry: A new `Entry`, changing it doesn't change the columns
+        """
+        return decode_entry(
+            [column[index] for column in self._columns],
+            self.name_dictionary,
+            self.reason_dictionary,
+            self.tag_dictionary,
+        )
+
+    @overload
+    def __getitem__(self, key: int) -> Entry: ...
+
+    @overload
+    def __getitem__(self, key: slice) -> "LedgerColumns": ...
+
+    def __getitem__(self, key: int | slice) -> "Entry | LedgerColumns":
+        if isinstance(key, slice):
+            return self.slice(key)
+        return self.entry_at(key)
+
+    def slice(self, rows: slice) -> "LedgerColumns":
+        """
+        Cuts a range of rows out, as columns of their own. The string dictionaries are shared.
+
+        Args:
+            rows (slice): The rows, for example `slice(100, 200)`
+
+        Returns:
+            LedgerColumns: A copy of the rows' columns
+        """
+        part = LedgerColumns()
+        part.name_dictionary = self.name_dictionary
+        part.reason_dictionary = self.reason_dictionary
+        part.tag_dictionary = self.tag_dictionary
+        part._lock = self._lock
+        with self._lock:
+            part.amounts = self.amounts[rows]
+            part.timestamps = self.timestamps[rows]
+            part.names = self.names[rows]
+            part.reasons = self.reasons[rows]
+            part.tags = self.tags[rows]
+            part.flow_types = self.flow_types[rows]
+        return part
+
+    def read_entries_at(self, row_ids: list[int]) -> list[Entry]:
+        """
+        Builds the entries of the given rows (of a search, ...)
+
+        Args:
+            row_ids (list[int]): Indexes of the rows
+
+        Returns:
+            list[Entry]: The entries, in the order of `row_ids`
+        """
+        return [self.entry_at(each) for each in row_ids if 0 <= each < len(self)]
+
+    def __iter__(self) -> Iterator[Entry]:
+        return self.iter_entries()
+
+    #
+    # Filtering and searching, on the encoded columns
+    #
+    def matching_rows(self, entry_filter: EntryFilter | None = None) -> Iterator[int]:
+        """
+        Yields the indexes of the rows that pass the filter, without building any `Entry`
+
+        Args:
+            entry_filter (EntryFilter | None, optional): The filter, `None` lets everything through. Defaults to `None`.
+
+        Yields:
+            int: Index of each matching row, in order
+        """
+        length = len(self)
+        if entry_filter is None:
+            yield from range(length)
+            return
+
+        flow_type_ids = (
+            None
+            if entry_filter.flow_types is None
+            else {FLOW_TYPES.index(each) for each in entry_filter.flow_types}
+        )
+        tag_ids = (
+            None
+            if entry_filter.tags is None
+            else self.tag_dictionary.ids_where(lambda tag: tag in entry_filter.tags)  # type: ignore
+        )
+        name_ids = (
+            None
+            if entry_filter.name is None
+            else self.name_dictionary.ids_where(
+                lambda name: entry_filter.name.lower() in name.lower()  # type: ignore
+            )
+        )
+        start, end = (
+            None if value is None else timestamp_from_datetime(value)
+            for value in (entry_filter.start, entry_filter.end)
+        )
+
+        for index in range(length):
+            if flow_type_ids is not None and self.flow_types[index] not in flow_type_ids:
+                continue
+            if tag_ids is not None and self.tags[index] not in tag_ids:
+                continue
+            if name_ids is not None and self.names[index] not in name_ids:
+                continue
+            if start is not None or end is not None:
+                timestamp = self.timestamps[index]
+                if timestamp == NO_TIMESTAMP:
+                    continue
+                if start is not None and timestamp < start:
+                    continue
+                if end is not None and timestamp >= end:
+                    continue
+            yield index
+
+    def search(self, text: str) -> list[int]:
+        """
+        Finds the rows that contain, for every word of the text, a word starting with it in
+        their name, reason or tag, as `SearchIndex.search` does
+
+        Args:
+            text (str): What the user typed, for example `"gro mil"`
+
+        Returns:
+            list[int]: Indexes of the matching rows, in order; empty for a blank text
+        """
+        prefixes = set(tokenize(text))
+        if not prefixes:
+            return []
+
+        def ids_by_prefix(dictionary: StringDictionary) -> list[set[int]]:
+            # every distinct string is tokenized once, the rows only look their ids up
+            words = [tokenize(value) for value in dictionary.values]
+            return [
+                {
+                    index
+                    for index, value_words in enumerate(words)
+                    if any(word.startswith(prefix) for word in value_words)
+                }
+                for prefix in prefixes
+            ]
+
+        # per prefix, the name, reason and tag ids with a word starting with it
+        wanted = list(
+            zip(
+                ids_by_prefix(self.name_dictionary),
+                ids_by_prefix(self.reason_dictionary),
+                ids_by_prefix(self.tag_dictionary),
+            )
+        )
+        return [
+            index
+            for index, (name, reason, tag) in enumerate(
+                zip(self.names, self.reasons, self.tags)
+            )
+            if all(
+                name in name_ids or reason in reason_ids or tag in tag_ids
+                for name_ids, reason_ids, tag_ids in wanted
+            )
+        ]
+
+    #
+    # `LedgerBackend`
+    #
+    def write(self, entries: list[Entry]) -> bool:
+        """
+        Appends the entries (in memory only)
+
+        Args:
+            entries (list[Entry]): The entries to append
+
+        Returns:
+            bool: Always `True`
+        """
+        self.extend(entries)
+        return True
+
+    def count(self, entry_filter: EntryFilter | None = None) -> int:
+        """
+        Returns the number of entries
+
+        Args:
+            entry_filter (EntryFilter | None, optional): Count only the matching entries. Defaults to `None`.
+        """
+        if entry_filter is None:
+            return len(self)
+        return sum(1 for _ in self.matching_rows(entry_filter))
+
+    def iter_entries(self, start: int = 0) -> Iterator[Entry]:
+        """
+        Lazily yields the entries, in order
+
+        Args:
+            start (int, optional): Index of the first entry to yield. Defaults to `0`.
+
+        Yields:
+            Entry: Each entry
+        """
+        for index in range(max(start, 0), len(self)):
+            yield self.entry_at(index)
+
+    def read_entries(
+        self, offset: int, limit: int, entry_filter: EntryFilter | None = None
+    ) -> list[Entry]:
+        """
+        Reads a window of entries
+
+        Args:
+            offset (int): Index of the first entry to read (among the matching ones)
+            limit (int): Maximum number of entries to read
+            entry_filter (EntryFilter | None, optional): Read only the matching entries. Defaults to `None`.
+
+        Returns:
+            list[Entry]: At most `limit` entries, starting at `offset`
+        """
+        if limit <= 0:
+            return []
+        if entry_filter is None:
+            stop = min(max(offset, 0) + limit, len(self))
+            return [self.entry_at(index) for index in range(max(offset, 0), stop)]
+
+        window: list[Entry] = []
+        for index in self.matching_rows(entry_filter):
+            if offset > 0:
+                offset -= 1
+                continue
+            window.append(self.entry_at(index))
+            if len(window) >= limit:
+                break
+        return window
+
+    def totals_by_flow_type(self) -> dict[FlowType, Decimal]:
+        """
+        Sums up the amounts, per flow type, straight off the columns
+
+        Returns:
+            dict[FlowType, Decimal]: The total amount of every flow type
+        """
+        paise = [0] * len(FLOW_TYPES)
+        for flow_type, amount in zip(self.flow_types, self.amounts):
+            if flow_type != NO_ID:
+                paise[flow_type] += amount
+        return {
+            each: paise_to_amount(paise[index]) for index, each in enumerate(FLOW_TYPES)
+        }
+
+    def totals_by_tag(self) -> dict[str | None, Decimal]:
+        """
+        Sums up the amounts, per tag
+
+        Returns:
+            dict[str | None, Decimal]: The total amount of every tag, `None` for the untagged entries
+        """
+        paise: dict[int, int] = {}
+        for tag, amount in zip(self.tags, self.amounts):
+            paise[tag] = paise.get(tag, 0) + amount
+        return {
+            self.tag_dictionary.decode(tag): paise_to_amount(total)
+            for tag, total in paise.items()
+        }
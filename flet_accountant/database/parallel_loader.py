@@ -0,0 +1,253 @@
+"""
+Loads a (very) large ledger CSV into `LedgerColumns`, parsing it on every core.
+
+The file is split into as many byte ranges as there are workers, each range starting
+and ending on a line boundary (a row of the ledger is always a single line). Every
+range is parsed in a process of its own, into a `ColumnChunk`: packed arrays of paise,
+timestamps and flow types, and the ids of its names, reasons and tags into the chunk's
+own string dictionaries. The chunks are then merged back in file order, re-encoding the
+ids into the shared dictionaries, which costs one C-level lookup per cell.
+
+Small files are parsed in the calling process, starting the processes wouldn't pay off.
+If the process pool can't be used (no `fork`/`spawn` allowed, a worker died ...), the
+loader falls back to a single process as well.
+"""
+
+import csv
+import io
+import multiprocessing
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from accountant.logging import app_logger
+
+from flet_accountant.database.encoding import NO_ID, encode_flow_type
+from flet_accountant.database.ledger_columns import LedgerColumns
+from flet_accountant.database.schema import (
+    ENTRY_FIELDS,
+    amount_to_paise,
+    is_header_row,
+    parse_amount,
+    parse_flow_type,
+    timestamp_from_text,
+)
+
+# Files smaller than this are parsed in a single process
+DEFAULT_MIN_PARALLEL_BYTES = 16 * 1024 * 1024
+
+# The app runs threads (Flet, the write queue, the logging listener ...), which `fork`
+# doesn't mix well with, so the workers are started fresh
+_START_METHOD = "spawn"
+
+_NAME, _AMOUNT, _REASON, _TAG, _FLOW_TYPE, _DATE_TIME = (
+    ENTRY_FIELDS.index(each)
+    for each in ("name", "amount", "reason", "tag", "flow_type", "date_time")
+)
+
+
+@dataclass
+class ColumnChunk:
+    """
+    The parsed rows of one byte range of the ledger, encoded like `LedgerColumns`, with
+    string ids into the chunk's own dictionaries
+
+    Attributes:
+        start (int): Byte offset the range starts at
+        amounts (array): int64, the amounts in paise
+        timestamps (array): int64, epoch seconds of `date_time`
+        names (array): int32, ids into `name_values`
+        reasons (array): int32, ids into `reason_values`
+        tags (array): int32, ids into `tag_values`
+        flow_types (array): int8, positions of the `FlowType` members
+        name_values (list[str]): Distinct names of the chunk
+        reason_values (list[str]): Distinct reasons of the chunk
+        tag_values (list[str]): Distinct tags of the chunk
+    """
+
+    start: int
+    amounts: array = field(default_factory=lambda: array("q"))
+    timestamps: array = field(default_factory=lambda: array("q"))
+    names: array = field(default_factory=lambda: array("i"))
+    reasons: array = field(default_factory=lambda: array("i"))
+    tags: array = field(default_factory=lambda: array("i"))
+    flow_types: array = field(default_factory=lambda: array("b"))
+    name_values: list[str] = field(default_factory=list)
+    reason_values: list[str] = field(default_factory=list)
+    tag_values: list[str] = field(default_factory=list)
+
+
+def split_ranges(file_path: Path, parts: int) -> list[tuple[int, int]]:
+    """
+    Splits a file into about `parts` byte ranges of similar size, each starting and ending on a line boundary
+
+    Args:
+        file_path (Path): The file to split
+        parts (int): Number of ranges wanted
+
+    Returns:
+        list[tuple[int, int]]: The `(start, end)` byte offsets of the ranges, in order, covering the whole file
+    """
+    size = os.path.getsize(file_path)
+    if size == 0:
+        return []
+    parts = max(1, min(parts, size))
+    boundaries = [0]
+    with open(file_path, "rb") as file:
+        for part in range(1, parts):
+            offset = size * part // parts
+            if offset <= boundaries[-1]:
+                continue
+            file.seek(offset - 1)
+            # the range ends after the line the offset falls in
+            file.readline()
+            boundary = file.tell()
+            if boundary >= size:
+                break
+            if boundary > boundaries[-1]:
+                boundaries.append(boundary)
+    boundaries.append(size)
+    return list(zip(boundaries, boundaries[1:]))
+
+
+def parse_range(file_path: Path, start: int, end: int) -> ColumnChunk:
+    """
+    Parses the rows of a byte range of the ledger into a `ColumnChunk`. Runs in the worker processes.
+
+    The range must start on a line boundary. The header (at the very top) and blank lines
+    are skipped, and so is a last line that isn't terminated yet, as it may still be being written.
+
+    Args:
+        file_path (Path): The ledger CSV file
+        start (int): Byte offset the range starts at
+        end (int): Byte offset the range ends at
+
+    Returns:
+        ColumnChunk: The parsed rows
+    """
+    with open(file_path, "rb") as file:
+        file.seek(start)
+        data = file.read(end - start)
+    # an unterminated last line may still be being written
+    data = data[: data.rfind(b"\n") + 1]
+
+    chunk = ColumnChunk(start=start)
+    name_ids: dict[str, int] = {}
+    reason_ids: dict[str, int] = {}
+    tag_ids: dict[str, int] = {}
+    # a ledger only spells its flow types a few ways, each is resolved once
+    flow_type_ids: dict[str, int] = {}
+
+    def encode(value: str, ids: dict[str, int], values: list[str]) -> int:
+        index = ids.get(value)
+        if index is None:
+            index = ids[value] = len(values)
+            values.append(value)
+        return index
+
+    # `newline=""`, so the csv module sees the line terminators as they are in the file
+    reader = csv.reader(io.StringIO(data.decode("utf-8"), newline=""))
+    for row in reader:
+        if not row:
+            continue
+        if start == 0 and reader.line_num == 1 and is_header_row(row):
+            continue
+        row += [""] * (len(ENTRY_FIELDS) - len(row))
+
+        chunk.amounts.append(amount_to_paise(parse_amount(row[_AMOUNT])))
+        chunk.timestamps.append(timestamp_from_text(row[_DATE_TIME]))
+        chunk.names.append(encode(row[_NAME], name_ids, chunk.name_values))
+        chunk.reasons.append(encode(row[_REASON], reason_ids, chunk.reason_values))
+        tag = row[_TAG]
+        chunk.tags.append(
+            encode(tag, tag_ids, chunk.tag_values)
+            if tag and tag.lower() != "none"
+            else NO_ID
+        )
+        flow_type_id = flow_type_ids.get(row[_FLOW_TYPE])
+        if flow_type_id is None:
+            flow_type = parse_flow_type(row[_FLOW_TYPE])
+            flow_type_id = flow_type_ids[row[_FLOW_TYPE]] = encode_flow_type(flow_type)
+        chunk.flow_types.append(flow_type_id)
+    return chunk
+
+
+def merge_chunk(columns: LedgerColumns, chunk: ColumnChunk) -> None:
+    """
+    Appends a chunk to the columns, re-encoding its string ids into the columns' dictionaries
+
+    Args:
+        columns (LedgerColumns): The columns to append to
+        chunk (ColumnChunk): The parsed chunk
+    """
+
+    def mapping(dictionary, values: list[str]) -> list[int]:
+        # the trailing `NO_ID` is what a missing value (id `-1`) maps to
+        return [dictionary.encode(value) for value in values] + [NO_ID]
+
+    names = mapping(columns.name_dictionary, chunk.name_values)
+    reasons = mapping(columns.reason_dictionary, chunk.reason_values)
+    tags = mapping(columns.tag_dictionary, chunk.tag_values)
+
+    columns.amounts.extend(chunk.amounts)
+    columns.timestamps.extend(chunk.timestamps)
+    columns.names.extend(array("i", map(names.__getitem__, chunk.names)))
+    columns.reasons.extend(array("i", map(reasons.__getitem__, chunk.reasons)))
+    columns.tags.extend(array("i", map(tags.__getitem__, chunk.tags)))
+    columns.flow_types.extend(chunk.flow_types)
+
+
+def load_ledger_columns(
+    file_path: Path,
+    workers: int | None = None,
+    min_parallel_bytes: int = DEFAULT_MIN_PARALLEL_BYTES,
+) -> LedgerColumns:
+    """
+    Loads the whole ledger CSV into `LedgerColumns`, parsing it on `workers` processes
+
+    Args:
+        file_path (Path): The ledger CSV file
+        workers (int | None, optional): Number of processes. Defaults to `None` (one per core).
+        min_parallel_bytes (int, optional): Smaller files are parsed in this process. Defaults to `DEFAULT_MIN_PARALLEL_BYTES`.
+
+    Returns:
+        LedgerColumns: The entries of the ledger, in file order
+    """
+    file_path = Path(file_path)
+    columns = LedgerColumns()
+    if not file_path.exists():
+        return columns
+
+    size = file_path.stat().st_size
+    workers = workers if workers is not None else (os.cpu_count() or 1)
+    if workers <= 1 or size < min_parallel_bytes:
+        merge_chunk(columns, parse_range(file_path, 0, size))
+        return columns
+
+    ranges = split_ranges(file_path, workers)
+    try:
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(ranges)),
+            mp_context=multiprocessing.get_context(_START_METHOD),
+        ) as pool:
+            chunks = pool.map(
+                parse_range,
+                [file_path] * len(ranges),
+                [start for start, _ in ranges],
+                [end for _, end in ranges],
+            )
+            # `map` yields in the order of the ranges, so the entries stay in file order
+            for chunk in chunks:
+                merge_chunk(columns, chunk)
+        return columns
+
+    except (BrokenProcessPool, OSError, NotImplementedError):
+        app_logger.exception(
+            f"Couldn't load {file_path} in parallel, loading it in a single process"
+        )
+        columns = LedgerColumns()
+        merge_chunk(columns, parse_range(file_path, 0, size))
+        return columns
@@ -0,0 +1,545 @@
+"""
+A storage engine that splits the ledger into one CSV segment per year, inside a folder.
+
+    - `<year>.csv`     : the entries dated in that year, a `LedgerDataBase` of its own
+      (with its row index and aggregate cache), in the order they were written
+    - `<year>.csv.gz`  : a closed year, compacted into a read-only gzip archive
+    - `undated.csv`    : the entries whose `date_time` can't be parsed
+    - `manifest.json`  : per segment, its row count, earliest and latest `date_time`, and
+      whether it's archived (with its totals, so an archive is never read to sum it up)
+
+A query with a date range only opens the segments whose dates overlap it, and counts a
+segment it fully covers straight from the manifest. New entries only ever touch the
+segment of their year, which, for `NewEntry`, is the current (active) one. The entries
+are served year by year, the undated ones last.
+"""
+
+import datetime
+import gzip
+import json
+import os
+import shutil
+import stat
+import threading
+from dataclasses import asdict, dataclass, field
+from decimal import Decimal
+from itertools import islice
+from pathlib import Path
+from typing import Iterator
+
+from accountant.database.entry import Entry, FlowType
+from accountant.logging import app_logger
+
+from flet_accountant.database.db import (
+    LedgerBackend,
+    LedgerDataBase,
+    migrate_ledger,
+)
+from flet_accountant.database.encoding import FLOW_TYPES
+from flet_accountant.database.filters import EntryFilter, parse_date_time
+from flet_accountant.database.schema import (
+    amount_to_paise,
+    entry_from_row,
+    iter_ledger_rows,
+    paise_to_amount,
+)
+
+# Version of the manifest's layout
+_VERSION = 1
+
+# Key of the segment holding the entries without a usable `date_time`
+UNDATED = "undated"
+
+_SIDECAR_SUFFIXES: tuple[str, ...] = (".idx", ".aggregates.json", ".search.json")
+
+
+@dataclass
+class Partition:
+    """
+    What the manifest knows of one segment
+
+    Attributes:
+        key (str): The year, or `UNDATED`
+        rows (int): Number of entries
+        first (str | None): Earliest `date_time`, in ISO format
+        last (str | None): Latest `date_time`, in ISO format
+        archived (bool): Whether the segment was compacted into a gzip archive
+        paise (list[int]): Totals per flow type, in paise, kept for archived segments
+    """
+
+    key: str
+    rows: int = 0
+    first: str | None = None
+    last: str | None = None
+    archived: bool = False
+    paise: list[int] = field(default_factory=list)
+
+    @property
+    def file_name(self) -> str:
+        return f"{self.key}.csv.gz" if self.archived else f"{self.key}.csv"
+
+    def widen(self, date_time: datetime.datetime) -> None:
+        """
+        Stretches the date range of the segment to include `date_time`
+        """
+        # ISO texts of a same year compare like the dates and times they spell
+        text = date_time.isoformat(sep=" ")
+        if self.first is None or text < self.first:
+            self.first = text
+        if self.last is None or text > self.last:
+            self.last = text
+
+    def overlaps(self, entry_filter: EntryFilter) -> bool:
+        """
+        Checks whether any entry of the segment may fall in the filter's date range
+        """
+        if not entry_filter.has_date_range:
+            return True
+        if self.first is None or self.last is None:
+            # undated entries never match a date range
+            return False
+        first = datetime.datetime.fromisoformat(self.first)
+        last = datetime.datetime.fromisoformat(self.last)
+        if entry_filter.start is not None and last < entry_filter.start:
+            return False
+        if entry_filter.end is not None and first >= entry_filter.end:
+            return False
+        return True
+
+    def covered_by(self, entry_filter: EntryFilter) -> bool:
+        """
+        Checks whether every entry of the segment passes the filter, without reading it.
+        Only a filter on dates alone can tell.
+        """
+        if (
+            entry_filter.flow_types is not None
+            or entry_filter.tags is not None
+            or entry_filter.name is not None
+        ):
+            return False
+        if not entry_filter.has_date_range:
+            return True
+        if self.first is None or self.last is None:
+            return False
+        return entry_filter.matches_date_time(
+            datetime.datetime.fromisoformat(self.first)
+        ) and entry_filter.matches_date_time(datetime.datetime.fromisoformat(self.last))
+
+
+def partition_key(entry: Entry) -> str:
+    """
+    Returns the key of the segment an entry belongs in: its year, or `UNDATED`
+    """
+    date_time = parse_date_time(entry.date_time)
+    return UNDATED if date_time is None else str(date_time.year)
+
+
+def _sort_key(key: str) -> tuple[int, str]:
+    # years in order, the undated segment last
+    return (1, key) if key == UNDATED else (0, key.zfill(4))
+
+
+class PartitionedDataBase(LedgerBackend):
+    """
+    Stores the ledger as one CSV segment per year, inside `folder`, described by a manifest
+
+    Args:
+        folder (Path): The folder the segments and the manifest are kept in
+    """
+
+    # a backdated entry lands in the segment of its year, before the later years' entries
+    appends_in_order: bool = False
+
+    def __init__(self, folder: Path):
+        """
+        Stores the ledger as one CSV segment per year, inside `folder`, described by a manifest
+
+        Args:
+            folder (Path): The folder the segments and the manifest are kept in
+        """
+        self.folder = Path(folder)
+        self.manifest_file_path = self.folder / "manifest.json"
+        self._lock = threading.RLock()
+        self._partitions: dict[str, Partition] | None = None
+        # `(mtime, size)` of the manifest `_partitions` was read from (or last saved as),
+        # a manifest saved by another process since is read again
+        self._manifest_stamp: tuple[int, int] | None = None
+        # the open (not archived) segments, opened on first use
+        self._segments: dict[str, LedgerDataBase] = {}
+
+    #
+    # The manifest
+    #
+    @property
+    def partitions(self) -> list[Partition]:
+        """
+        The segments, years in order and the undated one last
+        """
+        with self._lock:
+            partitions = self._load()
+            return [partitions[key] for key in sorted(partitions, key=_sort_key)]
+
+    def _stat_manifest(self) -> tuple[int, int] | None:
+        try:
+            stat = os.stat(self.manifest_file_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self) -> dict[str, Partition]:
+        # called with the lock held
+        stamp = self._stat_manifest()
+        if self._partitions is not None and stamp == self._manifest_stamp:
+            return self._partitions
+        if self._partitions is not None:
+            app_logger.info(f"The manifest changed on disk, reloading it: {self.manifest_file_path}")
+        self._partitions = {}
+        self._manifest_stamp = stamp
+        try:
+            with open(self.manifest_file_path, "r", encoding="utf-8") as file:
+                state = json.load(file)
+            if state.get("version") == _VERSION:
+                self._partitions = {
+                    each["key"]: Partition(**each) for each in state["partitions"]
+                }
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError):
+            app_logger.exception(f"Unreadable manifest, rebuilding it: {self.manifest_file_path}")
+        # segments archived (or removed) by another process aren't opened anymore
+        for key in list(self._segments):
+            partition = self._partitions.get(key)
+            if partition is None or partition.archived:
+                del self._segments[key]
+        self._reconcile()
+        return self._partitions
+
+    def _reconcile(self) -> None:
+        """
+        Brings the manifest in line with the segments on disk, after a crash between a
+        write and the manifest's save, or when the manifest is missing
+        """
+        assert self._partitions is not None
+        changed = False
+        if self.folder.exists():
+            # a segment comes before its archive, which is a leftover if both are there
+            for path in sorted(self.folder.glob("*.csv*")):
+                key = path.name.split(".", 1)[0]
+                if key not in self._partitions and path.suffix in (".csv", ".gz"):
+                    # unknown row count, rescanned below
+                    self._partitions[key] = Partition(
+                        key=key, rows=-1, archived=path.suffix == ".gz"
+                    )
+        for key, partition in list(self._partitions.items()):
+            path = self.folder / partition.file_name
+            if partition.archived:
+                # an archive that got written, but whose segment wasn't deleted yet
+                self._remove_segment_files(key)
+                if partition.rows < 0 or not partition.paise:
+                    self._rescan(partition)
+                    changed = True
+                continue
+            if not path.exists():
+                del self._partitions[key]
+                changed = True
+            elif partition.rows != self._segment(key).count():
+                self._rescan(partition)
+                changed = True
+        if changed:
+            self._save()
+
+    def _rescan(self, partition: Partition) -> None:
+        """
+        Recomputes what the manifest knows of a segment, by reading it whole
+        """
+        app_logger.info(f"Rescanning the {partition.key} segment of {self.folder}")
+        partition.rows, partition.first, partition.last = 0, None, None
+        paise = [0] * len(FLOW_TYPES)
+        for entry in self._iter_partition(partition):
+            partition.rows += 1
+            date_time = parse_date_time(entry.date_time)
+            if date_time is not None:
+                partition.widen(date_time)
+            if entry.flow_type is not None:
+                paise[FLOW_TYPES.index(entry.flow_type)] += amount_to_paise(entry.amount)
+        partition.paise = paise if partition.archived else []
+
+    def _save(self) -> None:
+        """
+        Writes the manifest, replacing the old one atomically
+        """
+        assert self._partitions is not None
+        state = {
+            "version": _VERSION,
+            "partitions": [asdict(each) for each in self._partitions.values()],
+        }
+        temp_path = self.manifest_file_path.with_name(
+            self.manifest_file_path.name + ".tmp"
+        )
+        try:
+            self.folder.mkdir(parents=True, exist_ok=True)
+            with open(temp_path, "w", encoding="utf-8") as file:
+                json.dump(state, file, separators=(",", ":"))
+            os.replace(temp_path, self.manifest_file_path)
+            self._manifest_stamp = self._stat_manifest()
+        except OSError:
+            app_logger.exception(f"Couldn't save the manifest: {self.manifest_file_path}")
+
+    #
+    # Segments
+    #
+    def _segment(self, key: str) -> LedgerDataBase:
+        segment = self._segments.get(key)
+        if segment is None:
+            segment = self._segments[key] = LedgerDataBase(self.folder / f"{key}.csv")
+        return segment
+
+    def _remove_segment_files(self, key: str) -> None:
+        self._segments.pop(key, None)
+        csv_path = self.folder / f"{key}.csv"
+        for path in [csv_path, *(csv_path.with_suffix(each) for each in _SIDECAR_SUFFIXES)]:
+            path.unlink(missing_ok=True)
+        for log in self.folder.glob(f"{key}.search.json.*"):
+            log.unlink(missing_ok=True)
+
+    def _iter_partition(self, partition: Partition, start: int = 0) -> Iterator[Entry]:
+        if not partition.archived:
+            yield from self._segment(partition.key).iter_entries(start)
+            return
+        with gzip.open(self.folder / partition.file_name, "rb") as file:
+            rows = iter_ledger_rows(file)  # type: ignore[arg-type]
+            for _, _, row in islice(rows, max(start, 0), None):
+                yield entry_from_row(row)
+
+    def _read_partition(self, partition: Partition, offset: int, limit: int) -> list[Entry]:
+        if not partition.archived:
+            return self._segment(partition.key).read_entries(offset, limit)
+        return list(islice(self._iter_partition(partition, offset), limit))
+
+    def archive(self, key: str) -> bool:
+        """
+        Compacts a segment into a read-only gzip archive, keeping its totals in the manifest
+
+        Args:
+            key (str): The year of the segment
+
+        Returns:
+            bool: Returns `True` if the segment was archived, otherwise `False`.
+        """
+        with self._lock:
+            partition = self._load().get(key)
+            if partition is None or partition.archived:
+                return False
+            segment = self._segment(key)
+            archive_path = self.folder / f"{key}.csv.gz"
+            temp_path = archive_path.with_name(archive_path.name + ".tmp")
+            try:
+                with open(segment.db_file_path, "rb") as source, gzip.open(
+                    temp_path, "wb", compresslevel=9
+                ) as target:
+                    shutil.copyfileobj(source, target)
+                os.chmod(temp_path, stat.S_IREAD)
+                os.replace(temp_path, archive_path)
+            except OSError:
+                app_logger.exception(f"Couldn't archive the {key} segment of {self.folder}")
+                temp_path.unlink(missing_ok=True)
+                return False
+
+            totals = segment.totals_by_flow_type()
+            partition.paise = [amount_to_paise(totals[each]) for each in FLOW_TYPES]
+            partition.archived = True
+            # the manifest goes first, a leftover segment is cleaned up on the next load
+            self._save()
+            self._remove_segment_files(key)
+            app_logger.info(f"Archived the {key} segment of {self.folder}")
+            return True
+
+    def archive_closed_years(self, today: datetime.date | None = None) -> list[str]:
+        """
+        Archives the segments of every year before the current one
+
+        Args:
+            today (datetime.date | None, optional): Today's date. Defaults to `None` (the system's date).
+
+        Returns:
+            list[str]: The years archived
+        """
+        current_year = (today or datetime.date.today()).year
+        return [
+            partition.key
+            for partition in self.partitions
+            if partition.key != UNDATED
+            and not partition.archived
+            and int(partition.key) < current_year
+            and self.archive(partition.key)
+        ]
+
+    def _reopen(self, partition: Partition) -> None:
+        """
+        Turns an archived segment back into a plain one, so entries can be added to it
+        """
+        app_logger.info(f"Reopening the archived {partition.key} segment of {self.folder}")
+        archive_path = self.folder / partition.file_name
+        with gzip.open(archive_path, "rb") as source, open(
+            self.folder / f"{partition.key}.csv", "wb"
+        ) as target:
+            shutil.copyfileobj(source, target)
+        partition.archived = False
+        partition.paise = []
+        self._save()
+        os.chmod(archive_path, stat.S_IREAD | stat.S_IWRITE)
+        archive_path.unlink()
+
+    #
+    # LedgerBackend
+    #
+    def write(self, entries: list[Entry]) -> bool:
+        """
+        Appends each entry to the segment of its year, then updates the manifest
+
+        Args:
+            entries (list[Entry]): The entries to append
+
+        Returns:
+            bool: Returns `True` if the entries were written, otherwise `False`.
+        """
+        groups: dict[str, list[Entry]] = {}
+        for entry in entries:
+            groups.setdefault(partition_key(entry), []).append(entry)
+
+        with self._lock:
+            partitions = self._load()
+            result = True
+            try:
+                self.folder.mkdir(parents=True, exist_ok=True)
+                for key, group in groups.items():
+                    partition = partitions.setdefault(key, Partition(key=key))
+                    if partition.archived:
+                        self._reopen(partition)
+                    if not self._segment(key).write(group):
+                        result = False
+                        continue
+                    partition.rows += len(group)
+                    for entry in group:
+                        date_time = parse_date_time(entry.date_time)
+                        if date_time is not None:
+                            partition.widen(date_time)
+            except OSError:
+                app_logger.exception(f"Couldn't write to the partitioned DB: {self.folder}")
+                result = False
+            self._save()
+            return result
+
+    def count(self, entry_filter: EntryFilter | None = None) -> int:
+        """
+        Returns the number of entries. With a filter, only the segments its date range
+        overlaps are read, and the ones it fully covers are counted from the manifest.
+
+        Args:
+            entry_filter (EntryFilter | None, optional): Count only the matching entries. Defaults to `None`.
+
+        Returns:
+            int: The number of entries
+        """
+        total = 0
+        for partition in self.partitions:
+            if entry_filter is None or partition.covered_by(entry_filter):
+                total += partition.rows
+            elif partition.overlaps(entry_filter):
+                total += sum(
+                    1
+                    for entry in self._iter_partition(partition)
+                    if entry_filter.matches(entry)
+                )
+        return total
+
+    def iter_entries(self, start: int = 0) -> Iterator[Entry]:
+        """
+        Lazily yields the entries, year by year, the undated ones last
+
+        Args:
+            start (int, optional): Index of the first entry to yield. Defaults to `0`.
+
+        Yields:
+            Entry: Each entry of the ledger
+        """
+        for partition in self.partitions:
+            if start >= partition.rows:
+                start -= partition.rows
+                continue
+            yield from self._iter_partition(partition, start)
+            start = 0
+
+    def read_entries(
+        self, offset: int, limit: int, entry_filter: EntryFilter | None = None
+    ) -> list[Entry]:
+        """
+        Reads a window of entries, skipping the segments outside the filter's date range,
+        and the ones before `offset` (as far as the manifest can tell) without reading them
+
+        Args:
+            offset (int): Index of the first entry to read (among the matching ones)
+            limit (int): Maximum number of entries to read
+            entry_filter (EntryFilter | None, optional): Read only the matching entries. Defaults to `None`.
+
+        Returns:
+            list[Entry]: At most `limit` entries, starting at `offset`
+        """
+        window: list[Entry] = []
+        offset = max(offset, 0)
+        for partition in self.partitions:
+            if len(window) >= limit:
+                break
+            if entry_filter is None or partition.covered_by(entry_filter):
+                if offset >= partition.rows:
+                    offset -= partition.rows
+                    continue
+                window += self._read_partition(partition, offset, limit - len(window))
+                offset = 0
+            elif partition.overlaps(entry_filter):
+                for entry in self._iter_partition(partition):
+                    if not entry_filter.matches(entry):
+                        continue
+                    if offset > 0:
+                        offset -= 1
+                        continue
+                    window.append(entry)
+                    if len(window) >= limit:
+                        break
+        return window
+
+    def totals_by_flow_type(self) -> dict[FlowType, Decimal]:
+        """
+        Sums up the amounts of the whole ledger, per flow type: the archived years from the
+        manifest, the open ones from their aggregate caches
+
+        Returns:
+            dict[FlowType, Decimal]: The total amount of every flow type
+        """
+        paise = [0] * len(FLOW_TYPES)
+        for partition in self.partitions:
+            if partition.archived:
+                totals = partition.paise
+            else:
+                segment_totals = self._segment(partition.key).totals_by_flow_type()
+                totals = [amount_to_paise(segment_totals[each]) for each in FLOW_TYPES]
+            for index, amount in enumerate(totals):
+                paise[index] += amount
+        return {
+            each: paise_to_amount(paise[index]) for index, each in enumerate(FLOW_TYPES)
+        }
+
+    def migrate_from(self, source: LedgerBackend, batch_size: int = 10_000) -> int:
+        """
+        One-shot copy of another ledger (normally the CSV one) into this, still empty, database
+
+        Args:
+            source (LedgerBackend): The ledger to copy the entries from
+            batch_size (int, optional): Number of entries written at a time. Defaults to `10_000`.
+
+        Returns:
+            int: The number of entries copied, `0` if this database already had entries
+        """
+        return migrate_ledger(
+            source, self, f"partitioned DB ({self.folder})", batch_size
+        )
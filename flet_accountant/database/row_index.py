@@ -0,0 +1,143 @@
+"""
+A sidecar index of the ledger CSV, recording the byte offset of every `stride`-th
+data row, so a reader can `seek` close to any row instead of scanning from the top.
+
+The index is kept in step with the ledger incrementally (see `LedgerFollower`):
+appended bytes are scanned on `refresh()`, and the whole file is re-indexed only
+when the index is missing or the ledger was rewritten behind its back.
+"""
+
+import os
+import struct
+import sys
+from array import array
+from pathlib import Path
+
+from accountant.logging import app_logger
+
+from flet_accountant.database.follower import LedgerFollower
+
+# magic, stride, row count, indexed size, mtime (ns), crc of the ledger's head
+_HEADER = struct.Struct("<6sqqqqI")
+_MAGIC = b"FAIDX1"
+
+
+class RowOffsetIndex(LedgerFollower):
+    """
+    Byte offsets of every `stride`-th data row of the ledger, persisted next to it
+
+    Args:
+        db_file_path (Path): Path of the ledger CSV file
+        index_file_path (Path): Path of the sidecar index file
+        stride (int, optional): Every how many rows an offset is recorded. Defaults to `DEFAULT_STRIDE`.
+    """
+
+    DEFAULT_STRIDE = 256
+
+    def __init__(
+        self,
+        db_file_path: Path,
+        index_file_path: Path,
+        stride: int = DEFAULT_STRIDE,
+    ):
+        """
+        Byte offsets of every `stride`-th data row of the ledger, persisted next to it
+
+        Args:
+            db_file_path (Path): Path of the ledger CSV file
+            index_file_path (Path): Path of the sidecar index file
+            stride (int, optional): Every how many rows an offset is recorded. Defaults to `DEFAULT_STRIDE`.
+        """
+        super().__init__(db_file_path, index_file_path)
+        self.stride = max(1, stride)
+
+        self.offsets: array = array("q")
+        self.row_count: int = 0
+
+    @property
+    def index_file_path(self) -> Path:
+        return self.state_file_path
+
+    def _reset_state(self) -> None:
+        self.offsets = array("q")
+        self.row_count = 0
+
+    def _consume(self, start: int, row: list[str]) -> None:
+        if self.row_count % self.stride == 0:
+            self.offsets.append(start)
+        self.row_count += 1
+
+    #
+    # Persistence
+    #
+    def _load(self) -> bool:
+        """
+        Loads the index from its sidecar file
+
+        Returns:
+            bool: Returns `True` if a usable index was loaded, otherwise `False`.
+        """
+        try:
+            with open(self.index_file_path, "rb") as file:
+                header = file.read(_HEADER.size)
+                magic, stride, row_count, size, mtime_ns, head_crc = _HEADER.unpack(
+                    header
+                )
+                if magic != _MAGIC or stride != self.stride:
+                    return False
+                offsets = array("q")
+                offsets.frombytes(file.read())
+        except (OSError, struct.error, ValueError):
+            return False
+
+        if sys.byteorder == "big":
+            offsets.byteswap()
+        if len(offsets) != -(-row_count // self.stride):
+            return False
+
+        self.offsets = offsets
+        self.row_count = row_count
+        self.indexed_size = size
+        self._mtime_ns = mtime_ns
+        self._head_crc = head_crc
+        return True
+
+    def save(self) -> None:
+        """
+        Writes the index to its sidecar file, replacing the old one atomically
+        """
+        offsets = array("q", self.offsets)
+        if sys.byteorder == "big":
+            offsets.byteswap()
+        temp_path = self.index_file_path.with_name(self.index_file_path.name + ".tmp")
+        try:
+            with open(temp_path, "wb") as file:
+                file.write(
+                    _HEADER.pack(
+                        _MAGIC,
+                        self.stride,
+                        self.row_count,
+                        self.indexed_size,
+                        self._mtime_ns,
+                        self._head_crc,
+                    )
+                )
+                file.write(offsets.tobytes())
+            os.replace(temp_path, self.index_file_path)
+        except OSError:
+            app_logger.exception(f"Couldn't save the row index: {self.index_file_path}")
+
+    def locate(self, row: int) -> tuple[int, int]:
+        """
+        Finds where to start reading, to reach the given data row
+
+        Args:
+            row (int): Index of the data row
+
+        Returns:
+            tuple[int, int]: The byte offset to `seek` to, and the number of data rows to skip from there
+        """
+        if row <= 0 or not self.offsets:
+            return (0, max(row, 0))
+        block = min(row // self.stride, len(self.offsets) - 1)
+        return (self.offsets[block], row - block * self.stride)
@@ -0,0 +1,311 @@
+"""
+Column layout of the ledger CSV written by `CSVDataBase`, and the helpers that turn
+a raw CSV line back into an `Entry` (and the other way round).
+
+Every module that reads the ledger file directly goes through here, so the column
+order only has to be known in one place.
+"""
+
+import calendar
+import copy
+import csv
+import datetime
+import io
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from enum import Enum
+from typing import BinaryIO, Iterator
+
+from accountant.database.entry import Entry, FlowType
+
+# Order in which `CSVDataBase` writes the `Entry` fields as columns
+ENTRY_FIELDS: tuple[str, ...] = (
+    "name",
+    "amount",
+    "reason",
+    "tag",
+    "flow_type",
+    "date_time",
+)
+
+
+def is_header_row(row: list[str]) -> bool:
+    """
+    Checks whether the given row is the column header of the ledger
+
+    Args:
+        row (list[str]): A parsed CSV row
+
+    Returns:
+        bool: Returns `True` if the row holds the field names, otherwise `False`.
+    """
+    return len(row) > 0 and row[0].strip().lower() == ENTRY_FIELDS[0]
+
+
+def parse_csv_line(line: bytes | str) -> list[str]:
+    """
+    Parses a single physical line of the ledger into its cells
+
+    Args:
+        line (bytes | str): The raw line, with or without the line terminator
+
+    Returns:
+        list[str]: The cells of the row, an empty list for blank lines
+    """
+    if isinstance(line, bytes):
+        line = line.decode("utf-8")
+    line = line.rstrip("\r\n")
+    if not line:
+        return []
+    return next(csv.reader([line]), [])
+
+
+def parse_flow_type(value: str) -> FlowType | None:
+    """
+    Converts the stored text of a flow type back into `FlowType`, accepting both the
+    enum's value and its name (in any case)
+
+    Args:
+        value (str): The stored text, for example `"credit"` or `"FlowType.CREDIT"`
+
+    Returns:
+        FlowType | None: The matching flow type, or `None` when it can't be resolved
+    """
+    value = value.strip()
+    if not value or value.lower() == "none":
+        return None
+    name = value.rsplit(".", 1)[-1]
+    for each in FlowType:
+        if value == str(each.value) or name.upper() == each.name:
+            return each
+    return None
+
+
+def parse_amount(value: str) -> Decimal:
+    """
+    Converts the stored text of an amount to `Decimal`
+
+    Args:
+        value (str): The stored amount
+
+    Returns:
+        Decimal: The amount, `Decimal(0)` if the stored text isn't a number
+    """
+    try:
+        return Decimal(value.strip())
+    except InvalidOperation:
+        return Decimal(0)
+
+
+def entry_from_row(row: list[str]) -> Entry:
+    """
+    Builds an `Entry` out of a parsed ledger row
+
+    Args:
+        row (list[str]): The cells of the row, in `ENTRY_FIELDS` order
+
+    Returns:
+        Entry: The entry the row describes
+    """
+    cells = dict(zip(ENTRY_FIELDS, row))
+    entry = Entry(
+        name=cells.get("name", ""),
+        amount=parse_amount(cells.get("amount", "0")),
+        reason=cells.get("reason", ""),
+    )
+    tag = cells.get("tag", "")
+    entry.tag = tag if tag and tag.lower() != "none" else None
+    entry.flow_type = parse_flow_type(cells.get("flow_type", ""))
+    entry.date_time = cells.get("date_time", "")
+    return entry
+
+
+def flatten_cell(value: str) -> str:
+    """
+    Replaces the line breaks of a cell with spaces. Every reader of the ledger (the row
+    index, the parallel loader, ...) takes a physical line for a row, so a cell must never
+    be quoted across lines.
+
+    Args:
+        value (str): The text of the cell
+
+    Returns:
+        str: The text on a single line
+    """
+    return value.replace("\r\n", " ").replace("\r", " ").replace("\n", " ")
+
+
+def flatten_entry(entry: Entry) -> Entry:
+    """
+    Returns a copy of the entry whose text fields are on a single line, see `flatten_cell`
+
+    Args:
+        entry (Entry): The entry about to be written
+
+    Returns:
+        Entry: The entry itself when none of its fields has a line break, else a flattened copy
+    """
+    changed = {
+        field: flatten_cell(value)
+        for field in ENTRY_FIELDS
+        if isinstance(value := getattr(entry, field, None), str)
+        and ("\n" in value or "\r" in value)
+    }
+    if not changed:
+        return entry
+    flattened = copy.copy(entry)
+    for field, value in changed.items():
+        setattr(flattened, field, value)
+    return flattened
+
+
+def entry_to_row(entry: Entry) -> list[str]:
+    """
+    Flattens an `Entry` into the cells `CSVDataBase` stores for it
+
+    Args:
+        entry (Entry): The entry to flatten
+
+    Returns:
+        list[str]: The cells, in `ENTRY_FIELDS` order
+    """
+    row: list[str] = []
+    for field in ENTRY_FIELDS:
+        value = getattr(entry, field, None)
+        if value is None:
+            row.append("")
+        elif isinstance(value, Enum):
+            row.append(str(value.value))
+        else:
+            row.append(flatten_cell(str(value)))
+    return row
+
+
+def entries_to_csv(entries: list[Entry]) -> bytes:
+    """
+    Formats entries as the ledger lines `CSVDataBase` appends for them
+
+    Args:
+        entries (list[Entry]): The entries to format
+
+    Returns:
+        bytes: The UTF-8 lines, each one terminated
+    """
+    buffer = io.StringIO(newline="")
+    writer = csv.writer(buffer)
+    writer.writerows(entry_to_row(entry) for entry in entries)
+    return buffer.getvalue().encode("utf-8")
+
+
+#
+# Compact encodings, shared by the binary/columnar representations of the ledger
+#
+
+# Timestamp stored for entries whose `date_time` couldn't be parsed
+NO_TIMESTAMP: int = -(2**63)
+
+
+def amount_to_paise(amount: Decimal) -> int:
+    """
+    Converts a rupee amount to a whole number of paise, rounding half up
+
+    Args:
+        amount (Decimal): The amount in rupees
+
+    Returns:
+        int: The amount in paise
+    """
+    return int((Decimal(amount) * 100).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def paise_to_amount(paise: int) -> Decimal:
+    """
+    Converts a whole number of paise back to a rupee amount
+
+    Args:
+        paise (int): The amount in paise
+
+    Returns:
+        Decimal: The amount in rupees, with two decimal places
+    """
+    return Decimal(paise).scaleb(-2)
+
+
+def timestamp_from_text(date_time: str | None) -> int:
+    """
+    Converts the stored `date_time` of an entry to epoch seconds, reading it as UTC
+
+    Args:
+        date_time (str | None): The stored date and time, for example `"2024-06-01 10:15:00"`
+
+    Returns:
+        int: The epoch seconds, `NO_TIMESTAMP` when it can't be parsed
+    """
+    if not date_time:
+        return NO_TIMESTAMP
+    try:
+        value = datetime.datetime.fromisoformat(str(date_time).strip())
+    except ValueError:
+        return NO_TIMESTAMP
+    return timestamp_from_datetime(value)
+
+
+def timestamp_from_datetime(value: datetime.datetime) -> int:
+    """
+    Converts a date and time to epoch seconds, reading a naive one as UTC
+
+    Args:
+        value (datetime.datetime): The date and time
+
+    Returns:
+        int: The epoch seconds
+    """
+    if value.tzinfo is not None:
+        value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return calendar.timegm(value.timetuple())
+
+
+def timestamp_to_text(timestamp: int) -> str:
+    """
+    Converts epoch seconds back to the `date_time` text of an entry
+
+    Args:
+        timestamp (int): The epoch seconds
+
+    Returns:
+        str: The date and time, `""` for `NO_TIMESTAMP`
+    """
+    if timestamp == NO_TIMESTAMP:
+        return ""
+    return str(
+        datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc).replace(
+            tzinfo=None
+        )
+    )
+
+
+def iter_ledger_rows(
+    file: BinaryIO, offset: int = 0, end: int | None = None
+) -> Iterator[tuple[int, int, list[str]]]:
+    """
+    Yields the data rows of an open ledger file, starting at a line boundary. The header
+    (at the very top) and blank lines are skipped, and so is a last line that isn't
+    terminated yet, as it may still be being written.
+
+    Args:
+        file (BinaryIO): The ledger, opened in binary mode
+        offset (int, optional): Byte offset of the line to start at. Defaults to `0`.
+        end (int | None, optional): Byte offset to stop at. Defaults to `None` (end of file).
+
+    Yields:
+        tuple[int, int, list[str]]: The byte offsets where the row starts and ends, and its cells
+    """
+    file.seek(offset)
+    for line in file:
+        start = offset
+        offset += len(line)
+        if (end is not None and offset > end) or not line.endswith(b"\n"):
+            return
+        row = parse_csv_line(line)
+        if not row or (start == 0 and is_header_row(row)):
+            continue
+        yield start, offset, row
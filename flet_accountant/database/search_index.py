@@ -0,0 +1,230 @@
+"""
+An inverted index over the `name`, `reason` and `tag` of every entry, for searching
+the ledger (and search-as-you-type) without a linear scan.
+
+Each word maps to the sorted row ids of the entries it appears in; a query matches
+the entries that contain, for every word of the query, some word starting with it.
+The index follows the ledger CSV incrementally (see `LedgerFollower`). On disk it
+is a snapshot plus an append-only log of the rows added since, which is folded
+back into the snapshot once it grows past `COMPACT_AFTER` rows.
+"""
+
+import bisect
+import json
+import os
+import re
+from pathlib import Path
+
+from accountant.logging import app_logger
+
+from flet_accountant.database.follower import LedgerFollower
+from flet_accountant.database.schema import ENTRY_FIELDS
+
+# Version of the persisted layout, an index of another version is rebuilt
+_VERSION = 1
+
+_WORD = re.compile(r"\w+")
+
+SEARCHED_FIELDS: tuple[str, ...] = ("name", "reason", "tag")
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Splits text into lower-cased words
+
+    Args:
+        text (str): The text to split
+
+    Returns:
+        list[str]: The words, in order
+    """
+    return _WORD.findall(text.lower())
+
+
+class SearchIndex(LedgerFollower):
+    """
+    Word to row ids index of the ledger, with prefix matching
+
+    Args:
+        db_file_path (Path): Path of the ledger CSV file
+        index_file_path (Path): Path of the snapshot; the log of newer rows sits next to it, with a `.log` suffix
+    """
+
+    # Rows the log may hold, before it is folded into the snapshot
+    COMPACT_AFTER = 5_000
+
+    def __init__(self, db_file_path: Path, index_file_path: Path):
+        """
+        Word to row ids index of the ledger, with prefix matching
+
+        Args:
+            db_file_path (Path): Path of the ledger CSV file
+            index_file_path (Path): Path of the snapshot; the log of newer rows sits next to it, with a `.log` suffix
+        """
+        super().__init__(db_file_path, index_file_path)
+        self.log_file_path = self.state_file_path.with_name(
+            self.state_file_path.name + ".log"
+        )
+
+        self.postings: dict[str, list[int]] = {}
+        self.row_count: int = 0
+        # rows consumed since the last save, and the number of rows in the log
+        self._pending: list[tuple[int, list[str]]] = []
+        self._logged_rows: int = 0
+        self._rewrite_snapshot: bool = True
+        self._sorted_words: list[str] | None = None
+
+    #
+    # Following the ledger
+    #
+    def _reset_state(self) -> None:
+        self.postings = {}
+        self.row_count = 0
+        self._pending = []
+        self._rewrite_snapshot = True
+        self._sorted_words = None
+
+    def _add_row(self, row_id: int, words: list[str]) -> None:
+        for word in words:
+            posting = self.postings.get(word)
+            if posting is None:
+                self.postings[word] = [row_id]
+                self._sorted_words = None
+            elif posting[-1] != row_id:
+                posting.append(row_id)
+
+    def _consume(self, start: int, row: list[str]) -> None:
+        cells = dict(zip(ENTRY_FIELDS, row))
+        words = sorted(
+            {
+                word
+                for field in SEARCHED_FIELDS
+                for word in tokenize(cells.get(field, ""))
+                if not (field == "tag" and word == "none")
+            }
+        )
+        self._add_row(self.row_count, words)
+        self._pending.append((self.row_count, words))
+        self.row_count += 1
+
+    #
+    # Persistence
+    #
+    def _meta(self) -> dict:
+        return {
+            "size": self.indexed_size,
+            "mtime_ns": self._mtime_ns,
+            "head_crc": self._head_crc,
+            "row_count": self.row_count,
+        }
+
+    def _apply_meta(self, meta: dict) -> None:
+        self.indexed_size = meta["size"]
+        self._mtime_ns = meta["mtime_ns"]
+        self._head_crc = meta["head_crc"]
+        self.row_count = meta["row_count"]
+
+    def _load(self) -> bool:
+        """
+        Loads the snapshot, and replays the log on top of it. A torn last log line is dropped,
+        its rows are then simply consumed again from the ledger.
+
+        Returns:
+            bool: Returns `True` if a usable index was loaded, otherwise `False`.
+        """
+        try:
+            with open(self.state_file_path, "r", encoding="utf-8") as file:
+                state = json.load(file)
+            if state.get("version") != _VERSION:
+                return False
+            self.postings = state["postings"]
+            self._apply_meta(state)
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+
+        self._logged_rows = 0
+        try:
+            with open(self.log_file_path, "r", encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        record = json.loads(line)
+                        rows = record["rows"]
+                    except (ValueError, KeyError, TypeError):
+                        break
+                    if record.get("size", -1) < self.indexed_size or (
+                        rows and record.get("row_count", 0) <= self.row_count
+                    ):
+                        # already folded into the snapshot
+                        continue
+                    for row_id, words in rows:
+                        self._add_row(row_id, words)
+                    self._logged_rows += len(rows)
+                    self._apply_meta(record)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            return False
+
+        self._rewrite_snapshot = False
+        self._sorted_words = None
+        return True
+
+    def save(self) -> None:
+        """
+        Appends the newly consumed rows to the log, or rewrites the snapshot when the index
+        was rebuilt or the log got long
+        """
+        try:
+            if (
+                self._rewrite_snapshot
+                or self._logged_rows + len(self._pending) > self.COMPACT_AFTER
+            ):
+                state = {"version": _VERSION, **self._meta(), "postings": self.postings}
+                temp_path = self.state_file_path.with_name(
+                    self.state_file_path.name + ".tmp"
+                )
+                with open(temp_path, "w", encoding="utf-8") as file:
+                    json.dump(state, file, separators=(",", ":"))
+                os.replace(temp_path, self.state_file_path)
+                self.log_file_path.unlink(missing_ok=True)
+                self._logged_rows = 0
+                self._rewrite_snapshot = False
+            else:
+                record = {**self._meta(), "rows": self._pending}
+                with open(self.log_file_path, "a", encoding="utf-8") as file:
+                    file.write(json.dumps(record, separators=(",", ":")) + "\n")
+                self._logged_rows += len(self._pending)
+            self._pending = []
+        except OSError:
+            app_logger.exception(f"Couldn't save the search index: {self.state_file_path}")
+
+    #
+    # Queries
+    #
+    def _words_with_prefix(self, prefix: str) -> list[str]:
+        if self._sorted_words is None:
+            self._sorted_words = sorted(self.postings)
+        words = self._sorted_words
+        start = bisect.bisect_left(words, prefix)
+        end = bisect.bisect_left(words, prefix + "\U0010ffff")
+        return words[start:end]
+
+    def search(self, query: str) -> list[int]:
+        """
+        Finds the entries that contain, for every word of the query, a word starting with it
+
+        Args:
+            query (str): What the user typed, for example `"gro mil"`
+
+        Returns:
+            list[int]: Row ids of the matching entries, in ledger order; empty for a blank query
+        """
+        matches: set[int] | None = None
+        for prefix in set(tokenize(query)):
+            ids: set[int] = set()
+            for word in self._words_with_prefix(prefix):
+                ids.update(self.postings[word])
+            matches = ids if matches is None else matches & ids
+            if not matches:
+                return []
+        return sorted(matches) if matches else []
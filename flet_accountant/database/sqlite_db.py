@@ -0,0 +1,296 @@
+"""
+A SQLite storage engine for the ledger.
+
+Entries are kept in one table, indexed on `date_time`, `tag`, `flow_type` and `name`,
+so filtered, sorted and paginated queries are answered by SQLite without loading the
+ledger into Python. The database runs in WAL mode, so reads don't wait on writes,
+and batches are inserted with a single prepared `executemany`.
+"""
+
+import sqlite3
+import threading
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Iterator, Literal
+
+from accountant.database.entry import Entry, FlowType
+from accountant.logging import app_logger
+
+from flet_accountant.database.db import LedgerBackend, migrate_ledger
+from flet_accountant.database.filters import EntryFilter
+from flet_accountant.database.schema import (
+    NO_TIMESTAMP,
+    amount_to_paise,
+    paise_to_amount,
+    parse_flow_type,
+    timestamp_from_text,
+    timestamp_to_text,
+)
+
+OrderBy = Literal["id", "date_time", "name", "amount", "tag", "flow_type"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    amount INTEGER NOT NULL,
+    reason TEXT NOT NULL,
+    tag TEXT,
+    flow_type TEXT,
+    date_time TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_date_time ON entries (date_time);
+CREATE INDEX IF NOT EXISTS entries_tag ON entries (tag);
+CREATE INDEX IF NOT EXISTS entries_flow_type ON entries (flow_type);
+CREATE INDEX IF NOT EXISTS entries_name ON entries (name);
+"""
+
+_INSERT = (
+    "INSERT INTO entries (name, amount, reason, tag, flow_type, date_time) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+
+_COLUMNS = "name, amount, reason, tag, flow_type, date_time"
+
+
+def _normalized_date_time(date_time: str | None) -> str:
+    """
+    Returns `date_time` as `YYYY-MM-DD HH:MM:SS`, so it sorts and compares as text
+    """
+    timestamp = timestamp_from_text(date_time)
+    if timestamp == NO_TIMESTAMP:
+        return str(date_time or "")
+    return timestamp_to_text(timestamp)
+
+
+class SQLiteDataBase(LedgerBackend):
+    """
+    Stores the ledger in an indexed SQLite database
+
+    Args:
+        db_file_path (Path): Path of the `.sqlite` file
+    """
+
+    def __init__(self, db_file_path: Path):
+        """
+        Stores the ledger in an indexed SQLite database
+
+        Args:
+            db_file_path (Path): Path of the `.sqlite` file
+        """
+        self.db_file_path = Path(db_file_path)
+        self._lock = threading.RLock()
+        self._connection: sqlite3.Connection | None = None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """
+        The (lazily opened) connection, shared by every thread behind a lock
+        """
+        if self._connection is None:
+            self.db_file_path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.db_file_path, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(_SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    #
+    # Writing
+    #
+    def write(self, entries: list[Entry]) -> bool:
+        """
+        Inserts the entries in one transaction
+
+        Args:
+            entries (list[Entry]): The entries to insert
+
+        Returns:
+            bool: Returns `True` if the entries were written, otherwise `False`.
+        """
+        rows = [
+            (
+                str(entry.name),
+                amount_to_paise(entry.amount),
+                str(entry.reason),
+                entry.tag,
+                None if entry.flow_type is None else str(entry.flow_type.value),
+                _normalized_date_time(entry.date_time),
+            )
+            for entry in entries
+        ]
+        with self._lock:
+            try:
+                with self.connection:
+                    self.connection.executemany(_INSERT, rows)
+                return True
+            except sqlite3.Error:
+                app_logger.exception(f"Couldn't write to the SQLite DB: {self.db_file_path}")
+                return False
+
+    #
+    # Reading
+    #
+    @staticmethod
+    def _where(entry_filter: EntryFilter | None) -> tuple[str, list[Any]]:
+        """
+        Turns a filter into a `WHERE` clause and its parameters
+        """
+        if entry_filter is None:
+            return "", []
+        clauses: list[str] = []
+        parameters: list[Any] = []
+        if entry_filter.start is not None:
+            clauses.append("date_time >= ?")
+            parameters.append(str(entry_filter.start.replace(microsecond=0)))
+        if entry_filter.end is not None:
+            clauses.append("date_time < ?")
+            parameters.append(str(entry_filter.end.replace(microsecond=0)))
+        if entry_filter.flow_types is not None:
+            clauses.append(
+                f"flow_type IN ({', '.join('?' * len(entry_filter.flow_types))})"
+            )
+            parameters.extend(str(each.value) for each in entry_filter.flow_types)
+        if entry_filter.tags is not None:
+            clauses.append(f"tag IN ({', '.join('?' * len(entry_filter.tags))})")
+            parameters.extend(entry_filter.tags)
+        if entry_filter.name is not None:
+            clauses.append("name LIKE ? ESCAPE '\\'")
+            escaped = (
+                entry_filter.name.replace("\\", "\\\\")
+                .replace("%", "\\%")
+                .replace("_", "\\_")
+            )
+            parameters.append(f"%{escaped}%")
+        if not clauses:
+            return "", []
+        return " WHERE " + " AND ".join(clauses), parameters
+
+    @staticmethod
+    def _entry_from_record(record: tuple) -> Entry:
+        name, amount, reason, tag, flow_type, date_time = record
+        entry = Entry(name=name, amount=paise_to_amount(amount), reason=reason)
+        entry.tag = tag
+        entry.flow_type = None if flow_type is None else parse_flow_type(flow_type)
+        entry.date_time = date_time
+        return entry
+
+    def count(self, entry_filter: EntryFilter | None = None) -> int:
+        """
+        Returns the number of entries
+
+        Args:
+            entry_filter (EntryFilter | None, optional): Count only the matching entries. Defaults to `None`.
+
+        Returns:
+            int: The number of entries
+        """
+        where, parameters = self._where(entry_filter)
+        with self._lock:
+            (count,) = self.connection.execute(
+                f"SELECT COUNT(*) FROM entries{where}", parameters
+            ).fetchone()
+        return count
+
+    def read_entries(
+        self,
+        offset: int,
+        limit: int,
+        entry_filter: EntryFilter | None = None,
+        order_by: OrderBy = "id",
+        descending: bool = False,
+    ) -> list[Entry]:
+        """
+        Reads a filtered, sorted window of entries
+
+        Args:
+            offset (int): Index of the first entry to read (among the matching ones)
+            limit (int): Maximum number of entries to read
+            entry_filter (EntryFilter | None, optional): Read only the matching entries. Defaults to `None`.
+            order_by (OrderBy, optional): The column to sort on. Defaults to `"id"` (the order they were written in).
+            descending (bool, optional): Whether to sort in descending order. Defaults to `False`.
+
+        Returns:
+            list[Entry]: At most `limit` entries, starting at `offset`
+        """
+        if order_by not in OrderBy.__args__:  # type: ignore
+            raise ValueError(f"Can't sort entries on: {order_by}")
+        where, parameters = self._where(entry_filter)
+        direction = "DESC" if descending else "ASC"
+        with self._lock:
+            records = self.connection.execute(
+                f"SELECT {_COLUMNS} FROM entries{where} "
+                f"ORDER BY {order_by} {direction}, id {direction} LIMIT ? OFFSET ?",
+                [*parameters, max(limit, 0), max(offset, 0)],
+            ).fetchall()
+        return [self._entry_from_record(record) for record in records]
+
+    def iter_entries(
+        self, start: int = 0, batch_size: int = 1_000
+    ) -> Iterator[Entry]:
+        """
+        Lazily yields the entries, in the order they were written, a batch at a time
+
+        Args:
+            start (int, optional): Index of the first entry to yield. Defaults to `0`.
+            batch_size (int, optional): Number of entries fetched at a time. Defaults to `1_000`.
+
+        Yields:
+            Entry: Each entry of the ledger
+        """
+        last_id = -1
+        skip = max(start, 0)
+        while True:
+            with self._lock:
+                records = self.connection.execute(
+                    f"SELECT id, {_COLUMNS} FROM entries WHERE id > ? "
+                    "ORDER BY id LIMIT ? OFFSET ?",
+                    (last_id, batch_size, skip),
+                ).fetchall()
+            if not records:
+                return
+            skip = 0
+            for record in records:
+                last_id = record[0]
+                yield self._entry_from_record(record[1:])
+
+    def totals_by_flow_type(self) -> dict[FlowType, Decimal]:
+        """
+        Sums up the amounts of the whole ledger, per flow type, in SQLite
+
+        Returns:
+            dict[FlowType, Decimal]: The total amount of every flow type
+        """
+        totals: dict[FlowType, Decimal] = {each: Decimal(0) for each in FlowType}
+        with self._lock:
+            records = self.connection.execute(
+                "SELECT flow_type, SUM(amount) FROM entries "
+                "WHERE flow_type IS NOT NULL GROUP BY flow_type"
+            ).fetchall()
+        for flow_type, paise in records:
+            parsed = parse_flow_type(flow_type)
+            if parsed is not None:
+                totals[parsed] += paise_to_amount(paise)
+        return totals
+
+    def migrate_from(self, source: LedgerBackend, batch_size: int = 10_000) -> int:
+        """
+        One-shot copy of another ledger (normally the CSV one) into this, still empty, database
+
+        Args:
+            source (LedgerBackend): The ledger to copy the entries from
+            batch_size (int, optional): Number of entries inserted at a time. Defaults to `10_000`.
+
+        Returns:
+            int: The number of entries copied, `0` if this database already had entries
+        """
+        return migrate_ledger(
+            source, self, f"SQLite DB ({self.db_file_path})", batch_size
+        )
@@ -0,0 +1,269 @@
+"""
+A write-behind queue for ledger entries.
+
+Entries submitted from the UI are handed to a single background writer, which
+groups whatever is pending and appends it to the database in one `write()` call,
+once `max_batch_size` entries are waiting or `max_delay` seconds have passed since
+the first of them arrived. The outcome of every entry is reported back through a
+`Future` and an optional callback, so event handlers never wait on the disk.
+
+Whole batches (a chunk of an import, ...) go through the same writer with `write()`, so
+a ledger shared by several sessions only ever has one writer. With a `FileLock`, every
+write holds it, keeping out the writers of other processes too. With a `ChangeFeed`, the
+written entries are published to it.
+"""
+
+import atexit
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import Callable
+
+from accountant.database.entry import Entry
+from accountant.logging import app_logger
+
+from flet_accountant.database.change_feed import Change, ChangeFeed, ChangeKind
+from flet_accountant.database.db import LedgerBackend
+from flet_accountant.database.file_lock import FileLock
+
+
+@dataclass
+class _PendingEntry:
+    entry: Entry
+    future: Future = field(default_factory=Future)
+    on_done: Callable[[Entry, bool], None] | None = None
+
+
+@dataclass
+class _PendingBatch:
+    entries: list[Entry]
+    future: Future = field(default_factory=Future)
+
+
+@dataclass
+class _Flush:
+    done: threading.Event = field(default_factory=threading.Event)
+    closing: bool = False
+
+
+class EntryWriteQueue:
+    """
+    Groups submitted entries and writes them to the database from a single background thread
+
+    Args:
+        db_connection (LedgerBackend): The database the entries are written to
+        max_batch_size (int, optional): Number of pending entries that triggers a write. Defaults to `DEFAULT_MAX_BATCH_SIZE`.
+        max_delay (float, optional): Seconds a pending entry may wait before it is written. Defaults to `DEFAULT_MAX_DELAY`.
+        file_lock (FileLock | None, optional): Held around every write, against other processes. Defaults to `None`.
+        change_feed (ChangeFeed | None, optional): The written entries are published to it. Defaults to `None`.
+    """
+
+    DEFAULT_MAX_BATCH_SIZE = 64
+    DEFAULT_MAX_DELAY = 0.5
+
+    def __init__(
+        self,
+        db_connection: LedgerBackend,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_delay: float = DEFAULT_MAX_DELAY,
+        file_lock: FileLock | None = None,
+        change_feed: ChangeFeed | None = None,
+    ):
+        """
+        Groups submitted entries and writes them to the database from a single background thread
+
+        Args:
+            db_connection (LedgerBackend): The database the entries are written to
+            max_batch_size (int, optional): Number of pending entries that triggers a write. Defaults to `DEFAULT_MAX_BATCH_SIZE`.
+            max_delay (float, optional): Seconds a pending entry may wait before it is written. Defaults to `DEFAULT_MAX_DELAY`.
+            file_lock (FileLock | None, optional): Held around every write, against other processes. Defaults to `None`.
+            change_feed (ChangeFeed | None, optional): The written entries are published to it. Defaults to `None`.
+        """
+        self._db_connection = db_connection
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_delay = max(0.0, max_delay)
+        self.file_lock = file_lock
+        self.change_feed = change_feed
+
+        self._queue: queue.Queue[_PendingEntry | _PendingBatch | _Flush] = (
+            queue.Queue()
+        )
+        self._lock = threading.Lock()
+        self._writer: threading.Thread | None = None
+        self._closed = False
+
+        # Whatever is still pending, is written before the interpreter goes down
+        atexit.register(self.close)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def _ensure_writer(self) -> None:
+        with self._lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(
+                    target=self._run, name="EntryWriteQueue", daemon=True
+                )
+                self._writer.start()
+
+    def submit(
+        self,
+        entry: Entry,
+        on_done: Callable[[Entry, bool], None] | None = None,
+    ) -> Future:
+        """
+        Queues an entry to be written
+
+        Args:
+            entry (Entry): The entry to write, it mustn't be modified afterwards
+            on_done (Callable[[Entry, bool], None] | None, optional): Called from the writer thread, with the entry and whether it was written. Defaults to `None`.
+
+        Returns:
+            Future: Resolves to `True` once the entry is written, or `False` if the write failed
+
+        Raises:
+            RuntimeError: When the queue was already closed
+        """
+        if self._closed:
+            raise RuntimeError("Can't submit entries to a closed write queue")
+        pending = _PendingEntry(entry=entry, on_done=on_done)
+        self._queue.put(pending)
+        self._ensure_writer()
+        return pending.future
+
+    def write(self, entries: list[Entry]) -> bool:
+        """
+        Writes the entries as one batch, through the writer, and waits for it. Run it off the event loop.
+        Once the queue is closed, the entries are written straight away, still holding the file lock.
+
+        Args:
+            entries (list[Entry]): The entries to write, in order
+
+        Returns:
+            bool: Returns `True` if the entries were written, otherwise `False`.
+        """
+        if self._closed:
+            return self._write(entries)
+        pending = _PendingBatch(entries=entries)
+        self._queue.put(pending)
+        self._ensure_writer()
+        return pending.future.result()
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """
+        Writes everything submitted so far, and waits for it
+
+        Args:
+            timeout (float | None, optional): Seconds to wait at most. Defaults to `None` (no limit).
+
+        Returns:
+            bool: Returns `True` if everything was written in time, otherwise `False`.
+        """
+        if self._closed:
+            return True
+        marker = _Flush()
+        self._queue.put(marker)
+        self._ensure_writer()
+        return marker.done.wait(timeout)
+
+    def close(self, timeout: float | None = None) -> bool:
+        """
+        Writes everything submitted so far, and stops the writer. Further submits are refused.
+
+        Args:
+            timeout (float | None, optional): Seconds to wait at most. Defaults to `None` (no limit).
+
+        Returns:
+            bool: Returns `True` if everything was written in time, otherwise `False`.
+        """
+        if self._closed:
+            return True
+        self._closed = True
+        atexit.unregister(self.close)
+        marker = _Flush(closing=True)
+        self._queue.put(marker)
+        self._ensure_writer()
+        return marker.done.wait(timeout)
+
+    def _write_batch(self, batch: list[_PendingEntry]) -> None:
+        """
+        Appends a batch to the database in one write, and reports the outcome of each entry
+
+        Args:
+            batch (list[_PendingEntry]): The entries to write
+        """
+        if not batch:
+            return
+        result = self._write([pending.entry for pending in batch])
+
+        for pending in batch:
+            pending.future.set_result(result)
+            if pending.on_done is not None:
+                try:
+                    pending.on_done(pending.entry, result)
+                except Exception:
+                    app_logger.exception("Write queue callback failed")
+
+    def _write(self, entries: list[Entry]) -> bool:
+        """
+        Appends the entries to the database in one write, holding the file lock if there's one
+
+        Args:
+            entries (list[Entry]): The entries to write
+
+        Returns:
+            bool: Returns `True` if the entries were written, otherwise `False`.
+        """
+        count = 0
+        try:
+            with self.file_lock if self.file_lock is not None else nullcontext():
+                result = bool(self._db_connection.write(entries))
+                # nobody else writes meanwhile, so this is the count right after the write
+                if result and self.change_feed is not None:
+                    count = self._db_connection.count()
+        except Exception:
+            app_logger.exception(f"Writing a batch of {len(entries)} entries failed")
+            result = False
+        app_logger.debug(f"Wrote a batch of {len(entries)} entries: {result}")
+
+        if result and self.change_feed is not None:
+            self.change_feed.publish(Change(ChangeKind.INSERTED, list(entries), count))
+        return result
+
+    def _run(self) -> None:
+        """
+        The writer thread: collects a batch, writes it, and repeats until closed
+        """
+        while True:
+            item = self._queue.get()
+            batch: list[_PendingEntry] = []
+            deadline = time.monotonic() + self.max_delay
+
+            while True:
+                if isinstance(item, _Flush):
+                    self._write_batch(batch)
+                    item.done.set()
+                    if item.closing:
+                        return
+                    break
+
+                if isinstance(item, _PendingBatch):
+                    # the entries submitted before it go first
+                    self._write_batch(batch)
+                    item.future.set_result(self._write(item.entries))
+                    break
+
+                batch.append(item)
+                remaining = deadline - time.monotonic()
+                if len(batch) >= self.max_batch_size or remaining <= 0:
+                    self._write_batch(batch)
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    self._write_batch(batch)
+                    break
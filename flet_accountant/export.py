@@ -0,0 +1,100 @@
+"""
+Headless export of the ledger, without starting the Flet app.
+
+    python -m flet_accountant.export ledger-2024.csv.gz --from 2024-01-01 --to 2024-12-31 --flow-type debit
+
+The format follows the file name (`.csv` or `.jsonl`, optionally `.gz`), unless given.
+"""
+
+import argparse
+import sys
+
+from accountant.logging import app_logger
+
+from flet_accountant.database.connection import get_db_connection
+from flet_accountant.database.exporter import (
+    EXPORT_FORMATS,
+    ExportProgress,
+    export_entries,
+)
+from flet_accountant.database.filters import EntryFilter
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="flet_accountant.export",
+        description="Exports the ledger to CSV or JSON Lines, optionally gzip-compressed.",
+    )
+    parser.add_argument("output", help="Where the export goes, e.g. ledger.jsonl.gz")
+    parser.add_argument(
+        "--format", choices=EXPORT_FORMATS, help="Defaults to the output's suffix"
+    )
+    parser.add_argument(
+        "--gzip",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help="Defaults to whether the output ends with .gz",
+    )
+    parser.add_argument("--from", dest="start", help="First date to export, YYYY-MM-DD")
+    parser.add_argument("--to", dest="end", help="Last date to export, YYYY-MM-DD")
+    parser.add_argument(
+        "--flow-type",
+        action="append",
+        dest="flow_types",
+        help="Flow type to export (credit, debit, savings), may be repeated",
+    )
+    parser.add_argument(
+        "--tag", action="append", dest="tags", help="Tag to export, may be repeated"
+    )
+    parser.add_argument("--name", help="Text the entries' names have to contain")
+    return parser.parse_args(argv)
+
+
+def _print_progress(progress: ExportProgress) -> None:
+    print(
+        f"\r{progress.fraction:6.1%}  {progress.rows_written:,} exported "
+        f"({progress.rows_per_second:,.0f} rows/sec)",
+        end="\n" if progress.finished else "",
+        file=sys.stderr,
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Runs the export, as asked on the command line
+
+    Args:
+        argv (list[str] | None, optional): The arguments. Defaults to `None` (`sys.argv`).
+
+    Returns:
+        int: The exit code, `0` when the export was written
+    """
+    args = _parse_args(argv)
+    try:
+        entry_filter = EntryFilter.from_text(
+            start=args.start,
+            end=args.end,
+            flow_types=args.flow_types,
+            tags=args.tags,
+            name=args.name,
+        )
+    except ValueError as error:
+        print(error, file=sys.stderr)
+        return 2
+
+    progress = export_entries(
+        get_db_connection(),
+        args.output,
+        file_format=args.format,
+        compressed=args.gzip,
+        entry_filter=entry_filter,
+        on_progress=_print_progress,
+    )
+    if progress.failed:
+        app_logger.error(f"Export to {args.output} failed")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,299 @@
+"""
+Lightweight instrumentation of the app's hot paths: latency histograms and counters.
+
+Event handlers and database calls are decorated with `timed`, and blocks of code are
+wrapped in `timer`; the page's `update()` round trips are timed by `instrument_page`.
+Everything is recorded in the process-wide `metrics` registry, which is off by default
+(`PERF_INSTRUMENTATION` in the config). While it's off, a timed call costs one
+attribute check, so the decorators stay on the hot paths for good.
+
+    metrics.enable()
+    ...
+    metrics.snapshot()              # the numbers, as plain dicts
+    metrics.dump(PERF_DUMP_FOLDER)  # and as a JSON file
+"""
+
+import bisect
+import datetime
+import functools
+import inspect
+import json
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, TypeVar
+
+import flet as ft
+
+F = TypeVar("F", bound=Callable)
+
+# Upper bounds of the histograms' buckets, in seconds: 1µs, 2µs, 4µs, ... ~67s
+BUCKET_BOUNDS: tuple[float, ...] = tuple(1e-6 * 2**each for each in range(27))
+
+
+class Histogram:
+    """
+    A latency histogram, with power-of-two buckets from a microsecond to about a minute.
+    Percentiles are estimated as the upper bound of the bucket they fall in.
+    """
+
+    __slots__ = ("buckets", "count", "total", "min", "max")
+
+    def __init__(self):
+        # the last bucket holds whatever is slower than the last bound
+        self.buckets: list[int] = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count: int = 0
+        self.total: float = 0.0
+        self.min: float = float("inf")
+        self.max: float = 0.0
+
+    def observe(self, seconds: float) -> None:
+        """
+        Records one measurement
+
+        Args:
+            seconds (float): The measured latency
+        """
+        self.buckets[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        """
+        Estimates a percentile of the recorded latencies
+
+        Args:
+            q (float): The percentile, between `0` and `100`
+
+        Returns:
+            float: The estimated latency, in seconds (`0.0` when nothing was recorded)
+        """
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for index, in_bucket in enumerate(self.buckets):
+            seen += in_bucket
+            if seen >= rank and in_bucket:
+                bound = BUCKET_BOUNDS[index] if index < len(BUCKET_BOUNDS) else self.max
+                return min(max(bound, self.min), self.max)
+        return self.max
+
+    def summary(self) -> dict[str, float | int]:
+        return {
+            "count": self.count,
+            "total_seconds": self.total,
+            "mean_seconds": self.mean,
+            "min_seconds": self.min if self.count else 0.0,
+            "p50_seconds": self.percentile(50),
+            "p95_seconds": self.percentile(95),
+            "p99_seconds": self.percentile(99),
+            "max_seconds": self.max,
+        }
+
+
+class Metrics:
+    """
+    A registry of named histograms and counters, safe to record into from any thread
+
+    Args:
+        enabled (bool, optional): Whether anything is recorded. Defaults to `False`.
+    """
+
+    def __init__(self, enabled: bool = False):
+        """
+        A registry of named histograms and counters, safe to record into from any thread
+
+        Args:
+            enabled (bool, optional): Whether anything is recorded. Defaults to `False`.
+        """
+        self.enabled: bool = enabled
+        self.started_at: float = time.time()
+        self._histograms: dict[str, Histogram] = {}
+        self._counters: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def observe(self, name: str, seconds: float) -> None:
+        """
+        Records a latency into the histogram `name`
+
+        Args:
+            name (str): Name of the histogram, for example `"db.read_entries"`
+            seconds (float): The measured latency
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        """
+        Adds to the counter `name`
+
+        Args:
+            name (str): Name of the counter
+            amount (int, optional): How much to add. Defaults to `1`.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def reset(self) -> None:
+        """
+        Forgets everything recorded so far
+        """
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self.started_at = time.time()
+
+    def snapshot(self) -> dict:
+        """
+        Returns:
+            dict: The histograms' summaries and the counters, sorted by name
+        """
+        with self._lock:
+            return {
+                "since": datetime.datetime.fromtimestamp(self.started_at).isoformat(
+                    timespec="seconds"
+                ),
+                "histograms": {
+                    name: self._histograms[name].summary()
+                    for name in sorted(self._histograms)
+                },
+                "counters": dict(sorted(self._counters.items())),
+            }
+
+    def dump(self, folder: Path) -> Path:
+        """
+        Writes a snapshot into `folder`, as a JSON file named after the time
+
+        Args:
+            folder (Path): The folder the file goes in, it's created if needed
+
+        Returns:
+            Path: Path of the written file
+        """
+        folder = Path(folder)
+        folder.mkdir(parents=True, exist_ok=True)
+        file_path = folder / (
+            "perf-" + datetime.datetime.now().strftime("%Y%m%d-%H%M%S-%f") + ".json"
+        )
+        file_path.write_text(json.dumps(self.snapshot(), indent=2), encoding="utf-8")
+        return file_path
+
+
+# The process-wide registry, every session of the app records into it
+metrics = Metrics()
+
+
+@contextmanager
+def timer(name: str) -> Iterator[None]:
+    """
+    Times the block into the histogram `name`
+
+    Args:
+        name (str): Name of the histogram
+    """
+    if not metrics.enabled:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.observe(name, time.perf_counter() - started)
+
+
+def timed(name: str) -> Callable[[F], F]:
+    """
+    Decorates a function (sync or async, like Flet's event handlers) so every call is timed
+    into the histogram `name`, and counted (failed calls into `"<name>.errors"`)
+
+    Args:
+        name (str): Name of the histogram, for example `"handler.NewEntry._add_entry"`
+
+    Returns:
+        Callable[[F], F]: The decorator
+    """
+
+    def decorator(function: F) -> F:
+        if inspect.iscoroutinefunction(function):
+
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                if not metrics.enabled:
+                    return await function(*args, **kwargs)
+                started = time.perf_counter()
+                try:
+                    return await function(*args, **kwargs)
+                except BaseException:
+                    metrics.increment(f"{name}.errors")
+                    raise
+                finally:
+                    metrics.observe(name, time.perf_counter() - started)
+
+            return async_wrapper  # type: ignore
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not metrics.enabled:
+                return function(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            except BaseException:
+                metrics.increment(f"{name}.errors")
+                raise
+            finally:
+                metrics.observe(name, time.perf_counter() - started)
+
+        return wrapper  # type: ignore
+
+    return decorator
+
+
+def instrument_page(page: ft.Page) -> None:
+    """
+    Times the `update()` round trips of a page (sending the changes to the client,
+    and waiting for its answer), and counts the controls sent with each
+
+    Args:
+        page (ft.Page): The page, its `update` and `update_async` are wrapped
+    """
+    update = page.update
+    update_async = page.update_async
+
+    @functools.wraps(update)
+    def timed_update(*controls):
+        metrics.increment("page.update.controls", len(controls) or 1)
+        with timer("page.update"):
+            return update(*controls)
+
+    @functools.wraps(update_async)
+    async def timed_update_async(*controls):
+        metrics.increment("page.update.controls", len(controls) or 1)
+        with timer("page.update"):
+            return await update_async(*controls)
+
+    page.update = timed_update  # type: ignore
+    page.update_async = timed_update_async  # type: ignore
@@ -0,0 +1,240 @@
+"""
+A non-blocking logging pipeline for the app.
+
+The loggers only get a `QueueHandler`, which puts the records on a queue; a single
+background `QueueListener` thread takes them off and runs the real (file and console)
+handlers. So formatting, Rich rendering and file I/O never happen on the event loop,
+or on the threads running the UI's handlers.
+
+Two modes are supported:
+    - `"rich"`: the `accountant` Rich handlers, one log file per run (the oldest runs' files are pruned)
+    - `"plain"`: the standard library's handlers with a plain formatter, into one log file that
+      rotates by size or at midnight; much cheaper, meant for production
+"""
+
+import atexit
+import logging
+import logging.handlers
+import queue
+import threading
+from pathlib import Path
+from typing import Literal
+
+from accountant.logging import (
+    RichConsoleHandler,
+    RichFileHandler,
+    configure_present_loggers,
+    create_log_file,
+)
+
+LogMode = Literal["rich", "plain"]
+LogRotation = Literal["size", "time"]
+
+PLAIN_FORMAT = "%(asctime)s %(levelname)-8s %(name)s [%(threadName)s] %(message)s"
+
+# Name of the plain mode's log file, its rotated copies get a numbered or dated suffix
+PLAIN_LOG_FILE_NAME = "app.log"
+
+
+def prune_log_files(log_folder: Path, keep: int) -> None:
+    """
+    Deletes all but the `keep` newest per-run log files of the Rich mode
+
+    Args:
+        log_folder (Path): The folder holding the log files
+        keep (int): Number of log files to keep
+    """
+    runs = sorted(
+        (
+            each
+            for each in Path(log_folder).iterdir()
+            if each.is_file() and not each.name.startswith(PLAIN_LOG_FILE_NAME)
+        ),
+        key=lambda each: each.stat().st_mtime,
+        reverse=True,
+    )
+    for each in runs[keep:]:
+        try:
+            each.unlink()
+        except OSError:
+            pass
+
+
+def create_file_handler(
+    log_folder: Path,
+    mode: LogMode = "rich",
+    rotation: LogRotation = "size",
+    max_bytes: int = 5 * 1024 * 1024,
+    backup_count: int = 5,
+) -> logging.Handler:
+    """
+    Creates the handler writing the log file(s) inside `log_folder`
+
+    Args:
+        log_folder (Path): The folder the log files go in
+        mode (LogMode, optional): `"rich"` or `"plain"`. Defaults to `"rich"`.
+        rotation (LogRotation, optional): In plain mode, rotate by `"size"` or `"time"` (at midnight). Defaults to `"size"`.
+        max_bytes (int, optional): In plain mode, size a log file rotates at. Defaults to 5 MiB.
+        backup_count (int, optional): Number of older log files kept. Defaults to `5`.
+
+    Returns:
+        logging.Handler: The file handler
+    """
+    log_folder = Path(log_folder)
+    log_folder.mkdir(parents=True, exist_ok=True)
+    if mode == "rich":
+        # Rich writes one file per run, the runs' files are rotated by count
+        prune_log_files(log_folder, keep=backup_count)
+        return RichFileHandler(file=create_log_file(log_folder), level=logging.DEBUG)
+
+    file_path = log_folder / PLAIN_LOG_FILE_NAME
+    handler: logging.Handler
+    if rotation == "time":
+        handler = logging.handlers.TimedRotatingFileHandler(
+            file_path, when="midnight", backupCount=backup_count, encoding="utf-8"
+        )
+    else:
+        handler = logging.handlers.RotatingFileHandler(
+            file_path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+        )
+    handler.setFormatter(logging.Formatter(PLAIN_FORMAT))
+    return handler
+
+
+def create_console_handler(mode: LogMode = "rich") -> logging.Handler:
+    """
+    Creates the handler showing the logs on the console
+
+    Args:
+        mode (LogMode, optional): `"rich"` or `"plain"`. Defaults to `"rich"`.
+
+    Returns:
+        logging.Handler: The console handler
+    """
+    if mode == "rich":
+        return RichConsoleHandler(level=logging.DEBUG)
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(PLAIN_FORMAT))
+    return handler
+
+
+class QueuedLogging:
+    """
+    Routes the records of some loggers through a queue, to handlers run on a background thread
+
+    Args:
+        loggers (list[logging.Logger]): The loggers to route
+        handlers (list[logging.Handler]): The handlers run by the background thread
+    """
+
+    def __init__(self, loggers: list[logging.Logger], handlers: list[logging.Handler]):
+        """
+        Routes the records of some loggers through a queue, to handlers run on a background thread
+
+        Args:
+            loggers (list[logging.Logger]): The loggers to route
+            handlers (list[logging.Handler]): The handlers run by the background thread
+        """
+        self.loggers = loggers
+        self.handlers = handlers
+        self.queue: queue.SimpleQueue = queue.SimpleQueue()
+        self.queue_handler = logging.handlers.QueueHandler(self.queue)
+        self.listener = logging.handlers.QueueListener(
+            self.queue, *handlers, respect_handler_level=True
+        )
+        self._running = False
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def start(self) -> None:
+        """
+        Starts the background thread, and attaches the queue to the loggers
+        """
+        if self._running:
+            return
+        self.listener.start()
+        configure_present_loggers(loggers=self.loggers, handlers=[self.queue_handler])
+        self._running = True
+        atexit.register(self.stop)
+
+    def stop(self) -> None:
+        """
+        Detaches the queue from the loggers, and stops the background thread once it
+        handled every queued record
+        """
+        if not self._running:
+            return
+        self._running = False
+        for logger in self.loggers:
+            logger.removeHandler(self.queue_handler)
+        self.listener.stop()
+        for handler in self.handlers:
+            handler.close()
+        atexit.unregister(self.stop)
+
+    def set_level(self, level: int | str, logger_name: str | None = None) -> None:
+        """
+        Changes the level of the routed loggers at runtime
+
+        Args:
+            level (int | str): The new level, for example `logging.INFO` or `"WARNING"`
+            logger_name (str | None, optional): Only change this logger. Defaults to `None` (every routed logger).
+        """
+        for logger in self.loggers:
+            if logger_name is None or logger.name == logger_name:
+                logger.setLevel(level)
+
+
+_pipeline: QueuedLogging | None = None
+_pipeline_lock = threading.Lock()
+
+
+def start_queued_logging(
+    loggers: list[logging.Logger], handlers: list[logging.Handler]
+) -> QueuedLogging:
+    """
+    Starts the app's logging pipeline. It's started once per process: the app's `main` runs
+    once per session, and later calls get the running pipeline (their handlers are closed).
+
+    Args:
+        loggers (list[logging.Logger]): The loggers to route
+        handlers (list[logging.Handler]): The handlers run by the background thread
+
+    Returns:
+        QueuedLogging: The running pipeline
+    """
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is not None and _pipeline.running:
+            for handler in handlers:
+                handler.close()
+            return _pipeline
+        _pipeline = QueuedLogging(loggers, handlers)
+        _pipeline.start()
+        return _pipeline
+
+
+def get_queued_logging() -> QueuedLogging | None:
+    """
+    Returns the running logging pipeline, if any
+    """
+    return _pipeline
+
+
+def set_log_level(level: int | str, logger_name: str | None = None) -> bool:
+    """
+    Changes the level of the app's loggers at runtime
+
+    Args:
+        level (int | str): The new level, for example `logging.INFO` or `"WARNING"`
+        logger_name (str | None, optional): Only change this logger. Defaults to `None` (every routed logger).
+
+    Returns:
+        bool: Returns `True` if the pipeline is running (and the level was changed), otherwise `False`.
+    """
+    if _pipeline is None:
+        return False
+    _pipeline.set_level(level, logger_name)
+    return True
@@ -4,33 +4,58 @@ Author: V. Harish (aka) Lucifer516-sudoer
 This is the main entry point of the script, handling most of the things
 """
 
-from logging import Handler
 from typing import Callable, Literal
 
 import flet as ft
-from accountant.database.db import CSVDataBase
-from accountant.logging import (
-    RichConsoleHandler,
-    RichFileHandler,
-    app_logger,
-    configure_present_loggers,
-    create_log_file,
-    logging,
-)
+from accountant.logging import app_logger, logging
 
+from flet_accountant.components.data_visualizer.series_source import (
+    Cashflow,
+    CashflowSeriesSource,
+)
+from flet_accountant.components.data_visualizer.time_series_chart import (
+    TimeSeriesChart,
+)
+from flet_accountant.components.debug_tab.perf_panel import PerfPanel
+from flet_accountant.components.export_tab.export_entries import ExportEntries
+from flet_accountant.components.import_tab.bulk_import import BulkImport
 from flet_accountant.components.navigation.app_bar import TitleBar
 from flet_accountant.components.navigation.nav_bar import (
     MenuItem,
     NavRail,
 )
+from flet_accountant.components.new_entry_tab.entry_data import (
+    EntrySearchField,
+    PaginatedEntryTable,
+)
 from flet_accountant.components.new_entry_tab.new_entry import NewEntry
 from flet_accountant.components.theming.theme_switcher import ThemeSwitcher
 from flet_accountant.config import (
     APP_NAME,
     DB_FILE_PATH,
     DB_FOLDER,
+    FLET_LOG_LEVEL,
     HOME,
+    LOG_BACKUP_COUNT,
     LOG_FOLDER,
+    LOG_LEVEL,
+    LOG_MAX_BYTES,
+    LOG_MODE,
+    LOG_ROTATION,
+    PERF_DUMP_FOLDER,
+    PERF_INSTRUMENTATION,
+)
+from flet_accountant.database.analytics import HAS_NUMPY, LedgerAnalytics
+from flet_accountant.database.async_db import AsyncLedgerDataBase
+from flet_accountant.database.change_feed import ChangeFeed
+from flet_accountant.database.connection import connection_manager
+from flet_accountant.database.db import LedgerBackend, LedgerDataBase
+from flet_accountant.instrumentation import instrument_page, metrics
+from flet_accountant.log_pipeline import (
+    create_console_handler,
+    create_file_handler,
+    get_queued_logging,
+    start_queued_logging,
 )
 
 
@@ -38,16 +63,16 @@ from flet_accountant.config import (
 flet_core_logger = logging.getLogger("flet_core")
 flet_logger = logging.getLogger("flet")
 
-# Setting level of the loggers found
-# ? Is it necessary to add these logging related to, the `init_app_logger` method
-app_logger.setLevel(logging.DEBUG)
-flet_logger.setLevel(logging.DEBUG)
-flet_core_logger.setLevel(logging.DEBUG)
+# Setting level of the loggers found, they can be changed at runtime with `log_pipeline.set_log_level`
+app_logger.setLevel(LOG_LEVEL)
+flet_logger.setLevel(FLET_LOG_LEVEL)
+flet_core_logger.setLevel(FLET_LOG_LEVEL)
 
 
 def _setup_app_dir() -> bool:
     """
-    Sets up the App's directory and stuff, if it doesn't exist.
+    Sets up the App's directory and stuff, if it doesn't exist. The ledger is recovered
+    from its journal by `connection.get_journal`, once per process.
 
     Returns:
         bool: Returns the created status, either `True` or `False`
@@ -85,7 +110,8 @@ def _setup_app_dir() -> bool:
 
 def init_app_logging(screen: bool = False) -> bool:
     """
-    Initializes logging for the app, based on the args passed, with the `RichHandler`'s
+    Initializes logging for the app, based on the args passed. The handlers run on a background
+    thread, behind a queue (see `log_pipeline`), in the `LOG_MODE` set in the config
 
     Args:
         screen (bool, optional): Whether to show logging output on the screen (i.e. `console`). Defaults to `False`.
@@ -94,13 +120,25 @@ def init_app_logging(screen: bool = False) -> bool:
         bool: Returns `True`, if logging was initialized without any issue, otherwise `False`.
     """
     try:
-        handlers: list[Handler] = [
-            RichFileHandler(file=create_log_file(LOG_FOLDER), level=logging.DEBUG)
-        ]  # Yah, even though it contains mostly RichHandlers
+        pipeline = get_queued_logging()
+        if pipeline is not None and pipeline.running:
+            # an earlier session started it, building file handlers again would prune the
+            # log folder and start a new (empty) log file
+            return True
+
+        handlers: list[logging.Handler] = [
+            create_file_handler(
+                LOG_FOLDER,
+                mode=LOG_MODE,
+                rotation=LOG_ROTATION,
+                max_bytes=LOG_MAX_BYTES,
+                backup_count=LOG_BACKUP_COUNT,
+            )
+        ]
         if screen:
-            handlers.append(RichConsoleHandler(level=logging.DEBUG))
+            handlers.append(create_console_handler(mode=LOG_MODE))
 
-        configure_present_loggers(
+        start_queued_logging(
             loggers=[app_logger, flet_core_logger, flet_logger],
             handlers=handlers,
         )
@@ -111,6 +149,46 @@ def init_app_logging(screen: bool = False) -> bool:
         return False
 
 
+def _ledger_cashflow(
+    db_connection: LedgerBackend, change_feed: ChangeFeed
+) -> Callable[[], Cashflow] | None:
+    """
+    Picks where the dashboard's charts get their (pre-aggregated) cashflow from
+
+    Args:
+        db_connection (LedgerBackend): The app's ledger
+        change_feed (ChangeFeed): The ledger's changes, the analytics catch up with them
+
+    Returns:
+        Callable[[], Cashflow] | None: The daily cashflow with NumPy, else the monthly one of the
+        CSV ledger's aggregate cache, `None` when neither is available
+    """
+    if HAS_NUMPY:
+        analytics = LedgerAnalytics(db_connection)
+        change_feed.subscribe(analytics.apply_change)
+        return lambda: analytics.cashflow("day")
+    if isinstance(db_connection, LedgerDataBase):
+        return db_connection.monthly_summary
+    return None
+
+
+def _entries_view(db: AsyncLedgerDataBase, change_feed: ChangeFeed) -> ft.Column:
+    """
+    Builds the content of the Entries tab: the entries table, and a search field above it
+
+    Args:
+        db (AsyncLedgerDataBase): The app's ledger
+        change_feed (ChangeFeed): The ledger's changes, the table catches up with them
+
+    Returns:
+        ft.Column: The tab's content
+    """
+    table = PaginatedEntryTable(
+        db, table_title="Entries", rows_per_page=10, change_feed=change_feed
+    )
+    return ft.Column(controls=[EntrySearchField(table), table])
+
+
 async def check_for_app_dirs(page: ft.Page) -> None:
     """
     Couroutine, which will be called inside, a main function of flet's target function, that allows showing an `alert dialog`,
@@ -158,21 +236,13 @@ async def check_for_app_dirs(page: ft.Page) -> None:
     await _internal_alert_dialog(wt_are_not_found)
 
 
-def get_db_connection() -> CSVDataBase:
-    """
-    Returns a database instance of the `CSVDataBase` interface,  with the default `DB_FILE_PATH`
-
-    Returns:
-        CSVDataBase: The CSV DB Interface, with the default DB File Path
-    """
-
-    return CSVDataBase(DB_FILE_PATH)
-
-
 def main(page: ft.Page):
     # Initialising app logging and stuffs, in the very first start
     init_app_logging(screen=True)
     app_logger.info(f"Directory setup result: {_setup_app_dir()}")
+    if PERF_INSTRUMENTATION:
+        metrics.enable()
+        instrument_page(page)
 
     #
     # Page level configs
@@ -196,11 +266,20 @@ def main(page: ft.Page):
     #
     # App's Database
     #
-    db: CSVDataBase = get_db_connection()
+    # Every session shares the ledger, its caches and its single writer: entries are written
+    # in batches, and every database call runs off the event loop
+    shared = connection_manager.acquire()
+    db_connection: LedgerBackend = shared.db_connection
+    db = shared.db
+    page.on_disconnect = lambda e: shared.write_queue.flush()
+    page.on_close = lambda e: connection_manager.release()
 
     #
     # Apps Nav bar stuff
     # - New Entry Tab
+    # - Import Tab
+    # - Export Tab
+    # - Entries Tab
     # - Dashboard
     #   +-- View Visualisations and stuff
     #   +-- Record of the data entries ( Must also allow to search through entries )
@@ -215,14 +294,106 @@ def main(page: ft.Page):
             label="Add entry",
             icon=ft.icons.ADD_TASK,
         ),
-        nav_content=ft.Column(controls=[NewEntry(db_connection=db)]),
+        nav_content_factory=lambda: ft.Column(
+            controls=[NewEntry(db_connection=db)]
+        ),
+    )
+
+    #
+    # Import Tab
+    #
+    import_entries = MenuItem(
+        nav_destination=ft.NavigationRailDestination(
+            label="Import",
+            icon=ft.icons.UPLOAD_FILE,
+        ),
+        nav_content_factory=lambda: ft.Column(
+            controls=[BulkImport(db_connection=db)]
+        ),
+    )
+
+    #
+    # Export Tab
+    #
+    export_entries = MenuItem(
+        nav_destination=ft.NavigationRailDestination(
+            label="Export",
+            icon=ft.icons.DOWNLOAD,
+        ),
+        nav_content_factory=lambda: ft.Column(
+            controls=[ExportEntries(db_connection=db)]
+        ),
+    )
+
+    #
+    # Entries Tab, every storage engine can serve it, with or without NumPy
+    #
+    view_entries = MenuItem(
+        nav_destination=ft.NavigationRailDestination(
+            label="Entries",
+            icon=ft.icons.TABLE_ROWS,
+        ),
+        nav_content_factory=lambda: _entries_view(db, shared.change_feed),
     )
 
     #
     # The main Navigation rail control
     #
 
-    navigation_items: list[MenuItem] = [add_entry]
+    navigation_items: list[MenuItem] = [
+        add_entry,
+        import_entries,
+        export_entries,
+        view_entries,
+    ]
+
+    #
+    # Dashboard Tab
+    #
+    # the entries written in any session show up in every session's dashboard
+    cashflow = shared.cache(
+        "cashflow", lambda: _ledger_cashflow(db_connection, shared.change_feed)
+    )
+    if cashflow is not None:
+        navigation_items.append(
+            MenuItem(
+                nav_destination=ft.NavigationRailDestination(
+                    label="Dashboard",
+                    icon=ft.icons.INSIGHTS,
+                ),
+                nav_content_factory=lambda: ft.Column(
+                    controls=[
+                        TimeSeriesChart(
+                            CashflowSeriesSource(cashflow, "balance"),
+                            title="Balance",
+                            change_feed=shared.change_feed,
+                        ),
+                        TimeSeriesChart(
+                            CashflowSeriesSource(cashflow, "debit"),
+                            title="Spend",
+                            color=ft.colors.ERROR,
+                            change_feed=shared.change_feed,
+                        ),
+                    ]
+                ),
+            )
+        )
+
+    #
+    # Performance Tab, a debug tab showing the instrumentation's numbers
+    #
+    if PERF_INSTRUMENTATION:
+        navigation_items.append(
+            MenuItem(
+                nav_destination=ft.NavigationRailDestination(
+                    label="Performance",
+                    icon=ft.icons.SPEED,
+                ),
+                nav_content_factory=lambda: ft.Column(
+                    controls=[PerfPanel(metrics=metrics, dump_folder=PERF_DUMP_FOLDER)]
+                ),
+            )
+        )
     navigation_rail = ft.Container(
         NavRail(menu_items=navigation_items),
         height=page.width,
@@ -232,4 +403,5 @@ def main(page: ft.Page):
     page.update()
 
 
-ft.app(target=main)
+if __name__ == "__main__":
+    ft.app(target=main)
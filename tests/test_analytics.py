@@ -0,0 +1,77 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+from accountant.database.entry import Entry, FlowType
+
+from flet_accountant.database.partitioned_db import PartitionedDataBase
+
+pytest.importorskip("numpy")
+
+from flet_accountant.database.analytics import LedgerAnalytics  # noqa: E402
+
+
+def _debit(date_time: str, amount: str) -> Entry:
+    entry = Entry(name="spend", amount=Decimal(amount), reason="test")
+    entry.flow_type = FlowType.DEBIT
+    entry.date_time = date_time
+    return entry
+
+
+def test_backdated_entry_in_partitioned_db(tmp_path):
+    db = PartitionedDataBase(tmp_path / "ledger")
+    db.write(
+        [
+            _debit("2025-03-01 10:00:00", "100.00"),
+            _debit("2025-04-01 10:00:00", "200.00"),
+        ]
+    )
+    analytics = LedgerAnalytics(db)
+    assert analytics.totals_by_flow_type()[FlowType.DEBIT] == Decimal("300.00")
+
+    # lands in the 2024 segment, before the entries already loaded
+    db.write([_debit("2024-05-01 10:00:00", "7.00")])
+
+    assert analytics.totals_by_flow_type() == db.totals_by_flow_type()
+    assert [each.month for each in analytics.cashflow("month")] == [5, 3, 4]
+
+
+def test_rolling_average_counts_empty_periods(tmp_path):
+    db = PartitionedDataBase(tmp_path / "ledger")
+    db.write(
+        [
+            _debit("2024-01-10 10:00:00", "300.00"),
+            _debit("2024-06-10 10:00:00", "300.00"),
+            _debit("2024-12-10 10:00:00", "300.00"),
+        ]
+    )
+    analytics = LedgerAnalytics(db)
+
+    averages = analytics.rolling_average(FlowType.DEBIT, window=3, period="month")
+
+    assert len(averages) == 10
+    assert averages[datetime.date(2024, 3, 1)] == Decimal("100.00")
+    assert averages[datetime.date(2024, 5, 1)] == Decimal("0.00")
+    assert averages[datetime.date(2024, 12, 1)] == Decimal("100.00")
+
+
+def test_rolling_average_of_weeks_and_days(tmp_path):
+    db = PartitionedDataBase(tmp_path / "ledger")
+    db.write(
+        [
+            _debit("2024-01-01 10:00:00", "70.00"),
+            _debit("2024-01-15 10:00:00", "70.00"),
+        ]
+    )
+    analytics = LedgerAnalytics(db)
+
+    weekly = analytics.rolling_average(FlowType.DEBIT, window=2, period="week")
+    daily = analytics.rolling_average(FlowType.DEBIT, window=7, period="day")
+
+    assert weekly == {
+        datetime.date(2024, 1, 8): Decimal("35.00"),
+        datetime.date(2024, 1, 15): Decimal("35.00"),
+    }
+    assert daily[datetime.date(2024, 1, 7)] == Decimal("10.00")
+    assert daily[datetime.date(2024, 1, 14)] == Decimal("0.00")
+    assert len(daily) == 9
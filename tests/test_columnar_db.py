@@ -0,0 +1,62 @@
+from decimal import Decimal
+
+from accountant.database.entry import Entry, FlowType
+
+from flet_accountant.database.columnar_db import ColumnarDataBase
+from flet_accountant.database.db import LedgerDataBase
+
+
+def _entry(name: str, date_time: str = "2024-01-05 10:00:00") -> Entry:
+    entry = Entry(name=name, amount=Decimal("12.50"), reason="test")
+    entry.tag = "food"
+    entry.flow_type = FlowType.DEBIT
+    entry.date_time = date_time
+    return entry
+
+
+def test_round_trip(tmp_path):
+    db = ColumnarDataBase(tmp_path / "columns")
+    assert db.write([_entry("Tea"), _entry("Milk")])
+
+    entries = ColumnarDataBase(tmp_path / "columns").read_entries(0, 10)
+
+    assert [entry.name for entry in entries] == ["Tea", "Milk"]
+    assert entries[0].amount == Decimal("12.50")
+    assert entries[0].tag == "food"
+    assert entries[0].flow_type == FlowType.DEBIT
+    assert entries[0].date_time == "2024-01-05 10:00:00"
+    assert db.totals_by_flow_type()[FlowType.DEBIT] == Decimal("25.00")
+
+
+def test_two_writers_share_the_dictionaries(tmp_path):
+    first = ColumnarDataBase(tmp_path / "columns")
+    second = ColumnarDataBase(tmp_path / "columns")
+
+    first.write([_entry("alpha")])
+    second.write([_entry("beta")])
+    first.write([_entry("gamma")])
+
+    reader = ColumnarDataBase(tmp_path / "columns")
+    for db in (reader, first, second):
+        assert [entry.name for entry in db.iter_entries()] == ["alpha", "beta", "gamma"]
+
+
+def test_dates_the_timestamp_cant_hold_are_kept(tmp_path):
+    dates = ["05/01/2024", "2024-01-05 10:00:00.250000", "", "2024-01-05 10:00:00"]
+    db = ColumnarDataBase(tmp_path / "columns")
+    db.write([_entry(f"entry {index}", date) for index, date in enumerate(dates)])
+
+    assert [entry.date_time for entry in db.iter_entries()] == dates
+
+
+def test_migration_keeps_every_date(tmp_path):
+    csv_db = LedgerDataBase(tmp_path / "ledger.csv")
+    (tmp_path / "ledger.csv").touch()
+    csv_db.write([_entry("Tea", "05 Jan 2024"), _entry("Milk")])
+    db = ColumnarDataBase(tmp_path / "columns")
+
+    assert db.migrate_from(csv_db) == 2
+    assert [entry.date_time for entry in db.iter_entries()] == [
+        "05 Jan 2024",
+        "2024-01-05 10:00:00",
+    ]
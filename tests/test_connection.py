@@ -0,0 +1,50 @@
+from decimal import Decimal
+
+from accountant.database.entry import Entry
+
+from flet_accountant.database.connection import ConnectionManager
+from flet_accountant.database.ledger_columns import LedgerColumns
+
+
+def test_sessions_share_one_database(tmp_path):
+    opened = []
+
+    def open_connection():
+        opened.append(LedgerColumns())
+        return opened[-1]
+
+    manager = ConnectionManager(open_connection, tmp_path / "ledger.lock")
+    first = manager.acquire()
+    second = manager.acquire()
+
+    assert first is second
+    assert len(opened) == 1
+    assert manager.sessions == 2
+    assert first.cache("analytics", object) is second.cache("analytics", object)
+
+
+def test_last_session_closes_the_database(tmp_path):
+    manager = ConnectionManager(LedgerColumns, tmp_path / "ledger.lock")
+    shared = manager.acquire()
+    manager.acquire()
+    shared.write_queue.submit(Entry(name="Tea", amount=Decimal("1.00"), reason="test"))
+
+    manager.release()
+    assert not shared.write_queue.closed
+    manager.release()
+
+    # whatever was queued got written before closing
+    assert shared.write_queue.closed
+    assert shared.db_connection.count() == 1
+    assert manager.sessions == 0
+
+    # a new session opens a new database
+    assert manager.acquire() is not shared
+
+
+def test_release_without_acquire_is_ignored(tmp_path):
+    manager = ConnectionManager(LedgerColumns, tmp_path / "ledger.lock")
+    manager.release()
+    assert manager.sessions == 0
+    assert manager.acquire() is not None
+    assert manager.sessions == 1
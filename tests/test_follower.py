@@ -0,0 +1,45 @@
+from flet_accountant.database.follower import LedgerFollower
+
+HEADER = b"name,amount,reason,tags,flow_type,date_time\r\n"
+ROW_1 = b"Tea,12,break,,debit,2024-01-05 10:00:00\r\n"
+ROW_2 = b"Rent,9000,home,,debit,2024-01-06 10:00:00\r\n"
+
+
+class RowCounter(LedgerFollower):
+    def _reset_state(self) -> None:
+        self.starts: list[int] = []
+
+    def _consume(self, start: int, row: list[str]) -> None:
+        self.starts.append(start)
+
+    def _load(self) -> bool:
+        return False
+
+    def save(self) -> None:
+        pass
+
+
+def test_lines_without_rows_are_consumed(tmp_path):
+    ledger = tmp_path / "ledger.csv"
+    ledger.write_bytes(HEADER)
+    follower = RowCounter(ledger, tmp_path / "ledger.rows").refresh()
+    assert follower.starts == []
+    assert follower.indexed_size == len(HEADER)
+
+    with open(ledger, "ab") as file:
+        file.write(ROW_1 + b"\r\n\r\n")
+    follower.refresh()
+    assert follower.starts == [len(HEADER)]
+    assert follower.indexed_size == ledger.stat().st_size
+
+
+def test_torn_last_line_is_kept_back(tmp_path):
+    ledger = tmp_path / "ledger.csv"
+    ledger.write_bytes(HEADER + ROW_1 + b"\r\n" + ROW_2[:10])
+    follower = RowCounter(ledger, tmp_path / "ledger.rows").refresh()
+    assert follower.indexed_size == len(HEADER + ROW_1 + b"\r\n")
+
+    with open(ledger, "ab") as file:
+        file.write(ROW_2[10:])
+    follower.refresh()
+    assert follower.starts == [len(HEADER), len(HEADER + ROW_1 + b"\r\n")]
@@ -0,0 +1,182 @@
+from decimal import Decimal
+
+import pytest
+from accountant.database.entry import Entry
+
+from flet_accountant.database import connection
+from flet_accountant.database.db import LedgerDataBase
+from flet_accountant.database.journal import (
+    LedgerJournal,
+    encode_record,
+    read_records,
+    recover_ledger,
+)
+from flet_accountant.database.schema import entries_to_csv
+
+ROW_1 = b"Tea,12,break,,debit,2024-01-05 10:00:00\r\n"
+ROW_2 = b"Rent,9000,home,,debit,2024-01-06 10:00:00\r\n"
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return tmp_path / "ledger.csv", tmp_path / "ledger.journal"
+
+
+def test_read_records(paths):
+    _, journal = paths
+    journal.write_bytes(encode_record(0, ROW_1) + encode_record(len(ROW_1), ROW_2))
+
+    records, intact = read_records(journal)
+
+    assert records == [(0, ROW_1), (len(ROW_1), ROW_2)]
+    assert intact == journal.stat().st_size
+
+
+def test_read_records_stops_at_a_torn_tail(paths):
+    _, journal = paths
+    first = encode_record(0, ROW_1)
+    journal.write_bytes(first + encode_record(len(ROW_1), ROW_2)[:-5])
+
+    assert read_records(journal) == ([(0, ROW_1)], len(first))
+
+
+def test_read_records_stops_at_a_corrupt_record(paths):
+    _, journal = paths
+    first = encode_record(0, ROW_1)
+    second = bytearray(encode_record(len(ROW_1), ROW_2))
+    second[-3] ^= 0xFF
+    journal.write_bytes(first + bytes(second) + encode_record(0, ROW_1))
+
+    assert read_records(journal) == ([(0, ROW_1)], len(first))
+
+
+def test_read_records_without_a_journal(paths):
+    _, journal = paths
+    assert read_records(journal) == ([], 0)
+
+
+def test_recover_replays_the_missing_records(paths):
+    ledger, journal = paths
+    ledger.write_bytes(ROW_1)
+    journal.write_bytes(encode_record(0, ROW_1) + encode_record(len(ROW_1), ROW_2))
+
+    recovery = recover_ledger(ledger, journal)
+
+    assert (recovery.replayed, recovery.already_applied) == (1, 1)
+    assert ledger.read_bytes() == ROW_1 + ROW_2
+    assert journal.stat().st_size == 0
+
+
+def test_recover_leaves_applied_records_alone(paths):
+    ledger, journal = paths
+    ledger.write_bytes(ROW_1 + ROW_2)
+    journal.write_bytes(encode_record(0, ROW_1) + encode_record(len(ROW_1), ROW_2))
+
+    recovery = recover_ledger(ledger, journal)
+
+    assert (recovery.replayed, recovery.already_applied) == (0, 2)
+    assert not recovery.changed
+    assert ledger.read_bytes() == ROW_1 + ROW_2
+
+
+def test_recover_overwrites_a_torn_append_with_its_record(paths):
+    ledger, journal = paths
+    ledger.write_bytes(ROW_1 + ROW_2[:10])
+    journal.write_bytes(encode_record(len(ROW_1), ROW_2))
+
+    recovery = recover_ledger(ledger, journal)
+
+    assert recovery.replayed == 1
+    assert ledger.read_bytes() == ROW_1 + ROW_2
+
+
+def test_recover_drops_a_torn_journal_tail(paths):
+    ledger, journal = paths
+    ledger.write_bytes(ROW_1)
+    torn = encode_record(len(ROW_1), ROW_2)[:-1]
+    journal.write_bytes(encode_record(0, ROW_1) + torn)
+
+    recovery = recover_ledger(ledger, journal)
+
+    assert recovery.dropped_journal_bytes == len(torn)
+    assert recovery.replayed == 0
+    assert ledger.read_bytes() == ROW_1
+    assert journal.stat().st_size == 0
+
+
+def test_recover_cuts_a_torn_ledger_line(paths):
+    ledger, journal = paths
+    ledger.write_bytes(ROW_1 + ROW_2[:10])
+
+    recovery = recover_ledger(ledger, journal)
+
+    assert recovery.dropped_ledger_bytes == 10
+    assert ledger.read_bytes() == ROW_1
+
+
+def test_recover_without_any_file(paths):
+    ledger, journal = paths
+    assert not recover_ledger(ledger, journal).changed
+    assert not ledger.exists()
+
+
+def test_journaled_write_survives_replay(paths):
+    ledger, journal_path = paths
+    journal = LedgerJournal(journal_path)
+    db = LedgerDataBase(ledger, journal=journal)
+    entry = Entry(name="Tea", amount=Decimal(12), reason="break")
+    entry.date_time = "2024-01-05 10:00:00"
+
+    assert db.write([entry])
+    journal.close()
+    # the process dies before a checkpoint, and the ledger's append never hit the disk
+    ledger.write_bytes(b"")
+
+    recovery = recover_ledger(ledger, journal_path)
+
+    assert recovery.replayed == 1
+    assert ledger.read_bytes() == entries_to_csv([entry])
+
+
+def test_recovery_runs_once_before_the_journal_opens(paths, monkeypatch):
+    ledger, journal_path = paths
+    monkeypatch.setattr(connection, "DB_FILE_PATH", ledger)
+    monkeypatch.setattr(connection, "DB_JOURNAL_FILE_PATH", journal_path)
+    monkeypatch.setattr(connection, "DB_LOCK_FILE_PATH", ledger.with_suffix(".lock"))
+    monkeypatch.setattr(connection, "_journal", None)
+    # a write that crashed between its journal record and its ledger append
+    ledger.write_bytes(ROW_1)
+    journal_path.write_bytes(encode_record(len(ROW_1), ROW_2))
+
+    journal = connection.get_journal()
+    try:
+        assert ledger.read_bytes() == ROW_1 + ROW_2
+        assert journal_path.stat().st_size == 0
+
+        db = LedgerDataBase(ledger, journal=journal)
+        entry = Entry(name="Milk", amount=Decimal(30), reason="home")
+        entry.date_time = "2024-01-07 10:00:00"
+        assert db.write([entry])
+
+        # later connections (sessions) share the journal, the ledger isn't replayed again
+        assert connection.get_journal() is journal
+        assert ledger.read_bytes() == ROW_1 + ROW_2 + entries_to_csv([entry])
+        assert db.count() == 3
+    finally:
+        journal.close()
+
+
+def test_failed_append_leaves_no_record(paths):
+    ledger, journal_path = paths
+    # the ledger can't be appended to (nor truncated back)
+    ledger.mkdir()
+    journal = LedgerJournal(journal_path)
+    db = LedgerDataBase(ledger, journal=journal)
+    entry = Entry(name="Tea", amount=Decimal(12), reason="break")
+
+    try:
+        assert db.write([entry]) is False
+        assert journal.size == 0
+        assert read_records(journal_path) == ([], 0)
+    finally:
+        journal.close()
@@ -0,0 +1,42 @@
+from decimal import Decimal
+
+from accountant.database.entry import Entry, FlowType
+
+from flet_accountant.database.ledger_columns import LedgerColumns
+
+
+def _entry(name: str, reason: str, tag: str | None = None) -> Entry:
+    entry = Entry(name=name, amount=Decimal("12.50"), reason=reason)
+    entry.tag = tag
+    entry.flow_type = FlowType.DEBIT
+    entry.date_time = "2024-01-05 10:00:00"
+    return entry
+
+
+def test_entries_round_trip():
+    columns = LedgerColumns([_entry("Tea", "break"), _entry("Rent", "home", "housing")])
+
+    entry = columns[1]
+    assert (entry.name, entry.reason, entry.tag) == ("Rent", "home", "housing")
+    assert entry.amount == Decimal("12.50")
+    assert entry.flow_type == FlowType.DEBIT
+    assert entry.date_time == "2024-01-05 10:00:00"
+    assert columns[0].tag is None
+
+
+def test_search_matches_word_prefixes():
+    columns = LedgerColumns(
+        [
+            _entry("Grocery run", "milk and eggs"),
+            _entry("Swiggy", "dinner", "food"),
+            _entry("Mega grocer", "weekly"),
+        ]
+    )
+
+    assert columns.search("GRO") == [0, 2]
+    # every word has to match, in any of the fields
+    assert columns.search("gro milk") == [0]
+    assert columns.search("foo din") == [1]
+    # not inside a word
+    assert columns.search("ocer") == []
+    assert columns.search("  ") == []
@@ -0,0 +1,56 @@
+from decimal import Decimal
+
+from accountant.database.entry import FlowType
+
+from flet_accountant.database.parallel_loader import (
+    load_ledger_columns,
+    parse_range,
+    split_ranges,
+)
+
+HEADER = b"name,amount,reason,tags,flow_type,date_time\r\n"
+
+
+def _ledger(tmp_path, rows: int):
+    ledger = tmp_path / "ledger.csv"
+    lines = (
+        f"Entry {each},{each}.50,test,tag {each % 3},debit,2024-01-05 10:00:00\r\n"
+        for each in range(rows)
+    )
+    ledger.write_bytes(HEADER + "".join(lines).encode())
+    return ledger
+
+
+def test_ranges_cover_the_file_on_line_boundaries(tmp_path):
+    ledger = _ledger(tmp_path, 50)
+    data = ledger.read_bytes()
+
+    ranges = split_ranges(ledger, 4)
+
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+    for (_, end), (start, _) in zip(ranges, ranges[1:]):
+        assert end == start and data[start - 1 : start] == b"\n"
+    assert sum(len(parse_range(ledger, *each).amounts) for each in ranges) == 50
+
+
+def test_torn_last_line_is_skipped(tmp_path):
+    ledger = _ledger(tmp_path, 3)
+    with open(ledger, "ab") as file:
+        file.write(b"Entry 3,3.50,te")
+
+    assert len(load_ledger_columns(ledger, workers=1)) == 3
+
+
+def test_parallel_load_matches_the_single_process_one(tmp_path):
+    ledger = _ledger(tmp_path, 200)
+
+    single = load_ledger_columns(ledger, workers=1)
+    parallel = load_ledger_columns(ledger, workers=3, min_parallel_bytes=0)
+
+    assert len(parallel) == 200
+    assert [entry.name for entry in parallel] == [entry.name for entry in single]
+    assert [entry.tag for entry in parallel] == [entry.tag for entry in single]
+    assert parallel[199].amount == Decimal("199.50")
+    assert parallel[0].flow_type == FlowType.DEBIT
+    # the chunks' strings are merged into one set of dictionaries
+    assert len(parallel.tag_dictionary) == 3
@@ -0,0 +1,39 @@
+from decimal import Decimal
+
+from accountant.database.entry import Entry, FlowType
+
+from flet_accountant.database.partitioned_db import PartitionedDataBase
+
+
+def _debit(date_time: str, amount: str) -> Entry:
+    entry = Entry(name="spend", amount=Decimal(amount), reason="test")
+    entry.flow_type = FlowType.DEBIT
+    entry.date_time = date_time
+    return entry
+
+
+def test_manifest_saved_by_another_instance_is_reloaded(tmp_path):
+    folder = tmp_path / "ledger"
+    folder.mkdir()
+    first, second = PartitionedDataBase(folder), PartitionedDataBase(folder)
+    first.write([_debit("2024-03-01 10:00:00", "100.00")])
+    assert second.count() == 1
+
+    first.write([_debit("2025-03-01 10:00:00", "200.00")])
+    assert [each.key for each in second.partitions] == ["2024", "2025"]
+    assert second.count() == 2
+
+    assert first.archive("2024")
+    assert second.partitions[0].archived
+    assert [each.amount for each in second.iter_entries()] == [
+        Decimal("100.00"),
+        Decimal("200.00"),
+    ]
+
+
+def test_own_save_is_not_reloaded(tmp_path):
+    db = PartitionedDataBase(tmp_path / "ledger")
+    db.write([_debit("2024-03-01 10:00:00", "100.00")])
+    partitions = db._load()
+    db.write([_debit("2024-04-01 10:00:00", "100.00")])
+    assert db._load() is partitions
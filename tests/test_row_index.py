@@ -0,0 +1,54 @@
+from flet_accountant.database.row_index import RowOffsetIndex
+from flet_accountant.database.schema import iter_ledger_rows
+
+HEADER = b"name,amount,reason,tags,flow_type,date_time\r\n"
+
+
+def _row(number: int) -> bytes:
+    return f"Entry {number},{number},test,,debit,2024-01-05 10:00:00\r\n".encode()
+
+
+def _name_at(ledger, offset: int, skip: int) -> str:
+    with open(ledger, "rb") as file:
+        for _, _, row in iter_ledger_rows(file, offset):
+            if skip == 0:
+                return row[0]
+            skip -= 1
+    raise AssertionError("no such row")
+
+
+def test_locate_reaches_every_row(tmp_path):
+    ledger = tmp_path / "ledger.csv"
+    ledger.write_bytes(HEADER + b"".join(_row(each) for each in range(10)))
+    index = RowOffsetIndex(ledger, tmp_path / "ledger.idx", stride=4).refresh()
+
+    assert index.row_count == 10
+    assert len(index.offsets) == 3
+    for row in range(10):
+        assert _name_at(ledger, *index.locate(row)) == f"Entry {row}"
+
+
+def test_appended_rows_and_reopen(tmp_path):
+    ledger = tmp_path / "ledger.csv"
+    ledger.write_bytes(HEADER + b"".join(_row(each) for each in range(5)))
+    RowOffsetIndex(ledger, tmp_path / "ledger.idx", stride=2).refresh()
+
+    with open(ledger, "ab") as file:
+        file.write(b"".join(_row(each) for each in range(5, 9)))
+    # picks up the saved index, and only the appended rows
+    index = RowOffsetIndex(ledger, tmp_path / "ledger.idx", stride=2).refresh()
+
+    assert index.row_count == 9
+    assert _name_at(ledger, *index.locate(7)) == "Entry 7"
+
+
+def test_rewritten_ledger_is_indexed_again(tmp_path):
+    ledger = tmp_path / "ledger.csv"
+    ledger.write_bytes(HEADER + b"".join(_row(each) for each in range(6)))
+    index = RowOffsetIndex(ledger, tmp_path / "ledger.idx", stride=2).refresh()
+
+    ledger.write_bytes(HEADER + b"".join(_row(each) for each in range(20, 23)))
+    index.refresh()
+
+    assert index.row_count == 3
+    assert _name_at(ledger, *index.locate(2)) == "Entry 22"
@@ -0,0 +1,48 @@
+import datetime
+from decimal import Decimal
+
+from accountant.database.entry import Entry
+
+from flet_accountant.database.db import LedgerDataBase
+from flet_accountant.database.importer import BulkImporter
+from flet_accountant.database.schema import entries_to_csv, flatten_entry
+
+
+def _entry(name: str, amount: str = "250.00") -> Entry:
+    entry = Entry(name=name, amount=Decimal(amount), reason="statement")
+    entry.date_time = str(datetime.datetime(2024, 1, 5))
+    return entry
+
+
+def test_flatten_entry_leaves_single_line_entries_alone():
+    entry = _entry("SWIGGY")
+    assert flatten_entry(entry) is entry
+
+
+def test_flatten_entry_copies_multi_line_entries():
+    entry = _entry("UPI/123\r\nSWIGGY\nORDER\rID")
+    flattened = flatten_entry(entry)
+    assert flattened.name == "UPI/123 SWIGGY ORDER ID"
+    assert entry.name == "UPI/123\r\nSWIGGY\nORDER\rID"
+
+
+def test_entries_to_csv_writes_one_line_per_entry():
+    payload = entries_to_csv([_entry("UPI/123\nSWIGGY"), _entry("ZOMATO")])
+    assert payload.count(b"\n") == 2
+
+
+def test_import_of_multi_line_cells(tmp_path):
+    statement = tmp_path / "statement.csv"
+    statement.write_text(
+        'date,description,amount\n2024-01-05,"UPI/123\nSWIGGY",-250.00\n'
+        "2024-01-06,ZOMATO,-120.00\n"
+    )
+    db = LedgerDataBase(tmp_path / "ledger.csv")
+
+    progress = BulkImporter(db).import_file(statement)
+
+    assert progress.rows_written == 2
+    assert db.count() == 2
+    entries = db.read_entries(0, 10)
+    assert [entry.name for entry in entries] == ["UPI/123 SWIGGY", "ZOMATO"]
+    assert [entry.amount for entry in entries] == [Decimal("250.00"), Decimal("120.00")]
@@ -0,0 +1,43 @@
+from flet_accountant.database.search_index import SearchIndex, tokenize
+
+HEADER = b"name,amount,reason,tags,flow_type,date_time\r\n"
+ROWS = [
+    b"Grocery run,250,milk and eggs,None,debit,2024-01-05 10:00:00\r\n",
+    b"Swiggy,400,dinner,food,debit,2024-01-06 20:00:00\r\n",
+    b"Salary,90000,january,None,credit,2024-01-31 09:00:00\r\n",
+]
+
+
+def test_tokenize():
+    assert tokenize("Milk & Eggs, 2x") == ["milk", "eggs", "2x"]
+
+
+def test_search_matches_word_prefixes(tmp_path):
+    ledger = tmp_path / "ledger.csv"
+    ledger.write_bytes(HEADER + b"".join(ROWS))
+    index = SearchIndex(ledger, tmp_path / "ledger.search.json").refresh()
+
+    assert index.search("gro") == [0]
+    assert index.search("MILK gro") == [0]
+    assert index.search("foo din") == [1]
+    # every word has to match
+    assert index.search("milk dinner") == []
+    # the "None" written for a missing tag isn't searchable
+    assert index.search("none") == []
+    assert index.search("  ") == []
+
+
+def test_appended_rows_survive_a_reopen(tmp_path):
+    ledger = tmp_path / "ledger.csv"
+    ledger.write_bytes(HEADER + b"".join(ROWS[:2]))
+    SearchIndex(ledger, tmp_path / "ledger.search.json").refresh()
+
+    with open(ledger, "ab") as file:
+        file.write(ROWS[2])
+    index = SearchIndex(ledger, tmp_path / "ledger.search.json").refresh()
+    assert index.search("sal") == [2]
+
+    # the log of appended rows is replayed on the next open
+    assert SearchIndex(ledger, tmp_path / "ledger.search.json").refresh().search(
+        "swig"
+    ) == [1]
@@ -0,0 +1,72 @@
+import threading
+from decimal import Decimal
+
+import pytest
+from accountant.database.entry import Entry
+
+from flet_accountant.database.change_feed import ChangeFeed, ChangeKind
+from flet_accountant.database.ledger_columns import LedgerColumns
+from flet_accountant.database.write_queue import EntryWriteQueue
+
+
+class RecordingColumns(LedgerColumns):
+    def __init__(self):
+        super().__init__()
+        self.batches: list[list[str]] = []
+
+    def write(self, entries: list[Entry]) -> bool:
+        self.batches.append([entry.name for entry in entries])
+        return super().write(entries)
+
+
+def _entry(name: str) -> Entry:
+    return Entry(name=name, amount=Decimal("1.00"), reason="test")
+
+
+def test_submitted_entries_are_written_in_batches():
+    db = RecordingColumns()
+    write_queue = EntryWriteQueue(db, max_batch_size=3, max_delay=10)
+
+    futures = [write_queue.submit(_entry(f"Entry {each}")) for each in range(5)]
+    assert futures[2].result(timeout=5)
+    assert write_queue.close(timeout=5)
+
+    assert all(future.result() for future in futures)
+    assert db.batches == [["Entry 0", "Entry 1", "Entry 2"], ["Entry 3", "Entry 4"]]
+    assert [entry.name for entry in db] == [f"Entry {each}" for each in range(5)]
+
+
+def test_batch_waits_for_the_entries_submitted_before_it():
+    db = RecordingColumns()
+    write_queue = EntryWriteQueue(db, max_delay=10)
+    written = threading.Event()
+    write_queue.submit(_entry("Tea"), on_done=lambda entry, result: written.set())
+
+    assert write_queue.write([_entry("Rent"), _entry("Milk")])
+    assert written.is_set()
+    assert db.batches == [["Tea"], ["Rent", "Milk"]]
+    write_queue.close(timeout=5)
+
+
+def test_written_entries_are_published():
+    db = RecordingColumns()
+    change_feed = ChangeFeed()
+    changes = []
+    change_feed.subscribe(changes.append)
+    write_queue = EntryWriteQueue(db, change_feed=change_feed)
+
+    write_queue.write([_entry("Tea")])
+    write_queue.write([_entry("Rent"), _entry("Milk")])
+    write_queue.close(timeout=5)
+
+    assert [change.kind for change in changes] == [ChangeKind.INSERTED] * 2
+    assert [change.count for change in changes] == [1, 3]
+    assert [entry.name for entry in changes[1].entries] == ["Rent", "Milk"]
+
+
+def test_closed_queue_refuses_submits():
+    write_queue = EntryWriteQueue(RecordingColumns())
+    assert write_queue.close(timeout=5)
+
+    with pytest.raises(RuntimeError):
+        write_queue.submit(_entry("Tea"))